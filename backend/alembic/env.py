@@ -9,7 +9,7 @@ from alembic import context
 
 # Import your models and database URL
 from app.database import ASYNC_DATABASE_URL, Base
-from app.models import Book  # Import all models here
+from app.models import Book, Chapter, RenderJob  # Import all models here
 from app.auth.models import User  # Import User model
 
 # this is the Alembic Config object, which provides
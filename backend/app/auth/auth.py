@@ -1,15 +1,15 @@
 from fastapi_users.authentication import CookieTransport, JWTStrategy, AuthenticationBackend
-from fastapi_users import FastAPIUsers
+from fastapi_users import BaseUserManager, FastAPIUsers
+from app.auth.cache import user_cache
 from app.auth.manager import get_user_manager
 from app.auth.models import User
 from app.config import get_settings
 from typing import Optional
-from fastapi import Request, Response
+from fastapi import Depends, Header, HTTPException, Response
+import hmac
+import jwt
 import logging
-from urllib.parse import urlparse
 
-# Configure more detailed logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
@@ -29,20 +29,12 @@ logger.info(f"Using cookie domain: {backend_domain}")
 class DebugCookieTransport(CookieTransport):
     async def get_login_response(self, token: str) -> Response:
         logger.debug(f"Setting login cookie with token length: {len(token)}")
-        response = await super().get_login_response(token)
-        logger.debug(f"Login response headers: {dict(response.headers)}")
-        return response
+        return await super().get_login_response(token)
 
     async def get_logout_response(self) -> Response:
         logger.debug("Getting logout response")
         return await super().get_logout_response()
 
-    async def get_strategy_from_request(self, request: Request) -> Optional[str]:
-        logger.debug(f"Getting strategy from request. Cookies present: {request.cookies.keys()}")
-        token = await super().get_strategy_from_request(request)
-        logger.debug(f"Token found in request: {'Yes' if token else 'No'}")
-        return token
-
 # Cookie transport for authentication
 cookie_transport = DebugCookieTransport(
     cookie_name="audiobook_auth",
@@ -61,28 +53,35 @@ logger.info(f"- Secure: {settings.cookie_secure}")
 logger.info(f"- SameSite: {settings.cookie_samesite}")
 logger.info(f"- Domain: {backend_domain}")
 
-# JWT Strategy with debug logging
-class DebugJWTStrategy(JWTStrategy):
-    async def read_token(self, token: Optional[str]) -> Optional[str]:
-        logger.debug(f"Reading JWT token: {'Present' if token else 'None'}")
-        result = await super().read_token(token)
-        logger.debug(f"JWT token validation result: {'Valid' if result else 'Invalid'}")
-        return result
+# JWT Strategy that reuses recent user lookups
+class CachedJWTStrategy(JWTStrategy):
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager[User, int]
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        user = user_cache.get(token)
+        if user is not None:
+            return user
+        user = await super().read_token(token, user_manager)
+        if user is not None and user.is_active:
+            # The signature was verified above, only the expiry is needed here
+            claims = jwt.decode(token, options={"verify_signature": False})
+            user_cache.put(token, user, claims.get("exp"))
+        return user
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        user_cache.invalidate_token(token)
+        await super().destroy_token(token, user)
+
+# A single strategy instance serves every request
+jwt_strategy = CachedJWTStrategy(secret=settings.jwt_secret, lifetime_seconds=3600)
 
 def get_jwt_strategy() -> JWTStrategy:
-    logger.debug("Creating new JWT strategy")
-    return DebugJWTStrategy(secret=settings.jwt_secret, lifetime_seconds=3600)
-
-# Authentication backend with debug logging
-class DebugAuthBackend(AuthenticationBackend):
-    async def authenticate(self, request: Request) -> Optional[str]:
-        logger.debug(f"Authenticating request to: {request.url.path}")
-        strategy = await self.get_strategy_from_request(request)
-        logger.debug(f"Authentication strategy result: {'Success' if strategy else 'Failed'}")
-        return strategy
+    return jwt_strategy
 
 # Authentication backend
-auth_backend = DebugAuthBackend(
+auth_backend = AuthenticationBackend(
     name="jwt",
     transport=cookie_transport,
     get_strategy=get_jwt_strategy,
@@ -94,13 +93,28 @@ fastapi_users = FastAPIUsers[User, int](
     [auth_backend],
 )
 
-# Auth dependencies with debug logging
-async def debug_current_active_user(request: Request):
-    logger.debug(f"Checking current active user for path: {request.url.path}")
-    logger.debug(f"Request headers: {dict(request.headers)}")
-    logger.debug(f"Request cookies: {request.cookies}")
-    return await fastapi_users.current_user(active=True)(request)
-
 # Auth dependencies
-current_active_user = debug_current_active_user
-current_superuser = fastapi_users.current_user(active=True, superuser=True) 
\ No newline at end of file
+current_active_user = fastapi_users.current_user(active=True)
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
+optional_superuser = fastapi_users.current_user(active=True, superuser=True, optional=True)
+
+async def current_operator(
+    authorization: Optional[str] = Header(default=None),
+    user: Optional[User] = Depends(optional_superuser)
+) -> None:
+    """
+    Allow access to operational endpoints such as /stats and /metrics
+
+    Accepts a signed-in superuser, or settings.metrics_token sent as a
+    bearer token so a scraper can authenticate without a user session.
+
+    Raises:
+        HTTPException: 403 if neither is present
+    """
+    if user is not None:
+        return
+    token = settings.metrics_token
+    if token and authorization and authorization.startswith("Bearer "):
+        if hmac.compare_digest(authorization[len("Bearer "):].encode(), token.encode()):
+            return
+    raise HTTPException(status_code=403, detail="Not authorized")
\ No newline at end of file
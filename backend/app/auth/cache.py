@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from app.auth.models import User
+from app.config import get_settings
+import hashlib
+import time
+
+settings = get_settings()
+
+class CachedUser(NamedTuple):
+    """Column values of an authenticated user and when they stop being trusted"""
+    expires_at: float
+    user_id: int
+    values: Dict[str, Any]
+
+class UserCache:
+    """
+    Short-lived map from access tokens to the users they authenticate
+
+    Lets authenticated requests skip the user lookup while a token is being
+    reused. Entries expire after the TTL or when the token does, whichever
+    is sooner, and are dropped on logout and whenever the user is updated,
+    deactivated or deleted. Tokens are keyed by their SHA-256 so the cache
+    does not hold usable credentials.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedUser]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[User]:
+        """
+        Get a fresh detached copy of the user a token authenticates
+
+        Args:
+            token: The access token
+
+        Returns:
+            Optional[User]: The user, or None if the token is not cached
+        """
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.time():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Every request gets its own instance, so sessions never share one
+        user = User(**entry.values)
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None) -> None:
+        """Remember the user a token authenticated, for at most the TTL or the token's lifetime"""
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        key = self._key(token)
+        self._remove(key)
+        values = {attribute.key: getattr(user, attribute.key) for attribute in inspect(User).column_attrs}
+        self._entries[key] = CachedUser(expires_at, user.id, values)
+        self._keys_by_user.setdefault(user.id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry.user_id]
+
+    def invalidate_token(self, token: str) -> None:
+        """Forget a single token, e.g. on logout"""
+        key = self._key(token)
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Forget every token of a user whose account changed"""
+        for key in list(self._keys_by_user.get(user_id, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+user_cache = UserCache(settings.auth_user_cache_ttl_seconds, settings.auth_user_cache_max_entries)
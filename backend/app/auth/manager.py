@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 from fastapi import Depends, Request, Response
 from fastapi_users import BaseUserManager, IntegerIDMixin, exceptions, models, schemas
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 
+from app.auth.cache import user_cache
 from app.auth.models import User
 from app.database import get_async_session
 
@@ -39,6 +40,23 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             {"last_login": datetime.utcnow()}
         )
 
+    async def on_after_update(
+        self,
+        user: User,
+        update_dict: Dict[str, Any],
+        request: Optional[Request] = None,
+    ):
+        """Drop cached logins so password and activation changes apply immediately"""
+        user_cache.invalidate_user(user.id)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        """Drop cached logins after a password reset"""
+        user_cache.invalidate_user(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        """Drop cached logins of a deleted user"""
+        user_cache.invalidate_user(user.id)
+
     async def on_after_forgot_password(
         self, user: User, token: str, request: Optional[Request] = None
     ):
@@ -33,16 +33,87 @@ class Settings(BaseSettings):
     # Database Settings
     database_url: str
     async_database_url: str | None = None
+    db_echo: bool = False  # Log every SQL statement
+    db_pool_size: int = 10  # Persistent connections kept by the pool
+    db_max_overflow: int = 10  # Extra connections opened under load
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Reconnect connections older than this many seconds
+    db_pool_pre_ping: bool = True  # Test connections on checkout, replacing dropped ones
+    db_slow_query_ms: float = 500.0  # Log queries slower than this
     
     # Authentication Settings
     jwt_secret: str
     reset_password_secret: str
     verification_secret: str
+    auth_user_cache_ttl_seconds: float = 60.0  # Reuse a token's user lookup for this long, 0 to disable
+    auth_user_cache_max_entries: int = 10000
     
+    # TTS Provider Settings
+    tts_provider: str = "elevenlabs"  # "elevenlabs", or "simulated" to run offline
+    tts_simulated_latency_ms: float = 250.0  # Simulated time to first byte
+    tts_simulated_jitter_ms: float = 100.0  # Uniform +/- spread around the simulated latency
+    tts_simulated_error_rate: float = 0.0  # Fraction of simulated calls failing with 503
+    tts_simulated_realtime_factor: float = 5.0  # Simulated audio is produced this many times faster than it plays
+    tts_simulated_seed: int = 0
+
     # ElevenLabs Settings
-    elevenlabs_api_key: str
+    elevenlabs_api_key: str | None = None  # Required when tts_provider is "elevenlabs"
+    elevenlabs_base_url: str = "https://api.elevenlabs.io/v1"
     default_voice: str = "Adam"
     max_text_length: int = 500  # Maximum number of characters for sample
+    tts_model_id: str = "eleven_monolingual_v1"
+    tts_chunk_max_chars: int = 2500  # Maximum characters per upstream TTS call
+    tts_max_concurrency: int = 4  # Maximum parallel TTS calls per book render
+    tts_global_concurrency: int = 8  # Upstream TTS calls in flight across all users
+    tts_user_concurrency: int = 4  # Upstream TTS calls in flight per user
+    tts_interactive_reserved_slots: int = 2  # Global slots bulk renders may not take
+    tts_preview_deadline_seconds: float = 5.0  # Give up on a queued voice preview after this long
+    tts_sample_deadline_seconds: float = 20.0  # Give up on a queued sample after this long
+    tts_timeout_seconds: float = 60.0  # Per-call timeout for upstream TTS requests
+    tts_connect_timeout_seconds: float = 5.0
+    tts_max_connections: int = 20  # Size of the shared keep-alive connection pool
+    tts_max_keepalive_connections: int = 10
+    voice_catalog_ttl_seconds: float = 3600.0  # Refresh the cached voice list after this age
+
+    # Audio Cache Settings
+    audio_cache_dir: str = "storage/audio-cache"
+    audio_cache_max_bytes: int = 512 * 1024 * 1024  # LRU eviction above this size
+
+    # Upload Parsing Settings
+    epub_parse_workers: int = 2  # Processes parsing EPUB chapters in parallel, 0 to parse in-thread
+    epub_parallel_min_bytes: int = 512 * 1024  # Smaller EPUBs are parsed in-thread
+
+    # Text Normalization Settings
+    normalize_expand_abbreviations: bool = True  # Spell out Mr., Dr., e.g. and similar
+    normalize_expand_numbers: bool = True  # Spell out numbers, ordinals and years
+    normalize_header_min_repeats: int = 5  # Short lines repeated this often are dropped as running headers
+
+    # Voice Preview Settings
+    voice_preview_dir: str = "storage/voice-previews"
+    voice_preview_concurrency: int = 2  # Parallel renders when the catalog changes
+    voice_preview_max_age: int = 86400  # Cache-Control max-age for preview responses
+
+    # Blob Store Settings
+    blob_store_backend: str = "local"  # Where rendered audiobooks are stored
+    blob_store_dir: str = "storage/blobs"
+    blob_accel_redirect_prefix: str | None = None  # e.g. "/internal-blobs/" to let nginx send blobs via X-Accel-Redirect
+
+    # Render Job Settings
+    render_workers: int = 2  # Books rendered concurrently by background workers
+    render_heartbeat_interval: float = 10.0  # Seconds between heartbeats of a claimed job
+    render_stale_after: float = 60.0  # Seconds without a heartbeat before another process may take a job over
+    render_chunk_dir: str = "storage/render-chunks"
+    render_chunk_max_bytes: int = 8 * 1024 * 1024 * 1024
+    render_output_dir: str = "storage/renders"
+    render_audio_max_age: int = 3600  # Cache-Control max-age for rendered audio responses
+    render_assembly_workers: int = 2  # Processes joining chunk audio and exporting M4B files
+    ffmpeg_path: str = "ffmpeg"  # Used for M4B export
+    m4b_audio_codec: str = "aac"  # "copy" keeps the MP3 stream, which many audiobook players reject in an M4B
+    m4b_audio_bitrate: str = "64k"  # Used when m4b_audio_codec re-encodes
+
+    # Metrics Settings
+    server_timing: bool = True  # Report per-stage and database durations in Server-Timing headers
+    metrics_token: str | None = None  # Bearer token for /metrics and /stats; superusers need none
     
     class Config:
         env_file = ".env"
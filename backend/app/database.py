@@ -3,6 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 import os
 from dotenv import load_dotenv
+from app.config import get_settings
+from app.db_metrics import DatabaseMetrics, InstrumentedPool
 
 load_dotenv()
 
@@ -15,12 +17,25 @@ if not DATABASE_URL:
 ASYNC_DATABASE_URL = DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://')
 ASYNC_DATABASE_URL = ASYNC_DATABASE_URL.replace('?sslmode=require', '')
 
-# Create async engine with SSL configuration
-engine = create_async_engine(
-    ASYNC_DATABASE_URL,
-    echo=True,
-    connect_args={"ssl": True}
-)
+settings = get_settings()
+db_metrics = DatabaseMetrics(settings.db_slow_query_ms / 1000)
+InstrumentedPool.metrics = db_metrics
+
+engine_options = {"echo": settings.db_echo}
+if ASYNC_DATABASE_URL.startswith('postgresql'):
+    # SSL and a sized, instrumented connection pool for PostgreSQL
+    engine_options.update(
+        connect_args={"ssl": True},
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping
+    )
+
+engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options)
+db_metrics.instrument(engine)
 
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -0,0 +1,167 @@
+from contextvars import ContextVar
+from typing import Dict
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.metrics import STAGE_SECONDS
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text written to the slow query log
+SLOW_QUERY_LOG_CHARS = 500
+
+class RequestDBTime:
+    """Database time spent on behalf of a single request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+request_db_time: ContextVar[RequestDBTime | None] = ContextVar("request_db_time", default=None)
+
+class DatabaseMetrics:
+    """
+    Process-wide database counters
+
+    Tracks pool checkout waits, query counts and durations, slow queries
+    and database time per endpoint.
+    """
+
+    def __init__(self, slow_query_seconds: float):
+        self.slow_query_seconds = slow_query_seconds
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.checkout_wait_max_seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.slow_queries = 0
+        self.routes: Dict[str, Dict[str, float]] = {}
+
+    def record_checkout(self, seconds: float, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        self.checkout_timeouts += timed_out
+        self.checkout_wait_seconds += seconds
+        self.checkout_wait_max_seconds = max(self.checkout_wait_max_seconds, seconds)
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.query_seconds += seconds
+        timing = request_db_time.get()
+        if timing is not None:
+            timing.queries += 1
+            timing.seconds += seconds
+        if seconds >= self.slow_query_seconds:
+            self.slow_queries += 1
+            logger.warning(f"Slow query ({seconds * 1000:.0f} ms): {statement[:SLOW_QUERY_LOG_CHARS]}")
+
+    def record_request(self, route: str, timing: RequestDBTime) -> None:
+        stats = self.routes.setdefault(route, {"requests": 0, "queries": 0, "db_seconds": 0.0})
+        stats["requests"] += 1
+        stats["queries"] += timing.queries
+        stats["db_seconds"] += timing.seconds
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        """Time every statement executed by the engine"""
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._query_started = time.perf_counter()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            self.record_query(statement, time.perf_counter() - context._query_started)
+
+    def stats(self, pool: Pool) -> Dict[str, object]:
+        """Get pool occupancy, checkout waits, query timings and per-endpoint database time"""
+        result: Dict[str, object] = {}
+        if isinstance(pool, QueuePool):
+            result["pool"] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            }
+        result.update({
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_avg_ms": round(1000 * self.checkout_wait_seconds / self.checkouts, 3) if self.checkouts else 0.0,
+            "checkout_wait_max_ms": round(1000 * self.checkout_wait_max_seconds, 3),
+            "queries": self.queries,
+            "query_time_ms": round(1000 * self.query_seconds, 3),
+            "slow_queries": self.slow_queries,
+            "slow_query_threshold_ms": 1000 * self.slow_query_seconds,
+            "routes": {
+                route: {
+                    "requests": stats["requests"],
+                    "queries": stats["queries"],
+                    "db_time_ms": round(1000 * stats["db_seconds"], 3),
+                    "avg_db_time_ms": round(1000 * stats["db_seconds"] / stats["requests"], 3)
+                }
+                for route, stats in self.routes.items()
+            }
+        })
+        return result
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection"""
+
+    metrics: DatabaseMetrics | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+class DBTimingMiddleware:
+    """
+    Attribute database time to each HTTP request
+
+    Adds a Server-Timing header with the time spent in queries before the
+    response started, unless server_timing is off, and accumulates
+    per-endpoint totals in the metrics and the "db" stage histogram.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: DatabaseMetrics, server_timing: bool = True):
+        self.app = app
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestDBTime()
+        token = request_db_time.set(timing)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.server_timing and timing.queries:
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={timing.seconds * 1000:.1f};desc="{timing.queries} quer{"y" if timing.queries == 1 else "ies"}"'.encode()
+                ))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_db_time.reset(token)
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                self.metrics.record_request(f"{scope['method']} {endpoint.__name__}", timing)
+            if timing.queries:
+                STAGE_SECONDS.observe(timing.seconds, stage="db")
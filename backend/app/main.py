@@ -2,6 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.routers import api, auth
+from app.services import audiobook, text_processor, tts_service
+from app.services.render_queue import render_queue
+from app.database import db_metrics
+from app.db_metrics import DBTimingMiddleware
+from app.metrics import MetricsMiddleware
 from app.config import get_settings
 from app.models import ErrorResponse
 
@@ -16,6 +21,12 @@ app = FastAPI(
     }
 )
 
+# Attribute database time to each request (added before CORS so CORS stays outermost)
+app.add_middleware(DBTimingMiddleware, metrics=db_metrics, server_timing=settings.server_timing)
+
+# Count and time requests and report their processing stages
+app.add_middleware(MetricsMiddleware, server_timing=settings.server_timing)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +40,18 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api")
 app.include_router(api.router, prefix="/api")
 
+@app.on_event("startup")
+async def startup():
+    tts_service.startup()
+    await render_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await render_queue.stop()
+    await tts_service.close()
+    text_processor.shutdown()
+    audiobook.shutdown()
+
 @app.exception_handler(Exception)
 async def generic_exception_handler(request, exc):
     return JSONResponse(
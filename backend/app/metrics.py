@@ -0,0 +1,335 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import asyncio
+import math
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond stages to long upstream calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# Starlette appends the charset to text/ media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class MetricFamily:
+    """Samples of one metric, as produced by a collector at scrape time"""
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.samples: List[Tuple[str, LabelValues, float]] = []
+
+    def add(self, value: float, *labelvalues: str, suffix: str = "") -> "MetricFamily":
+        self.samples.append((suffix, tuple(labelvalues), value))
+        return self
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labelvalues, value in self.samples:
+            names = self.labelnames
+            if suffix == "_bucket":
+                names = self.labelnames + ("le",)
+            lines.append(f"{self.name}{suffix}{_format_labels(names, labelvalues)} {_format_value(value)}")
+        return lines
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels; names end in _total"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.documentation, self.kind, self.labelnames)
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                family.add(value, *key)
+        return family
+
+class Gauge(_Metric):
+    """Value that goes up and down, optionally split by labels"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.documentation, self.kind, self.labelnames)
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                family.add(value, *key)
+        return family
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, optionally split by labels"""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count in each bucket (plus +Inf), sum and count
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.documentation, self.kind, self.labelnames)
+        with self._lock:
+            for key, (counts, totals) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    family.add(cumulative, *key, "+Inf" if math.isinf(bound) else repr(bound), suffix="_bucket")
+                family.add(totals[0], *key, suffix="_sum")
+                family.add(totals[1], *key, suffix="_count")
+        return family
+
+class Registry:
+    """Metrics defined in code plus collectors that read existing counters at scrape time"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[MetricFamily]]] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], List[MetricFamily]]) -> None:
+        """Register a function returning metric families built from live state"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect().render())
+        for collector in self._collectors:
+            for family in collector():
+                lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "audiobook_stage_seconds",
+    "Time spent in each processing stage",
+    ["stage"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "audiobook_http_request_seconds",
+    "HTTP request duration until the response is fully sent",
+    ["method", "endpoint", "status"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "audiobook_http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+
+# Stage durations of the current request, reported in its Server-Timing header
+request_timings: ContextVar[List[Tuple[str, float]] | None] = ContextVar("request_timings", default=None)
+
+def record_stage(name: str, seconds: float) -> None:
+    """Observe a stage duration and attribute it to the current request"""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a processing stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    """
+    Format stage durations for a Server-Timing header
+
+    Repeated stages, such as parallel upstream calls, are summed and
+    described with how many times they ran.
+    """
+    totals: Dict[str, List[float]] = {}
+    for name, seconds in timings:
+        total = totals.setdefault(name, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" + (f';desc="{count} times"' if count > 1 else "")
+        for name, (seconds, count) in totals.items()
+    )
+
+# Marks set by a TimedRoute's endpoint wrapper for its handler
+_route_marks: ContextVar[Dict[str, float] | None] = ContextVar("_route_marks", default=None)
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an async endpoint to mark when it starts and finishes"""
+    # FastAPI reads the endpoint's signature through functools.wraps
+    @wraps(endpoint)
+    async def timed_endpoint(*args, **kwargs):
+        marks = _route_marks.get()
+        if marks is not None:
+            marks["endpoint_started"] = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            if marks is not None:
+                marks["endpoint_finished"] = time.perf_counter()
+
+    return timed_endpoint
+
+class TimedRoute(APIRoute):
+    """
+    Route that splits each request into prepare, endpoint and serialize stages
+
+    prepare covers reading the body, dependencies (authentication and the
+    database session) and Pydantic validation; endpoint is the handler
+    itself; serialize is building the response from its return value.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Response]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            marks: Dict[str, float] = {}
+            token = _route_marks.set(marks)
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                _route_marks.reset(token)
+                finished = time.perf_counter()
+                endpoint_started = marks.get("endpoint_started")
+                if endpoint_started is not None:
+                    record_stage("prepare", endpoint_started - started)
+                    endpoint_finished = marks.get("endpoint_finished", finished)
+                    record_stage("endpoint", endpoint_finished - endpoint_started)
+                    record_stage("serialize", finished - endpoint_finished)
+
+        return timed_handler
+
+class MetricsMiddleware:
+    """
+    Count in-flight requests, time them per endpoint and report stage timings
+
+    When server_timing is set, stages recorded before the response starts
+    are added to a Server-Timing header.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = request_timings.set(timings)
+        status = {"code": 500}
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.server_timing and timings:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(timings).encode()))
+                    message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+            HTTP_IN_FLIGHT.dec()
+            endpoint = scope.get("endpoint")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                endpoint=endpoint.__name__ if endpoint is not None else "unmatched",
+                status=str(status["code"])
+            )
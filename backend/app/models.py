@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, TYPE_CHECKING, ForwardRef
+from typing import Optional, List, Dict, TYPE_CHECKING, ForwardRef
 from datetime import datetime
-from sqlalchemy import String, Text, DateTime, ForeignKey, JSON, Integer
+from sqlalchemy import String, Text, DateTime, ForeignKey, JSON, Integer, BigInteger, Float, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .database import Base
 
@@ -31,17 +31,71 @@ class GenerateAudioRequest(BaseModel):
             return self.text[self.start_position:self.end_position]
         return self.text[self.start_position:]
 
+class BookSampleRequest(BaseModel):
+    """Request model for generating a sample from a stored book"""
+    voice_id: Optional[str] = None
+    start_position: int = Field(default=0, ge=0)
+    end_position: Optional[int] = Field(default=None, ge=0)
+    chapter_position: Optional[int] = Field(default=None, ge=0)  # Offsets are relative to this chapter
+    snap: Optional[str] = Field(default=None, pattern="^(sentence|paragraph)$")
+
+class TextEditRequest(BaseModel):
+    """Replace content[start:end] with text"""
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+class ContentPatchRequest(BaseModel):
+    """Request model for patching a book's content; offsets refer to the content before the patch"""
+    edits: List[TextEditRequest] = Field(..., min_length=1)
+
+class ContentPatchResult(BaseModel):
+    """Outcome of a content patch"""
+    length: int
+    normalized_length: int
+    total_chunks: int
+    invalidated_chunks: List[int]  # Indices of chunks whose audio must be synthesized again
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     detail: str
 
+class BookSummary(BaseModel):
+    """Lightweight book projection for library listings"""
+    id: int
+    title: str
+    upload_date: datetime
+    length: int
+    normalized_length: Optional[int] = None
+    last_voice_id: Optional[str] = None
+
+class BookPage(BaseModel):
+    """A page of book summaries with the cursor for the next page"""
+    books: List[BookSummary]
+    next_cursor: Optional[str] = None
+
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (Index("ix_books_user_id_upload_date", "user_id", "upload_date"),)
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     title: Mapped[str] = mapped_column(String(255))
-    content: Mapped[str] = mapped_column(Text)
+    # Deferred so listings never load the full text; use undefer() to fetch it
+    content: Mapped[str] = mapped_column(Text, deferred=True)
+    # Text actually sent for synthesis, see services/normalizer.py; NULL for books
+    # stored before normalization existed
+    normalized_content: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
+    # Character counts of content and normalized_content, kept with them so
+    # listings never have to read (or on PostgreSQL, detoast) the text
+    content_length: Mapped[int] = mapped_column(Integer)
+    normalized_length: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    normalization_offsets: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    normalization_report: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, deferred=True)
+    # Sentence and paragraph boundaries of the normalized text, see services/boundaries.py
+    boundary_index: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    # Synthesis chunk spans of the normalized text, kept stable across edits
+    chunk_plan: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
     upload_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     last_voice_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     voice_settings: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
@@ -52,5 +106,177 @@ class Book(Base):
     else:
         user: Mapped[ForwardRef("User")] = relationship("User", back_populates="books")
 
+    chapters: Mapped[List["Chapter"]] = relationship(
+        "Chapter",
+        back_populates="book",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="Chapter.position"
+    )
+
+    audio: Mapped[List["BookAudio"]] = relationship(
+        "BookAudio",
+        back_populates="book",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="BookAudio.created_at"
+    )
+
     def __repr__(self) -> str:
-        return f"Book(id={self.id}, title={self.title}, user_id={self.user_id})" 
\ No newline at end of file
+        return f"Book(id={self.id}, title={self.title}, user_id={self.user_id})"
+
+class NormalizationRuleReport(BaseModel):
+    """Edits made by a single normalization rule"""
+    edits: int
+    chars_saved: int  # Net; negative for rules that spell text out
+
+class NormalizationReport(BaseModel):
+    """Characters saved by normalizing a book before synthesis"""
+    book_id: int
+    original_chars: int
+    normalized_chars: int
+    chars_saved: int  # Removed whitespace and boilerplate
+    percent_saved: float
+    chars_added: int  # Added by spelling out abbreviations and numbers
+    rules: Dict[str, NormalizationRuleReport]
+
+class Chapter(Base):
+    """A chapter of a book, stored as a character range of Book.content"""
+    __tablename__ = "chapters"
+    __table_args__ = (UniqueConstraint("book_id", "position"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), index=True)
+    position: Mapped[int] = mapped_column(Integer)  # Index in the EPUB spine
+    title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    start_offset: Mapped[int] = mapped_column(Integer)
+    end_offset: Mapped[int] = mapped_column(Integer)
+
+    book: Mapped["Book"] = relationship("Book", back_populates="chapters")
+
+    def __repr__(self) -> str:
+        return f"Chapter(id={self.id}, book_id={self.book_id}, position={self.position}, title={self.title})"
+
+class ChapterSummary(BaseModel):
+    """Chapter metadata without its text"""
+    id: int
+    position: int
+    title: Optional[str] = None
+    start_offset: int
+    end_offset: int
+
+    class Config:
+        from_attributes = True
+
+class ChapterContent(ChapterSummary):
+    """A single chapter with its text"""
+    content: str
+
+class SnappedSelection(BaseModel):
+    """A selection widened to whole sentences or paragraphs"""
+    start_offset: int
+    end_offset: int
+    unit: str
+
+class RenderJob(Base):
+    """A background render of a whole book, resumable chunk by chunk"""
+    __tablename__ = "render_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    voice_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default="queued", index=True)  # queued, running, completed, failed
+    total_chunks: Mapped[int] = mapped_column(Integer, default=0)
+    completed_chunks: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    output_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Process running the job and when it last reported, see services/render_queue.py
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"RenderJob(id={self.id}, book_id={self.book_id}, status={self.status})"
+
+class BookAudio(Base):
+    """Rendered audio of a book, stored in the blob store under its SHA-256"""
+    __tablename__ = "book_audio"
+    __table_args__ = (UniqueConstraint("book_id", "sha256"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), index=True)
+    render_job_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("render_jobs.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    sha256: Mapped[str] = mapped_column(String(64), index=True)
+    format: Mapped[str] = mapped_column(String(10))  # mp3 or m4b
+    voice_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger)
+    duration_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    book: Mapped["Book"] = relationship("Book", back_populates="audio")
+
+    def __repr__(self) -> str:
+        return f"BookAudio(id={self.id}, book_id={self.book_id}, format={self.format}, sha256={self.sha256})"
+
+class AudioBlob(Base):
+    """
+    A blob in the blob store that book_audio rows may link to
+
+    Storing and deleting a blob both lock its row first, so a blob is never
+    deleted between another book's store and link, see services/render_queue.py.
+    """
+    __tablename__ = "audio_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"AudioBlob(sha256={self.sha256}, size_bytes={self.size_bytes})"
+
+class BookAudioSummary(BaseModel):
+    """A stored audio file of a book"""
+    sha256: str
+    format: str
+    voice_id: Optional[str] = None
+    render_job_id: Optional[int] = None
+    size_bytes: int
+    duration_seconds: Optional[float] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class RenderJobStatus(BaseModel):
+    """Progress of a render job"""
+    id: int
+    book_id: int
+    voice_id: Optional[str] = None
+    status: str
+    total_chunks: int
+    completed_chunks: int
+    percent_complete: float
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_job(cls, job: "RenderJob") -> "RenderJobStatus":
+        percent = 100.0 * job.completed_chunks / job.total_chunks if job.total_chunks else 0.0
+        return cls(
+            id=job.id,
+            book_id=job.book_id,
+            voice_id=job.voice_id,
+            status=job.status,
+            total_chunks=job.total_chunks,
+            completed_chunks=job.completed_chunks,
+            percent_complete=round(percent, 1),
+            error=job.error,
+            created_at=job.created_at,
+            updated_at=job.updated_at
+        )
+
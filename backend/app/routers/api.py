@@ -1,19 +1,204 @@
-from fastapi import APIRouter, UploadFile, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from app.services import text_processor, tts_service
-from app.models import GenerateAudioRequest, VoicesResponse, ErrorResponse, Book
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse, FileResponse, PlainTextResponse, RedirectResponse, Response
+from app.services import audiobook, chunker, content_edits, normalizer, text_processor, tts_service
+from app.services.boundaries import BoundaryIndex
+from app.services.voice_previews import preview_store
+from app.services.render_queue import blob_store, render_queue, ACTIVE_STATUSES, COMPLETED
+from app.responses import file_response
+from app.config import get_settings
+from app.metrics import REGISTRY, CONTENT_TYPE, MetricFamily, TimedRoute, stage
+from app.models import (
+    GenerateAudioRequest, BookSampleRequest, ContentPatchRequest, ContentPatchResult,
+    VoicesResponse, ErrorResponse, Book, BookAudio, BookAudioSummary, BookSummary, BookPage,
+    Chapter, ChapterSummary, ChapterContent, NormalizationReport, SnappedSelection,
+    RenderJob, RenderJobStatus
+)
 from app.auth.models import User
-from app.auth.auth import current_active_user
+from app.auth.auth import current_active_user, current_operator
+from app.auth.cache import user_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_async_session
-from sqlalchemy import select
+from app.database import db_metrics, engine, get_async_session
+from sqlalchemy import select, delete, func, literal, tuple_
+from sqlalchemy.orm import undefer
+from starlette.concurrency import run_in_threadpool
+from typing import List, Tuple
+from datetime import datetime
+import base64
 import io
 from pydantic import BaseModel, Field
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+settings = get_settings()
 
 # Constants
 MAX_PUBLIC_CHARS = 500  # Maximum characters for public endpoints
+DEFAULT_PAGE_SIZE = 50  # Books per page in library listings
+MAX_PAGE_SIZE = 200
+MAX_SAMPLE_SOURCE_CHARS = 10000  # Stored text sliced for a sample, which is then capped at max_text_length
+AUDIO_MEDIA_TYPES = {"mp3": "audio/mpeg", "m4b": "audio/mp4"}
+
+def build_chapters(content: str, spans: List[text_processor.ChapterSpan] | None = None) -> List[Chapter]:
+    """Create chapter rows from extracted spans, or a single chapter covering the content"""
+    if not spans:
+        spans = [text_processor.ChapterSpan(None, 0, len(content))]
+    return [
+        Chapter(
+            position=position,
+            title=span.title[:255] if span.title else None,
+            start_offset=span.start_offset,
+            end_offset=span.end_offset
+        )
+        for position, span in enumerate(spans)
+    ]
+
+def normalize_text(text: str) -> normalizer.Normalized:
+    """Normalize text for synthesis using the configured rules"""
+    with stage("normalize"):
+        return normalizer.normalize(
+            text,
+            expand_abbreviations=settings.normalize_expand_abbreviations,
+            expand_numbers=settings.normalize_expand_numbers,
+            header_min_repeats=settings.normalize_header_min_repeats
+        )
+
+def prepare_text(
+    content: str,
+    old_text: str | None = None,
+    old_plan: bytes | None = None
+) -> Tuple[normalizer.Normalized, BoundaryIndex, List[Tuple[int, int]], List[int]]:
+    """
+    Normalize content, index its boundaries and plan its synthesis chunks
+
+    Given the previous normalized text and chunk plan, only the chunks the
+    change touched are re-planned.
+
+    Returns:
+        Tuple: The normalization, the boundary index, the chunk spans and the
+        indices of chunks that are new or changed, counting only the spans
+        that are synthesized (see chunker.spoken_spans)
+    """
+    normalized = normalize_text(content)
+    with stage("boundary_index"):
+        index = BoundaryIndex.build(normalized.text)
+    max_chars = settings.tts_chunk_max_chars
+    with stage("chunk_plan"):
+        old_spans = chunker.decode_plan(old_plan, max_chars) if old_plan is not None else None
+        if old_text is not None and old_spans is not None:
+            spans, invalidated = chunker.replan_spans(old_text, normalized.text, old_spans, max_chars)
+        else:
+            spans = chunker.chunk_spans(normalized.text, max_chars, index)
+            invalidated = list(range(len(spans)))
+        invalidated = chunker.chunk_indices(normalized.text, spans, invalidated)
+    return normalized, index, spans, invalidated
+
+async def set_content(book: Book, content: str, incremental: bool = False) -> List[int]:
+    """
+    Set a book's content along with its normalized text, offset map, report,
+    boundary index and chunk plan
+
+    Args:
+        book: The book to update
+        content: The new content
+        incremental: Re-plan only the chunks that changed; requires the
+            book's normalized_content and chunk_plan to be loaded
+
+    Returns:
+        List[int]: Indices of the chunks whose audio is no longer valid. They
+        are not stored: a render looks each chunk's audio up by its text, so
+        unchanged chunks are reused and only these are synthesized again.
+    """
+    old_text, old_plan = (book.normalized_content, book.chunk_plan) if incremental else (None, None)
+    normalized, index, spans, invalidated = await run_in_threadpool(
+        prepare_text, content, old_text, old_plan
+    )
+    book.content = content
+    book.content_length = len(content)
+    book.normalized_content = normalized.text
+    book.normalized_length = len(normalized.text)
+    book.normalization_offsets = normalized.offsets.to_bytes()
+    book.normalization_report = normalized.report
+    book.boundary_index = index.to_bytes()
+    book.chunk_plan = chunker.encode_plan(spans, settings.tts_chunk_max_chars)
+    return invalidated
+
+def get_chunk_spans(book: Book) -> List[Tuple[int, int]] | None:
+    """Get a book's stored chunk plan if it was made with the current chunk size"""
+    if book.chunk_plan is None:
+        return None
+    return chunker.decode_plan(book.chunk_plan, settings.tts_chunk_max_chars)
+
+async def get_prepared_book(book_id: int, user: User, session: AsyncSession, *columns) -> Book:
+    """
+    Get a user's book with the given deferred columns loaded
+
+    Books stored before these columns existed are normalized and indexed
+    on first use, so the columns are never None.
+    """
+    query = (
+        select(Book)
+        .where(Book.id == book_id, Book.user_id == user.id)
+        .options(*(undefer(column) for column in columns))
+    )
+    result = await session.execute(query)
+    book = result.scalar_one_or_none()
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+    if any(getattr(book, column.key) is None for column in columns):
+        await session.refresh(book, ["content"])
+        await set_content(book, book.content)
+        await session.commit()
+    return book
+
+def snap_to_boundaries(book: Book, start: int, end: int, unit: str) -> Tuple[int, int]:
+    """Snap a selection of a prepared book's content using its boundary index"""
+    offsets = normalizer.OffsetMap.from_bytes(book.normalization_offsets)
+    index = BoundaryIndex.from_bytes(book.boundary_index)
+    snapped_start, snapped_end = index.snap(
+        min(offsets.to_normalized(start), index.length),
+        min(offsets.to_normalized(end), index.length),
+        unit
+    )
+    return offsets.to_original(snapped_start), offsets.to_original(snapped_end)
+
+def blob_response(request: Request, sha256: str, format: str, filename: str) -> Response:
+    """
+    Serve rendered audio from the blob store
+
+    Local blobs are sent as files (or handed to the reverse proxy when
+    X-Accel-Redirect is configured) with the SHA-256 as a strong ETag;
+    blobs of remote backends are redirected to their URL.
+    """
+    path = blob_store.local_path(sha256)
+    if path is None:
+        url = blob_store.url(sha256)
+        if url is None:
+            raise HTTPException(status_code=404, detail="Audio not found")
+        return RedirectResponse(url, status_code=307)
+    return file_response(
+        request,
+        path,
+        media_type=AUDIO_MEDIA_TYPES[format],
+        etag=f'"{sha256}"',
+        cache_control=f"private, max-age={settings.render_audio_max_age}",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}.{format}"
+        },
+        accel_redirect=blob_store.accel_redirect(sha256)
+    )
+
+def encode_cursor(upload_date: datetime, book_id: int) -> str:
+    """Encode the keyset position of a book as an opaque cursor"""
+    raw = f"{upload_date.isoformat()}|{book_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        upload_date, book_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(upload_date), int(book_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 # Public endpoint models
 class PublicTextRequest(BaseModel):
@@ -53,6 +238,95 @@ async def get_voices():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/stats", dependencies=[Depends(current_operator)])
+async def get_stats():
+    """
+    Get runtime statistics for the audio services and database
+
+    Requires a superuser or the metrics token.
+
+    Returns:
+        dict: Audio cache, voice catalog, voice preview, auth cache, blob store,
+        TTS scheduler, request coalescing and database counters
+    """
+    return {
+        "audio_cache": tts_service.audio_cache.stats(),
+        "voice_catalog": tts_service.voice_catalog.stats(),
+        "voice_previews": preview_store.stats(),
+        "auth_cache": user_cache.stats(),
+        "blob_store": blob_store.stats(),
+        "tts_scheduler": tts_service.scheduler.stats(),
+        "tts_coalescing": {
+            "synthesis": tts_service.synthesis_flights.stats(),
+            "streams": tts_service.stream_flights.stats()
+        },
+        "database": db_metrics.stats(engine.pool)
+    }
+
+def collect_service_metrics() -> List[MetricFamily]:
+    """Expose the counters behind /stats as Prometheus metrics"""
+    audio_cache = tts_service.audio_cache.stats()
+    auth_cache = user_cache.stats()
+    hits = MetricFamily("audiobook_cache_hits_total", "Cache lookups that found an entry", "counter", ["cache"])
+    misses = MetricFamily("audiobook_cache_misses_total", "Cache lookups that found no entry", "counter", ["cache"])
+    ratio = MetricFamily("audiobook_cache_hit_ratio", "Share of cache lookups that were hits since startup", "gauge", ["cache"])
+    entries = MetricFamily("audiobook_cache_entries", "Entries currently held by each cache", "gauge", ["cache"])
+    for name, cache in (("audio", audio_cache), ("auth", auth_cache)):
+        hits.add(cache["hits"], name)
+        misses.add(cache["misses"], name)
+        ratio.add(cache["hit_ratio"], name)
+        entries.add(cache["entries"], name)
+
+    scheduler = tts_service.scheduler.stats()
+    running = MetricFamily("audiobook_tts_scheduler_running", "Upstream slots held per priority class", "gauge", ["priority"])
+    waiting = MetricFamily("audiobook_tts_scheduler_waiting", "Callers queued for an upstream slot per priority class", "gauge", ["priority"])
+    granted = MetricFamily("audiobook_tts_scheduler_granted_total", "Upstream slots granted per priority class", "counter", ["priority"])
+    missed = MetricFamily("audiobook_tts_scheduler_deadline_misses_total", "Callers that gave up waiting for a slot", "counter", ["priority"])
+    for name, counters in scheduler["classes"].items():
+        running.add(counters["running"], name)
+        waiting.add(counters["waiting"], name)
+        granted.add(counters["granted"], name)
+        missed.add(counters["deadline_misses"], name)
+
+    flights_in_flight = MetricFamily("audiobook_coalescing_in_flight", "Distinct synthesis calls or streams in progress", "gauge", ["kind"])
+    coalesced = MetricFamily("audiobook_coalesced_requests_total", "Requests that joined an identical call in flight", "counter", ["kind"])
+    for name, flights in (("synthesis", tts_service.synthesis_flights), ("stream", tts_service.stream_flights)):
+        counters = flights.stats()
+        flights_in_flight.add(counters["in_flight"], name)
+        coalesced.add(counters["coalesced"], name)
+
+    database = db_metrics.stats(engine.pool)
+    families = [
+        hits, misses, ratio, entries,
+        MetricFamily("audiobook_audio_cache_bytes", "Size of the on-disk audio cache", "gauge").add(audio_cache["size_bytes"]),
+        running, waiting, granted, missed, flights_in_flight, coalesced,
+        MetricFamily("audiobook_voice_previews_in_flight", "Voice previews being rendered", "gauge").add(preview_store.stats()["in_flight"]),
+        MetricFamily("audiobook_db_queries_total", "SQL statements executed", "counter").add(database["queries"]),
+        MetricFamily("audiobook_db_query_seconds_total", "Time spent executing SQL statements", "counter").add(database["query_time_ms"] / 1000),
+        MetricFamily("audiobook_db_slow_queries_total", "SQL statements slower than the slow query threshold", "counter").add(database["slow_queries"]),
+        MetricFamily("audiobook_db_checkout_timeouts_total", "Connection checkouts that timed out", "counter").add(database["checkout_timeouts"])
+    ]
+    if "pool" in database:
+        families.append(
+            MetricFamily("audiobook_db_pool_checked_out", "Database connections currently in use", "gauge")
+            .add(database["pool"]["checked_out"])
+        )
+    return families
+
+REGISTRY.add_collector(collect_service_metrics)
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(current_operator)])
+async def get_metrics():
+    """
+    Get request, stage, upstream, cache and database metrics for scraping
+
+    Requires a superuser or the metrics token.
+
+    Returns:
+        PlainTextResponse: All metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @router.post("/public/generate-audio")
 async def generate_public_audio(request: PublicTextRequest):
     """
@@ -65,14 +339,17 @@ async def generate_public_audio(request: PublicTextRequest):
         StreamingResponse: The generated audio file
     """
     try:
-        audio_data = await tts_service.generate_audio(request.text, request.voice_id)
+        text = normalize_text(request.text).text
+        audio_stream = await tts_service.stream_audio(text, request.voice_id)
         return StreamingResponse(
-            io.BytesIO(audio_data),
+            audio_stream,
             media_type="audio/mpeg",
             headers={
                 "Content-Disposition": "attachment; filename=generated-audio.mp3"
             }
         )
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -124,11 +401,8 @@ async def upload_public_file(file: UploadFile):
         )
     
     try:
-        content = await text_processor.extract_text(file)
-        
         # Limit content length for public endpoint
-        if len(content) > MAX_PUBLIC_CHARS:
-            content = content[:MAX_PUBLIC_CHARS]
+        content = await text_processor.extract_text(file, max_chars=MAX_PUBLIC_CHARS)
             
         return {
             "title": file.filename,
@@ -138,16 +412,50 @@ async def upload_public_file(file: UploadFile):
         raise HTTPException(status_code=500, detail=str(e))
 
 # Book-related endpoints
-@router.get("/books")
+@router.get("/books", response_model=BookPage)
 async def get_user_books(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Get all books for the current user"""
-    query = select(Book).where(Book.user_id == user.id)
+    """
+    Get a page of the current user's books, newest first
+
+    Only summary columns are selected, with the lengths stored alongside the
+    content, so book content is never read.
+
+    Args:
+        limit: Maximum number of books to return
+        cursor: Optional next_cursor from the previous page
+
+    Returns:
+        BookPage: Book summaries and the cursor for the next page, if any
+    """
+    query = (
+        select(
+            Book.id,
+            Book.title,
+            Book.upload_date,
+            Book.content_length.label("length"),
+            Book.normalized_length,
+            Book.last_voice_id
+        )
+        .where(Book.user_id == user.id)
+        .order_by(Book.upload_date.desc(), Book.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(tuple_(Book.upload_date, Book.id) < decode_cursor(cursor))
     result = await session.execute(query)
-    books = result.scalars().all()
-    return books
+    rows = result.all()
+
+    books = [BookSummary(**row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = books[-1]
+        next_cursor = encode_cursor(last.upload_date, last.id)
+    return BookPage(books=books, next_cursor=next_cursor)
 
 @router.post("/books")
 async def create_book(
@@ -159,9 +467,10 @@ async def create_book(
     """Create a new book for the current user"""
     book = Book(
         title=title,
-        content=content,
-        user_id=user.id
+        user_id=user.id,
+        chapters=build_chapters(content)
     )
+    await set_content(book, content)
     session.add(book)
     await session.commit()
     await session.refresh(book)
@@ -174,13 +483,188 @@ async def get_book(
     session: AsyncSession = Depends(get_async_session)
 ):
     """Get a specific book for the current user"""
-    query = select(Book).where(Book.id == book_id, Book.user_id == user.id)
+    query = (
+        select(Book)
+        .where(Book.id == book_id, Book.user_id == user.id)
+        .options(undefer(Book.content))
+    )
     result = await session.execute(query)
     book = result.scalar_one_or_none()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     return book
 
+@router.get("/books/{book_id}/audio", response_model=List[BookAudioSummary])
+async def get_book_audio(
+    book_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Get the rendered audio files stored for a book, oldest first"""
+    result = await session.execute(
+        select(Book.id).where(Book.id == book_id, Book.user_id == user.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    result = await session.execute(
+        select(BookAudio).where(BookAudio.book_id == book_id).order_by(BookAudio.created_at, BookAudio.id)
+    )
+    return result.scalars().all()
+
+@router.get(
+    "/books/{book_id}/audio/{sha256}",
+    response_class=FileResponse,
+    responses={
+        404: {"model": ErrorResponse},
+        416: {"model": ErrorResponse}
+    }
+)
+async def download_book_audio(
+    book_id: int,
+    sha256: str,
+    request: Request,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Download a stored audio file of a book
+
+    Supports byte ranges (206) and If-None-Match (304) against the SHA-256.
+    """
+    result = await session.execute(
+        select(BookAudio.format)
+        .join(Book, BookAudio.book_id == Book.id)
+        .where(BookAudio.book_id == book_id, BookAudio.sha256 == sha256, Book.user_id == user.id)
+    )
+    format = result.scalar_one_or_none()
+    if format is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return blob_response(request, sha256, format, f"book-{book_id}")
+
+@router.get("/books/{book_id}/chapters", response_model=List[ChapterSummary])
+async def get_book_chapters(
+    book_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Get the chapter list of a book in spine order, without chapter text"""
+    result = await session.execute(
+        select(Book.id).where(Book.id == book_id, Book.user_id == user.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    result = await session.execute(
+        select(Chapter).where(Chapter.book_id == book_id).order_by(Chapter.position)
+    )
+    return result.scalars().all()
+
+@router.get("/books/{book_id}/chapters/{position}", response_model=ChapterContent)
+async def get_book_chapter(
+    book_id: int,
+    position: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Get a single chapter with its text, sliced from the book in the database"""
+    query = (
+        select(
+            Chapter,
+            func.substr(
+                Book.content,
+                Chapter.start_offset + 1,
+                Chapter.end_offset - Chapter.start_offset
+            )
+        )
+        .join(Book, Chapter.book_id == Book.id)
+        .where(
+            Book.id == book_id,
+            Book.user_id == user.id,
+            Chapter.position == position
+        )
+    )
+    result = await session.execute(query)
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    chapter, content = row
+    return ChapterContent(
+        **ChapterSummary.model_validate(chapter).model_dump(),
+        content=content
+    )
+
+@router.get(
+    "/books/{book_id}/normalization",
+    response_model=NormalizationReport,
+    responses={404: {"model": ErrorResponse}}
+)
+async def get_book_normalization(
+    book_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Get how many characters normalization saved for a book
+
+    Books stored before normalization existed are normalized on first
+    request, so the report is always available.
+
+    Args:
+        book_id: The ID of the book
+
+    Returns:
+        NormalizationReport: Original and normalized lengths, whitespace and
+        boilerplate savings, characters added by expansions and per-rule figures
+
+    Raises:
+        HTTPException: If the book is not found
+    """
+    book = await get_prepared_book(book_id, user, session, Book.normalization_report)
+    return NormalizationReport(book_id=book.id, **book.normalization_report)
+
+@router.get(
+    "/books/{book_id}/snap",
+    response_model=SnappedSelection,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse}
+    }
+)
+async def snap_selection(
+    book_id: int,
+    start: int = Query(ge=0),
+    end: int = Query(ge=0),
+    unit: str = Query(default="sentence", pattern="^(sentence|paragraph)$"),
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Widen a selection of a book's content to whole sentences or paragraphs
+
+    Uses the book's stored boundary index, so the content is never loaded
+    or rescanned. Offsets are in the book's original content.
+
+    Args:
+        book_id: The ID of the book
+        start: Selection start offset
+        end: Selection end offset
+        unit: 'sentence' or 'paragraph'
+
+    Returns:
+        SnappedSelection: The snapped start and end offsets
+
+    Raises:
+        HTTPException: If the book is not found or the selection is invalid
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    book = await get_prepared_book(
+        book_id, user, session, Book.normalization_offsets, Book.boundary_index
+    )
+    start_offset, end_offset = snap_to_boundaries(book, start, end, unit)
+    return SnappedSelection(start_offset=start_offset, end_offset=end_offset, unit=unit)
+
 @router.put("/books/{book_id}")
 async def update_book(
     book_id: int,
@@ -201,7 +685,12 @@ async def update_book(
     if title is not None:
         book.title = title
     if content is not None:
-        book.content = content
+        await set_content(book, content)
+        # Wholesale replacement loses the previous chapter structure
+        await session.execute(delete(Chapter).where(Chapter.book_id == book.id))
+        for chapter in build_chapters(content):
+            chapter.book_id = book.id
+            session.add(chapter)
     if last_voice_id is not None:
         book.last_voice_id = last_voice_id
     if voice_settings is not None:
@@ -211,6 +700,66 @@ async def update_book(
     await session.refresh(book)
     return book
 
+@router.patch(
+    "/books/{book_id}/content",
+    response_model=ContentPatchResult,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse}
+    }
+)
+async def patch_book_content(
+    book_id: int,
+    request: ContentPatchRequest,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Apply ranged edits to a book's content
+
+    Chapter offsets are shifted to follow the edits and the chapter
+    structure is kept. Only the synthesis chunks covering changed text are
+    re-planned; every other chunk keeps its exact text, so its audio is
+    reused from the content-addressed chunk store by the next render. The
+    invalidated chunks are reported, not recorded, since that lookup
+    already tells the render which chunks to synthesize again.
+
+    Args:
+        book_id: The ID of the book
+        request: Non-overlapping edits whose offsets refer to the content before the patch
+
+    Returns:
+        ContentPatchResult: The new lengths and the chunks that must be synthesized again
+
+    Raises:
+        HTTPException: If the book is not found or an edit is invalid
+    """
+    book = await get_prepared_book(
+        book_id, user, session, Book.content, Book.normalized_content, Book.chunk_plan
+    )
+    try:
+        edits = content_edits.validate_edits(
+            [content_edits.TextEdit(edit.start, edit.end, edit.text) for edit in request.edits],
+            len(book.content)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    content = content_edits.apply_edits(book.content, edits)
+    invalidated = await set_content(book, content, incremental=True)
+    result = await session.execute(select(Chapter).where(Chapter.book_id == book.id))
+    for chapter in result.scalars():
+        chapter.start_offset = content_edits.shift_offset(chapter.start_offset, edits)
+        chapter.end_offset = content_edits.shift_offset(chapter.end_offset, edits)
+    await session.commit()
+
+    return ContentPatchResult(
+        length=len(content),
+        normalized_length=len(book.normalized_content),
+        total_chunks=len(chunker.spoken_spans(book.normalized_content, get_chunk_spans(book))),
+        invalidated_chunks=invalidated
+    )
+
 @router.delete("/books/{book_id}")
 async def delete_book(
     book_id: int,
@@ -224,8 +773,15 @@ async def delete_book(
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     
+    result = await session.execute(select(BookAudio.sha256).where(BookAudio.book_id == book_id))
+    blobs = set(result.scalars())
+
     await session.delete(book)
     await session.commit()
+
+    # Remove audio no other book links to
+    for sha256 in blobs:
+        await render_queue.delete_unreferenced_blob(sha256)
     return {"detail": "Book deleted successfully"}
 
 @router.post(
@@ -259,13 +815,14 @@ async def upload_file(
         )
     
     try:
-        content = await text_processor.extract_text(file)
+        content, spans = await text_processor.extract_book(file)
         # Create a new book for the user
         book = Book(
             title=file.filename,
-            content=content,
-            user_id=user.id
+            user_id=user.id,
+            chapters=build_chapters(content, spans)
         )
+        await set_content(book, content)
         session.add(book)
         await session.commit()
         await session.refresh(book)
@@ -321,9 +878,123 @@ async def generate_sample(request: GenerateAudioRequest):
             )
         
         # Generate audio from selected text
-        audio_data = await tts_service.generate_audio(selected_text, request.voice_id)
+        normalized = await run_in_threadpool(normalize_text, selected_text)
+        audio_stream = await tts_service.stream_audio(normalized.text, request.voice_id)
+        return StreamingResponse(
+            audio_stream,
+            media_type="audio/mpeg",
+            headers={
+                "Content-Disposition": "attachment; filename=sample.mp3"
+            }
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/books/{book_id}/generate-sample",
+    response_class=StreamingResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+async def generate_book_sample(
+    book_id: int,
+    request: BookSampleRequest,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Generate an audio sample from a selection of a stored book
+
+    Only the selected range is read from the database, so the request
+    carries offsets instead of the book's text.
+
+    Args:
+        book_id: The ID of the book
+        request: The generation request containing:
+            - voice_id: Optional voice ID to use (defaults to the book's last voice)
+            - start_position: Start offset of the selection
+            - end_position: Optional end offset (defaults to the end of the book or chapter)
+            - chapter_position: Optional chapter the offsets are relative to
+            - snap: Optional 'sentence' or 'paragraph' to widen the selection to whole units
+
+    Returns:
+        StreamingResponse: The generated audio file
+
+    Raises:
+        HTTPException: If the book or chapter is not found, the selection is
+        invalid or generation fails
+    """
+    if request.end_position is not None and request.end_position <= request.start_position:
+        raise HTTPException(
+            status_code=400,
+            detail="end_position must be greater than start_position"
+        )
+
+    if request.chapter_position is not None:
+        query = (
+            select(Chapter.start_offset, Chapter.end_offset, Book.last_voice_id)
+            .join(Book, Chapter.book_id == Book.id)
+            .where(
+                Book.id == book_id,
+                Book.user_id == user.id,
+                Chapter.position == request.chapter_position
+            )
+        )
+        not_found = "Chapter not found"
+    else:
+        query = (
+            select(
+                literal(0).label("start_offset"),
+                Book.content_length.label("end_offset"),
+                Book.last_voice_id
+            )
+            .where(Book.id == book_id, Book.user_id == user.id)
+        )
+        not_found = "Book not found"
+    result = await session.execute(query)
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail=not_found)
+
+    start = row.start_offset + request.start_position
+    end = row.end_offset
+    if request.end_position is not None:
+        end = min(row.start_offset + request.end_position, end)
+    if start >= end:
+        raise HTTPException(
+            status_code=400,
+            detail="start_position is beyond text length"
+        )
+    if request.snap:
+        book = await get_prepared_book(
+            book_id, user, session, Book.normalization_offsets, Book.boundary_index
+        )
+        start, end = snap_to_boundaries(book, start, end, request.snap)
+
+    result = await session.execute(
+        select(func.substr(Book.content, start + 1, min(end - start, MAX_SAMPLE_SOURCE_CHARS)))
+        .where(Book.id == book_id)
+    )
+    normalized = await run_in_threadpool(normalize_text, result.scalar_one())
+    if not normalized.text:
+        raise HTTPException(
+            status_code=400,
+            detail="Selected text is empty"
+        )
+
+    try:
+        audio_stream = await tts_service.stream_audio(
+            normalized.text,
+            request.voice_id or row.last_voice_id,
+            owner=f"user:{user.id}"
+        )
         return StreamingResponse(
-            io.BytesIO(audio_data),
+            audio_stream,
             media_type="audio/mpeg",
             headers={
                 "Content-Disposition": "attachment; filename=sample.mp3"
@@ -336,31 +1007,37 @@ async def generate_sample(request: GenerateAudioRequest):
 
 @router.get(
     "/voice-preview/{voice_id}",
-    response_class=StreamingResponse,
+    response_class=FileResponse,
     responses={
         400: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
     }
 )
-async def get_voice_preview(voice_id: str):
+async def get_voice_preview(voice_id: str, request: Request):
     """
     Get a quick preview of a voice using a standard sample text
     
+    Previews are rendered once per voice and served from disk with ETag,
+    Cache-Control and Range support.
+
     Args:
         voice_id: The ID of the voice to preview
         
     Returns:
-        StreamingResponse: Short audio sample of the voice
+        FileResponse: Short audio sample of the voice
         
     Raises:
-        HTTPException: If preview generation fails
+        HTTPException: If the voice is unknown or preview generation fails
     """
-    preview_text = "Hello! This is a sample of my voice. I hope you like how it sounds."
+    tts_service.validate_voice_id(voice_id)
     try:
-        audio_data = await tts_service.generate_audio(preview_text, voice_id)
-        return StreamingResponse(
-            io.BytesIO(audio_data),
+        path = await preview_store.ensure(voice_id)
+        return file_response(
+            request,
+            path,
             media_type="audio/mpeg",
+            etag=preview_store.etag(voice_id),
+            cache_control=f"public, max-age={settings.voice_preview_max_age}",
             headers={
                 "Content-Disposition": "attachment; filename=voice-preview.mp3"
             }
@@ -368,4 +1045,178 @@ async def get_voice_preview(voice_id: str):
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/books/{book_id}/generate-audio",
+    response_class=StreamingResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+async def generate_book_audio(
+    book_id: int,
+    voice_id: str | None = None,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Generate audio for a whole book using chunked, parallel synthesis
+
+    Args:
+        book_id: The ID of the book to render
+        voice_id: Optional voice ID to use (defaults to the book's last voice)
+
+    Returns:
+        StreamingResponse: The complete audiobook as a single MP3 file
+
+    Raises:
+        HTTPException: If the book is not found or generation fails
+    """
+    book = await get_prepared_book(
+        book_id, user, session, Book.normalized_content, Book.boundary_index, Book.chunk_plan
+    )
+
+    try:
+        audio_stream = await tts_service.stream_book_audio(
+            book.normalized_content,
+            voice_id or book.last_voice_id,
+            index=BoundaryIndex.from_bytes(book.boundary_index),
+            spans=get_chunk_spans(book),
+            owner=f"user:{user.id}"
+        )
+        return StreamingResponse(
+            audio_stream,
+            media_type="audio/mpeg",
+            headers={
+                "Content-Disposition": f"attachment; filename=book-{book.id}.mp3"
+            }
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/books/{book_id}/render",
+    status_code=202,
+    response_model=RenderJobStatus,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse}
+    }
+)
+async def render_book(
+    book_id: int,
+    voice_id: str | None = None,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Queue a background render of a whole book
+
+    If the same book is already queued or rendering with the same voice,
+    the existing job is returned instead of starting a new one.
+
+    Args:
+        book_id: The ID of the book to render
+        voice_id: Optional voice ID to use (defaults to the book's last voice)
+
+    Returns:
+        RenderJobStatus: The queued job; poll GET /jobs/{job_id} for progress
+
+    Raises:
+        HTTPException: If the book is not found or the voice is unknown
+    """
+    result = await session.execute(
+        select(Book.last_voice_id).where(Book.id == book_id, Book.user_id == user.id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    voice_id = voice_id or row.last_voice_id
+    tts_service.validate_voice_id(voice_id)
+
+    result = await session.execute(
+        select(RenderJob).where(
+            RenderJob.book_id == book_id,
+            RenderJob.voice_id == voice_id if voice_id else RenderJob.voice_id.is_(None),
+            RenderJob.status.in_(ACTIVE_STATUSES)
+        )
+    )
+    job = result.scalars().first()
+    if job is None:
+        job = RenderJob(book_id=book_id, user_id=user.id, voice_id=voice_id)
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+        render_queue.enqueue(job.id)
+    return RenderJobStatus.from_job(job)
+
+async def get_user_job(job_id: int, user: User, session: AsyncSession) -> RenderJob:
+    """Load a render job owned by the user or raise a 404"""
+    result = await session.execute(
+        select(RenderJob).where(RenderJob.id == job_id, RenderJob.user_id == user.id)
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=RenderJobStatus)
+async def get_render_job(
+    job_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Get the status and percent complete of a render job"""
+    job = await get_user_job(job_id, user, session)
+    return RenderJobStatus.from_job(job)
+
+@router.get(
+    "/jobs/{job_id}/audio",
+    response_class=FileResponse,
+    responses={
+        404: {"model": ErrorResponse},
+        409: {"model": ErrorResponse},
+        416: {"model": ErrorResponse},
+        501: {"model": ErrorResponse}
+    }
+)
+async def get_render_job_audio(
+    job_id: int,
+    request: Request,
+    format: str = Query("mp3", pattern="^(mp3|m4b)$"),
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Download the audiobook produced by a completed render job
+
+    Supports byte ranges (206) for seeking, and If-None-Match (304) against
+    a strong ETag derived from the SHA-256 of the audio.
+
+    Args:
+        job_id: The ID of the render job
+        format: "mp3", or "m4b" for an audiobook file with chapter markers,
+            exported with ffmpeg on first request
+
+    Raises:
+        HTTPException: If the job is not found or not completed, or M4B
+        export is unavailable (501) or fails
+    """
+    job = await get_user_job(job_id, user, session)
+    if job.status != COMPLETED or not job.output_sha256:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if format == "m4b":
+        result = await session.execute(select(Book.title).where(Book.id == job.book_id))
+        try:
+            sha256 = await render_queue.export_m4b(job, result.scalar_one_or_none() or f"Book {job.book_id}")
+        except audiobook.FFmpegNotFound as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error exporting M4B: {str(e)}")
+        return blob_response(request, sha256, "m4b", f"book-{job.book_id}")
+    return blob_response(request, job.output_sha256, "mp3", f"book-{job.book_id}")
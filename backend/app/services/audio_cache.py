@@ -0,0 +1,230 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Dict
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+WHITESPACE = re.compile(r'\s+')
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different selections share a cache entry"""
+    return WHITESPACE.sub(' ', text).strip()
+
+def make_key(text: str, voice_id: str, model_id: str) -> str:
+    """
+    Build a content address for a synthesis request
+
+    Args:
+        text: The text being synthesized
+        voice_id: The voice ID or name used for synthesis
+        model_id: The TTS model used for synthesis
+
+    Returns:
+        str: Hex SHA-256 digest of the normalized text, voice and model
+    """
+    digest = hashlib.sha256()
+    for part in (model_id, voice_id, normalize_text(text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class AudioCache:
+    """
+    Content-addressed on-disk audio cache with a size budget and LRU eviction
+
+    Entries are stored as <directory>/<key[:2]>/<key>.mp3. The recency order
+    is rebuilt from file modification times on startup and kept up to date
+    by touching files on every hit, so it survives restarts.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from the files already on disk"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.glob("*/*.mp3"):
+            stat = path.stat()
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its budget"""
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        """Check for an entry without counting a lookup or touching its recency"""
+        return key in self._entries
+
+    def open(self, key: str) -> BinaryIO | None:
+        """
+        Open cached audio for streaming and mark it as recently used
+
+        The returned file stays readable even if the entry is evicted while
+        it is being streamed.
+
+        Args:
+            key: The content address from make_key
+
+        Returns:
+            BinaryIO | None: An open binary file, or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                audio_file = path.open("rb")
+                os.utime(path)
+            except FileNotFoundError:
+                self._size -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio_file
+
+    def locate(self, key: str) -> Path | None:
+        """
+        Get the file of a cached entry and mark it as recently used
+
+        Unlike open(), the file may be evicted before the caller reads it.
+
+        Args:
+            key: The content address from make_key
+
+        Returns:
+            Path | None: The entry's file, or None on a miss
+        """
+        audio_file = self.open(key)
+        if audio_file is None:
+            return None
+        audio_file.close()
+        return self._path(key)
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Look up cached audio and mark it as recently used
+
+        Args:
+            key: The content address from make_key
+
+        Returns:
+            bytes | None: The cached audio, or None on a miss
+        """
+        audio_file = self.open(key)
+        if audio_file is None:
+            return None
+        with audio_file:
+            return audio_file.read()
+
+    def writer(self, key: str) -> "CacheWriter":
+        """
+        Start writing audio for key incrementally
+
+        Args:
+            key: The content address from make_key
+
+        Returns:
+            CacheWriter: Writer whose commit() publishes the entry
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return CacheWriter(self, key, path)
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store audio under key, evicting old entries if over budget
+
+        Args:
+            key: The content address from make_key
+            data: The audio to store
+        """
+        writer = self.writer(key)
+        writer.write(data)
+        writer.commit()
+
+    def _add(self, key: str, size: int) -> None:
+        """Register a committed entry and enforce the size budget"""
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)
+            self._entries[key] = size
+            self._size += size
+            self._evict()
+
+    def stats(self) -> Dict[str, int | float]:
+        """Get hit/miss counters and current usage"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+class CacheWriter:
+    """
+    Incremental writer for a single cache entry
+
+    Audio is written to a temporary file next to its final location and only
+    renamed into place on commit(), so readers never see partial audio.
+    """
+
+    def __init__(self, cache: AudioCache, key: str, path: Path):
+        self.cache = cache
+        self.key = key
+        self.path = path
+        self.size = 0
+        fd, self._tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.size += len(data)
+
+    def commit(self) -> None:
+        """Publish the entry, discarding it if it exceeds the cache budget"""
+        self._file.close()
+        if self.size > self.cache.max_bytes:
+            os.unlink(self._tmp_path)
+            return
+        os.replace(self._tmp_path, self.path)
+        self.cache._add(self.key, self.size)
+
+    def abort(self) -> None:
+        """Discard partially written audio"""
+        self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
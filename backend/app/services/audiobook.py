@@ -0,0 +1,243 @@
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, NamedTuple, Tuple
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from app.config import get_settings
+from app.services.mp3 import Mp3Joiner
+
+settings = get_settings()
+
+# Read size when hashing assembled audio
+HASH_READ_SIZE = 1024 * 1024
+
+# Longest ffmpeg error output kept in the exception message
+FFMPEG_ERROR_CHARS = 2000
+
+class ChapterMark(NamedTuple):
+    """A chapter's position in the assembled audio, in seconds"""
+    title: str | None
+    start: float
+    end: float
+
+class AssembledAudio(NamedTuple):
+    """Result of joining a book's chunk audio"""
+    sha256: str
+    duration: float
+    chunk_durations: List[float]
+
+class FFmpegNotFound(RuntimeError):
+    """Raised when M4B export is requested but ffmpeg is not installed"""
+
+def chapter_marks(
+    chapters: List[Tuple[str | None, int, int]],
+    spans: List[Tuple[int, int]],
+    chunk_durations: List[float]
+) -> List[ChapterMark]:
+    """
+    Place chapters on the audio timeline of a book rendered chunk by chunk
+
+    A chapter that starts inside a chunk is placed proportionally to its
+    character offset within that chunk. Chapters without any audio are
+    dropped; without chapters the whole book is a single untitled chapter.
+
+    Args:
+        chapters: Title, start and end offset of each chapter in the rendered text
+        spans: Character span of each rendered chunk in the same text
+        chunk_durations: Duration of each chunk's audio in seconds
+
+    Returns:
+        List[ChapterMark]: Consecutive chapters covering the whole audio
+    """
+    total = sum(chunk_durations)
+    chunk_starts = [span[0] for span in spans]
+    times = [0.0]
+    for duration in chunk_durations:
+        times.append(times[-1] + duration)
+
+    def to_time(offset: int) -> float:
+        index = bisect_right(chunk_starts, offset) - 1
+        if index < 0:
+            return 0.0
+        start, end = spans[index]
+        fraction = min(max((offset - start) / (end - start), 0.0), 1.0) if end > start else 0.0
+        return times[index] + fraction * chunk_durations[index]
+
+    starts = [(title, to_time(start)) for title, start, _ in chapters]
+    marks = []
+    for position, (title, start) in enumerate(starts):
+        end = starts[position + 1][1] if position + 1 < len(starts) else total
+        if end > start:
+            marks.append(ChapterMark(title, start, end))
+    if not marks:
+        return [ChapterMark(None, 0.0, total)]
+    # The first chapter also covers any audio before it, such as a title page
+    marks[0] = marks[0]._replace(start=0.0)
+    return marks
+
+def _escape_metadata(value: str) -> str:
+    """Escape a value for ffmpeg's FFMETADATA format"""
+    for char in ("\\", "=", ";", "#", "\n"):
+        value = value.replace(char, "\\" + char)
+    return value
+
+def ffmetadata(title: str, marks: List[ChapterMark]) -> str:
+    """Build an FFMETADATA document with the book title and chapter markers"""
+    lines = [";FFMETADATA1", f"title={_escape_metadata(title)}", "genre=Audiobook"]
+    for number, mark in enumerate(marks, start=1):
+        lines += [
+            "[CHAPTER]",
+            "TIMEBASE=1/1000",
+            f"START={round(mark.start * 1000)}",
+            f"END={round(mark.end * 1000)}",
+            f"title={_escape_metadata(mark.title or f'Chapter {number}')}"
+        ]
+    return "\n".join(lines) + "\n"
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while data := source.read(HASH_READ_SIZE):
+            digest.update(data)
+    return digest.hexdigest()
+
+def _join(chunk_paths: List[str], output_path: str) -> AssembledAudio:
+    """Join chunk files into output_path; runs in a pool worker"""
+    directory = os.path.dirname(output_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        durations = []
+        with os.fdopen(fd, "wb") as output:
+            joiner = Mp3Joiner(output)
+            for index, path in enumerate(chunk_paths):
+                try:
+                    data = Path(path).read_bytes()
+                except FileNotFoundError:
+                    raise RuntimeError(f"Chunk {index} was evicted before assembly")
+                durations.append(joiner.add(data))
+            joiner.finish()
+        digest = _hash_file(tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return AssembledAudio(digest, sum(durations), durations)
+
+def _remux(ffmpeg: str, mp3_path: str, metadata: str, output_path: str, codec: str, bitrate: str) -> str:
+    """Remux an MP3 into an M4B with chapters using ffmpeg; runs in a pool worker"""
+    directory = os.path.dirname(output_path)
+    metadata_fd, metadata_path = tempfile.mkstemp(dir=directory, suffix=".ffmetadata")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".m4b.tmp")
+    os.close(fd)
+    try:
+        with os.fdopen(metadata_fd, "w", encoding="utf-8") as metadata_file:
+            metadata_file.write(metadata)
+        audio_options = ["-c:a", "copy"] if codec == "copy" else ["-c:a", codec, "-b:a", bitrate]
+        result = subprocess.run(
+            [
+                ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+                "-i", mp3_path,
+                "-f", "ffmetadata", "-i", metadata_path,
+                "-map", "0:a", "-map_metadata", "1", "-map_chapters", "1",
+                *audio_options,
+                "-movflags", "+faststart",
+                "-f", "mp4", tmp_path
+            ],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace')[-FFMPEG_ERROR_CHARS:]}")
+        digest = _hash_file(tmp_path)
+        os.replace(tmp_path, output_path)
+        return digest
+    finally:
+        os.unlink(metadata_path)
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the shared assembly pool on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers do not inherit the server's threads and locks
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.render_assembly_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def shutdown() -> None:
+    """Stop the assembly pool (used on application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+async def assemble_mp3(chunk_paths: List[Path], output_path: Path) -> AssembledAudio:
+    """
+    Join chunk MP3 files frame by frame in a worker process
+
+    Args:
+        chunk_paths: The chunk audio files in reading order
+        output_path: Where to write the joined MP3, replaced atomically
+
+    Returns:
+        AssembledAudio: SHA-256 of the output, its duration and each chunk's duration
+
+    Raises:
+        RuntimeError: If a chunk file disappeared before it was read
+        ValueError: If the chunks contain no audio or differ in sample rate
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), _join, [str(path) for path in chunk_paths], str(output_path)
+    )
+
+async def export_m4b(mp3_path: Path, output_path: Path, title: str, marks: List[ChapterMark]) -> str:
+    """
+    Remux an assembled MP3 into an M4B audiobook with chapter markers
+
+    The audio is encoded with settings.m4b_audio_codec (AAC by default, which
+    Apple Books and most audiobook players require) at
+    settings.m4b_audio_bitrate. With "copy" the MP3 stream is stored in the
+    MP4 container as is. ffmpeg runs from a worker process.
+
+    Args:
+        mp3_path: The assembled MP3
+        output_path: Where to write the M4B, replaced atomically
+        title: The book title
+        marks: Chapter markers from chapter_marks()
+
+    Returns:
+        str: Hex SHA-256 of the M4B
+
+    Raises:
+        FFmpegNotFound: If settings.ffmpeg_path is not an executable
+        RuntimeError: If ffmpeg fails
+    """
+    ffmpeg = shutil.which(settings.ffmpeg_path)
+    if ffmpeg is None:
+        raise FFmpegNotFound(f"M4B export requires ffmpeg ('{settings.ffmpeg_path}' was not found)")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(),
+        _remux,
+        ffmpeg,
+        str(mp3_path),
+        ffmetadata(title, marks),
+        str(output_path),
+        settings.m4b_audio_codec,
+        settings.m4b_audio_bitrate
+    )
@@ -0,0 +1,23 @@
+"""
+Content-addressed blob storage for generated audio
+"""
+from app.config import Settings
+from app.services.blobs.base import BlobStore, is_sha256
+from app.services.blobs.local import LocalBlobStore
+
+def create_blob_store(settings: Settings) -> BlobStore:
+    """
+    Create the blob store selected by settings.blob_store_backend
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        BlobStore: The configured backend
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if settings.blob_store_backend == "local":
+        return LocalBlobStore(settings.blob_store_dir, settings.blob_accel_redirect_prefix)
+    raise ValueError(f"Unknown blob store backend '{settings.blob_store_backend}'")
@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Dict
+import re
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+def is_sha256(value: str) -> bool:
+    """Check whether value is a lowercase hex SHA-256 digest"""
+    return bool(SHA256_PATTERN.match(value))
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage for generated audio
+
+    Blobs are immutable and named by the hex SHA-256 of their content, so
+    storing the same audio twice keeps a single copy and a blob can be
+    served with its name as a strong ETag. Backends that keep blobs on a
+    local filesystem return their path from local_path() so they can be
+    sent without reading them into Python; remote backends return a URL
+    from url() for the client to fetch instead.
+    """
+
+    name: str = "blob-store"
+
+    @abstractmethod
+    def put_file(self, path: Path, sha256: str) -> None:
+        """
+        Move a finished file into the store
+
+        The file at path is consumed. If the blob already exists, the file is
+        discarded.
+
+        Args:
+            path: The file to store
+            sha256: Hex SHA-256 of the file's content
+        """
+
+    @abstractmethod
+    def exists(self, sha256: str) -> bool:
+        """Check whether a blob is stored"""
+
+    @abstractmethod
+    def open(self, sha256: str) -> BinaryIO:
+        """
+        Open a blob for reading
+
+        Raises:
+            FileNotFoundError: If the blob is not stored
+        """
+
+    @abstractmethod
+    def delete(self, sha256: str) -> None:
+        """Remove a blob if it is stored"""
+
+    def local_path(self, sha256: str) -> Path | None:
+        """Get the file holding a blob, if the backend keeps blobs on local disk"""
+        return None
+
+    def url(self, sha256: str) -> str | None:
+        """Get a URL clients can download a blob from directly, if the backend has one"""
+        return None
+
+    def accel_redirect(self, sha256: str) -> str | None:
+        """Get the internal URI a reverse proxy serves a blob from, if offloading is configured"""
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Get counters for blobs stored since startup"""
+        return {}
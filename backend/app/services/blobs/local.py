@@ -0,0 +1,92 @@
+from pathlib import Path
+from typing import BinaryIO, Dict
+import errno
+import os
+import shutil
+import tempfile
+from app.services.blobs.base import BlobStore, is_sha256
+
+class LocalBlobStore(BlobStore):
+    """
+    Blob store in a local directory
+
+    Blobs are stored as <directory>/<sha[:2]>/<sha[2:4]>/<sha>, so no
+    directory grows past 65,536 entries per level. Files are moved into
+    place with a rename, so readers never see a partial blob; files on
+    another filesystem are copied next to their destination first.
+
+    When accel_redirect_prefix is set, e.g. "/internal-blobs/", responses can
+    hand blobs to a reverse proxy with X-Accel-Redirect (nginx) instead of
+    sending them from the application; the proxy location must map that
+    prefix to this directory.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str | Path, accel_redirect_prefix: str | None = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.accel_redirect_prefix = accel_redirect_prefix
+        self.stored = 0
+        self.deduplicated = 0
+        self.deleted = 0
+
+    def _relative_path(self, sha256: str) -> str:
+        if not is_sha256(sha256):
+            raise ValueError(f"Invalid blob name '{sha256}'")
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    def _path(self, sha256: str) -> Path:
+        return self.directory / self._relative_path(sha256)
+
+    def put_file(self, path: Path, sha256: str) -> None:
+        destination = self._path(sha256)
+        if destination.exists():
+            os.unlink(path)
+            self.deduplicated += 1
+            return
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(path, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            fd, tmp_path = tempfile.mkstemp(dir=destination.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as output, open(path, "rb") as source:
+                    shutil.copyfileobj(source, output)
+                os.replace(tmp_path, destination)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            os.unlink(path)
+        self.stored += 1
+
+    def exists(self, sha256: str) -> bool:
+        return self._path(sha256).is_file()
+
+    def open(self, sha256: str) -> BinaryIO:
+        return self._path(sha256).open("rb")
+
+    def delete(self, sha256: str) -> None:
+        try:
+            self._path(sha256).unlink()
+            self.deleted += 1
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, sha256: str) -> Path | None:
+        path = self._path(sha256)
+        return path if path.is_file() else None
+
+    def accel_redirect(self, sha256: str) -> str | None:
+        if not self.accel_redirect_prefix:
+            return None
+        return self.accel_redirect_prefix.rstrip("/") + "/" + self._relative_path(sha256)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "deleted": self.deleted
+        }
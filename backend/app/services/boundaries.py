@@ -0,0 +1,109 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Tuple
+from app.services.chunker import PARAGRAPH_END, SENTENCE_END
+
+SENTENCE = "sentence"
+PARAGRAPH = "paragraph"
+
+class BoundaryIndex:
+    """
+    Sorted sentence and paragraph boundary offsets of a text
+
+    A boundary is the offset where a sentence or paragraph starts, i.e. the
+    end of the punctuation and whitespace that closed the previous one.
+    The start and end of the text are always paragraph boundaries. Lookups
+    are binary searches, so snapping never rescans the text.
+    """
+
+    def __init__(self, sentences: array, paragraphs: array):
+        self.sentences = sentences
+        self.paragraphs = paragraphs
+
+    @classmethod
+    def build(cls, text: str) -> "BoundaryIndex":
+        """
+        Scan a text once and index its boundaries
+
+        Args:
+            text: The text to index
+
+        Returns:
+            BoundaryIndex: The index of the text's boundaries
+        """
+        paragraphs = {0, len(text)}
+        paragraphs.update(match.end() for match in PARAGRAPH_END.finditer(text))
+        sentences = paragraphs.union(match.end() for match in SENTENCE_END.finditer(text))
+        return cls(array("I", sorted(sentences)), array("I", sorted(paragraphs)))
+
+    @property
+    def length(self) -> int:
+        """Length of the indexed text"""
+        return self.sentences[-1]
+
+    def _boundaries(self, unit: str) -> array:
+        if unit == SENTENCE:
+            return self.sentences
+        if unit == PARAGRAPH:
+            return self.paragraphs
+        raise ValueError(f"Unknown boundary unit: {unit}")
+
+    def floor(self, offset: int, unit: str = SENTENCE) -> int:
+        """Get the last boundary at or before offset"""
+        boundaries = self._boundaries(unit)
+        return boundaries[max(bisect_right(boundaries, offset) - 1, 0)]
+
+    def ceil(self, offset: int, unit: str = SENTENCE) -> int:
+        """Get the first boundary at or after offset"""
+        boundaries = self._boundaries(unit)
+        return boundaries[min(bisect_left(boundaries, offset), len(boundaries) - 1)]
+
+    def nearest(self, offset: int, unit: str = SENTENCE) -> int:
+        """Get the boundary closest to offset, preferring the earlier one on ties"""
+        before = self.floor(offset, unit)
+        after = self.ceil(offset, unit)
+        return before if offset - before <= after - offset else after
+
+    def last_between(self, start: int, end: int, unit: str = SENTENCE) -> int | None:
+        """Get the last boundary b with start < b <= end, or None if there is none"""
+        boundaries = self._boundaries(unit)
+        index = bisect_right(boundaries, end) - 1
+        if index >= 0 and boundaries[index] > start:
+            return boundaries[index]
+        return None
+
+    def snap(self, start: int, end: int, unit: str = SENTENCE) -> Tuple[int, int]:
+        """
+        Widen a selection to whole sentences or paragraphs
+
+        Args:
+            start: Selection start offset
+            end: Selection end offset
+            unit: 'sentence' or 'paragraph'
+
+        Returns:
+            Tuple[int, int]: The start of the unit containing start and the
+            end of the unit containing end
+        """
+        snapped_start = self.floor(start, unit)
+        snapped_end = self.ceil(end, unit)
+        if snapped_end <= snapped_start:
+            snapped_end = self.ceil(snapped_start + 1, unit)
+        return snapped_start, snapped_end
+
+    def to_bytes(self) -> bytes:
+        """Serialize as uint32 offsets, with the low bit marking paragraph boundaries"""
+        paragraphs = set(self.paragraphs)
+        return array(
+            "I",
+            (offset << 1 | (offset in paragraphs) for offset in self.sentences)
+        ).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BoundaryIndex":
+        packed = array("I")
+        packed.frombytes(data)
+        return cls(
+            array("I", (value >> 1 for value in packed)),
+            array("I", (value >> 1 for value in packed if value & 1))
+        )
@@ -0,0 +1,200 @@
+import re
+from array import array
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    from app.services.boundaries import BoundaryIndex
+
+# A sentence ends at terminal punctuation (optionally followed by closing
+# quotes/brackets) and whitespace; a paragraph ends at a blank line. A single
+# line break is not a paragraph end, since plain-text books are often
+# hard-wrapped at a fixed width in the middle of sentences.
+SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*\s+')
+PARAGRAPH_END = re.compile(r'\n[ \t]*\n\s*')
+WHITESPACE = re.compile(r'\s+')
+
+# Block size when comparing texts for a common prefix or suffix
+COMPARE_BLOCK = 4096
+
+def _last_match_end(pattern: re.Pattern, text: str, start: int, end: int) -> int | None:
+    """Return the end offset of the last match of pattern inside text[start:end]"""
+    last = None
+    for match in pattern.finditer(text, start, end):
+        if match.end() > start:
+            last = match.end()
+    return last
+
+def chunk_spans(
+    text: str,
+    max_chars: int,
+    index: "BoundaryIndex | None" = None
+) -> List[Tuple[int, int]]:
+    """
+    Split text into spans no longer than max_chars, cutting at the best boundary
+
+    Paragraph breaks are preferred when they fall in the second half of the
+    window, then sentence ends, then whitespace. A hard cut is only made for
+    a single run of text without any whitespace longer than max_chars.
+
+    Args:
+        text: The text to split
+        max_chars: Maximum number of characters per span
+        index: Optional precomputed boundary index of text, which replaces
+            scanning each window for paragraph and sentence ends
+
+    Returns:
+        List[Tuple[int, int]]: Contiguous (start, end) offsets covering the text
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    spans = []
+    start = 0
+    length = len(text)
+    while start < length:
+        limit = start + max_chars
+        if limit >= length:
+            spans.append((start, length))
+            break
+
+        # Boundaries may consume trailing whitespace up to the limit
+        if index is not None:
+            cut = index.last_between(start + max_chars // 2, limit, "paragraph")
+            if cut is None:
+                cut = index.last_between(start, limit, "sentence")
+        else:
+            cut = _last_match_end(PARAGRAPH_END, text, start + max_chars // 2, limit)
+            if cut is None:
+                cut = _last_match_end(SENTENCE_END, text, start, limit)
+        if cut is None:
+            cut = _last_match_end(WHITESPACE, text, start, limit)
+        if cut is None:
+            cut = limit
+
+        spans.append((start, cut))
+        start = cut
+    return spans
+
+def spoken_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Drop whitespace-only spans, leaving one span per synthesis chunk
+
+    Chunk indices (render progress, invalidated chunks) count these spans,
+    not the stored plan, which may contain whitespace-only spans.
+    """
+    return [(start, end) for start, end in spans if text[start:end].strip()]
+
+def chunk_indices(text: str, spans: List[Tuple[int, int]], span_indices: List[int]) -> List[int]:
+    """Map indices into spans to indices of the chunks made from them, dropping whitespace-only spans"""
+    chunk_of = {span: chunk for chunk, span in enumerate(spoken_spans(text, spans))}
+    return [chunk_of[spans[i]] for i in span_indices if spans[i] in chunk_of]
+
+def chunks_from_spans(text: str, spans: List[Tuple[int, int]]) -> List[str]:
+    """Slice text into stripped, non-empty chunks"""
+    return [text[start:end].strip() for start, end in spoken_spans(text, spans)]
+
+def split_into_chunks(
+    text: str,
+    max_chars: int,
+    index: "BoundaryIndex | None" = None
+) -> List[str]:
+    """
+    Split text into non-empty chunks suitable for a single TTS call
+
+    Args:
+        text: The text to split
+        max_chars: Maximum number of characters per chunk
+        index: Optional precomputed boundary index of text
+
+    Returns:
+        List[str]: Stripped chunks in reading order
+    """
+    return chunks_from_spans(text, chunk_spans(text, max_chars, index))
+
+def encode_plan(spans: List[Tuple[int, int]], max_chars: int) -> bytes:
+    """
+    Serialize a chunk plan as uint32 values
+
+    The first value is the max_chars the plan was made with, followed by the
+    end offset of every span (spans are contiguous and start at 0).
+    """
+    return array("I", [max_chars, *(end for _, end in spans)]).tobytes()
+
+def decode_plan(data: bytes, max_chars: int) -> List[Tuple[int, int]] | None:
+    """Deserialize a chunk plan, or return None if it was made with a different max_chars"""
+    values = array("I")
+    values.frombytes(data)
+    if not values or values[0] != max_chars:
+        return None
+    starts = [0, *values[1:-1]]
+    return list(zip(starts, values[1:]))
+
+def _common_prefix_length(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    start = 0
+    # Skip equal blocks, then binary search inside the first differing block
+    while start + COMPARE_BLOCK <= limit and a[start:start + COMPARE_BLOCK] == b[start:start + COMPARE_BLOCK]:
+        start += COMPARE_BLOCK
+    low, high = start, min(start + COMPARE_BLOCK, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[start:middle] == b[start:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    return _common_prefix_length(a[len(a) - limit:][::-1], b[len(b) - limit:][::-1])
+
+def replan_spans(
+    old_text: str,
+    new_text: str,
+    old_spans: List[Tuple[int, int]],
+    max_chars: int
+) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """
+    Update a chunk plan after an edit, re-splitting only the chunks it touched
+
+    Spans before the changed region are kept as they are and spans after it
+    are only shifted, so their text, and therefore their content-addressed
+    audio, stays the same. Re-chunking the whole text instead could move
+    every later cut.
+
+    Args:
+        old_text: The text old_spans was planned for
+        new_text: The edited text
+        old_spans: The previous plan
+        max_chars: Maximum number of characters per span
+
+    Returns:
+        Tuple[List[Tuple[int, int]], List[int]]: The new plan and the
+        indices of its spans whose text changed
+    """
+    if not old_spans:
+        spans = chunk_spans(new_text, max_chars)
+        return spans, list(range(len(spans)))
+
+    prefix = _common_prefix_length(old_text, new_text)
+    suffix = _common_suffix_length(old_text, new_text, min(len(old_text), len(new_text)) - prefix)
+    changed_end = len(old_text) - suffix
+    delta = len(new_text) - len(old_text)
+
+    # First span ending after the change, last span starting before its end
+    first = next((i for i, (_, end) in enumerate(old_spans) if end > prefix), len(old_spans) - 1)
+    last = first
+    while last + 1 < len(old_spans) and old_spans[last + 1][0] < changed_end:
+        last += 1
+
+    region_start = old_spans[first][0]
+    region_end = old_spans[last][1] + delta
+    region = [
+        (region_start + start, region_start + end)
+        for start, end in chunk_spans(new_text[region_start:region_end], max_chars)
+    ]
+    spans = [
+        *old_spans[:first],
+        *region,
+        *((start + delta, end + delta) for start, end in old_spans[last + 1:])
+    ]
+    return spans, list(range(first, first + len(region)))
@@ -0,0 +1,61 @@
+from typing import List, NamedTuple, Sequence
+
+class TextEdit(NamedTuple):
+    """Replace content[start:end] with text"""
+    start: int
+    end: int
+    text: str
+
+def validate_edits(edits: Sequence[TextEdit], length: int) -> List[TextEdit]:
+    """
+    Check that edits fit the content and do not overlap
+
+    Args:
+        edits: Edits whose offsets all refer to the content before any is applied
+        length: Length of the content
+
+    Returns:
+        List[TextEdit]: The edits sorted by position
+
+    Raises:
+        ValueError: If an edit is out of range or overlaps another one
+    """
+    ordered = sorted(edits, key=lambda edit: (edit.start, edit.end))
+    previous_end = 0
+    for edit in ordered:
+        if edit.start > edit.end:
+            raise ValueError(f"Edit start {edit.start} is after its end {edit.end}")
+        if edit.end > length:
+            raise ValueError(f"Edit end {edit.end} is beyond content length {length}")
+        if edit.start < previous_end:
+            raise ValueError(f"Edit at {edit.start} overlaps a previous edit")
+        previous_end = edit.end
+    return ordered
+
+def apply_edits(content: str, edits: Sequence[TextEdit]) -> str:
+    """Apply validated, sorted edits to content in a single pass"""
+    pieces = []
+    position = 0
+    for edit in edits:
+        pieces.append(content[position:edit.start])
+        pieces.append(edit.text)
+        position = edit.end
+    pieces.append(content[position:])
+    return "".join(pieces)
+
+def shift_offset(offset: int, edits: Sequence[TextEdit]) -> int:
+    """
+    Map an offset in the content to the same place after validated, sorted edits
+
+    Offsets strictly inside a replaced range move to the end of its
+    replacement, so text inserted at a chapter boundary that falls inside an
+    edit belongs to the earlier chapter.
+    """
+    shift = 0
+    for edit in edits:
+        if offset <= edit.start:
+            break
+        if offset < edit.end:
+            return edit.start + shift + len(edit.text)
+        shift += len(edit.text) - (edit.end - edit.start)
+    return offset + shift
@@ -0,0 +1,267 @@
+from array import array
+from typing import BinaryIO, Iterator, NamedTuple, Tuple
+import struct
+
+# Layer III bitrates in kbps by bitrate index, for MPEG-1 and for MPEG-2/2.5
+MPEG1_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+MPEG2_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+
+# Sample rates by version bits (0: MPEG-2.5, 2: MPEG-2, 3: MPEG-1) and sample rate index
+SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000)
+}
+
+ID3V2_HEADER_SIZE = 10
+ID3V1_SIZE = 128
+
+# Xing header flags: frame count, byte count and seek table present
+XING_FLAGS = 0x01 | 0x02 | 0x04
+XING_TOC_SIZE = 100
+
+class FrameHeader(NamedTuple):
+    """Decoded header of an MPEG audio Layer III frame"""
+    raw: bytes
+    mpeg1: bool
+    bitrate: int  # kbps
+    sample_rate: int
+    mono: bool
+    protected: bool  # followed by a 16-bit CRC
+    size: int  # bytes, including the header
+    samples: int
+
+def parse_header(data: bytes, pos: int) -> FrameHeader | None:
+    """Decode the frame header at pos, or return None if there is no valid Layer III header"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+    # Reserved version, other layers, free-format and invalid bitrates, reserved sample rate
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = (MPEG1_BITRATES if mpeg1 else MPEG2_BITRATES)[bitrate_index]
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    samples = 1152 if mpeg1 else 576
+    padding = (b2 >> 1) & 0x01
+    return FrameHeader(
+        raw=bytes(data[pos:pos + 4]),
+        mpeg1=mpeg1,
+        bitrate=bitrate,
+        sample_rate=sample_rate,
+        mono=b3 >> 6 == 3,
+        protected=not b1 & 0x01,
+        size=samples // 8 * bitrate * 1000 // sample_rate + padding,
+        samples=samples
+    )
+
+def side_info_size(header: FrameHeader) -> int:
+    """Bytes of Layer III side information following the header (and CRC)"""
+    if header.mpeg1:
+        return 17 if header.mono else 32
+    return 9 if header.mono else 17
+
+def is_info_frame(data: bytes, pos: int, header: FrameHeader) -> bool:
+    """Check whether a frame carries a Xing, Info (LAME) or VBRI header instead of audio"""
+    offset = pos + 4 + (2 if header.protected else 0) + side_info_size(header)
+    return data[offset:offset + 4] in (b"Xing", b"Info") or data[pos + 36:pos + 40] == b"VBRI"
+
+def _id3v2_size(data: bytes) -> int:
+    """Size of a leading ID3v2 tag, or 0 if there is none"""
+    if len(data) < ID3V2_HEADER_SIZE or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = ID3V2_HEADER_SIZE if data[5] & 0x10 else 0
+    return ID3V2_HEADER_SIZE + size + footer
+
+def _resync(data: bytes, pos: int, end: int) -> int | None:
+    """Find the next frame header that is followed by another frame header or the end"""
+    while True:
+        pos = data.find(b"\xff", pos, end - 3)
+        if pos < 0:
+            return None
+        header = parse_header(data, pos)
+        if header is not None:
+            following = pos + header.size
+            if following == end or (following < end and parse_header(data, following) is not None):
+                return pos
+        pos += 1
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, FrameHeader]]:
+    """
+    Yield the position and header of every frame in an MP3 file
+
+    ID3v2 and ID3v1 tags are skipped, and garbage between frames is
+    skipped by resynchronizing on the next pair of valid headers. A
+    truncated last frame is dropped.
+    """
+    pos = _id3v2_size(data)
+    end = len(data)
+    if end - pos >= ID3V1_SIZE and data[end - ID3V1_SIZE:end - ID3V1_SIZE + 3] == b"TAG":
+        end -= ID3V1_SIZE
+    while pos + 4 <= end:
+        header = parse_header(data, pos)
+        if header is None or pos + header.size > end:
+            pos = _resync(data, pos + 1, end)
+            if pos is None:
+                return
+            continue
+        yield pos, header
+        pos += header.size
+
+def audio_frames(data: bytes) -> Iterator[Tuple[int, FrameHeader]]:
+    """Yield the position and header of every audio frame, skipping a leading Xing/Info/VBRI frame"""
+    first = True
+    for pos, header in iter_frames(data):
+        if first:
+            first = False
+            if is_info_frame(data, pos, header):
+                continue
+        yield pos, header
+
+def strip_metadata(data: bytes) -> bytes:
+    """
+    Get only the audio frames of an MP3 file
+
+    Unlike Mp3Joiner, this needs no seekable output, so streams can be
+    joined on the fly: the stripped files concatenate into a valid stream
+    without per-file tags or Xing/Info frames, though without a header
+    giving the total duration either.
+    """
+    runs = []
+    run_start = run_end = 0
+    for pos, header in audio_frames(data):
+        if pos != run_end:
+            runs.append(data[run_start:run_end])
+            run_start = pos
+        run_end = pos + header.size
+    runs.append(data[run_start:run_end])
+    return b"".join(runs)
+
+class Mp3Joiner:
+    """
+    Join MP3 files into one stream at the frame level, without transcoding
+
+    Tags and per-file Xing/Info/VBRI frames are dropped, since they describe
+    only their own file. One Xing header frame is written at the start of
+    the output instead, with the total frame and byte counts and a seek
+    table, so players show the right duration and seek accurately even when
+    the chunks were encoded at different bitrates. The output must be
+    seekable because the header is filled in by finish().
+
+    All chunks must share a sample rate and MPEG version; the bitrate and
+    channel mode may vary.
+    """
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+        self.frames = 0
+        self.audio_bytes = 0
+        self._start = output.tell()
+        self._first: FrameHeader | None = None
+        self._header_size = 0
+        self._bitrates = set()
+        # Offset of each audio frame from the first one, for the seek table
+        self._offsets = array("Q")
+
+    def add(self, data: bytes) -> float:
+        """
+        Append the audio frames of one MP3 file
+
+        Args:
+            data: The complete MP3 file
+
+        Returns:
+            float: Duration of the appended audio in seconds
+
+        Raises:
+            ValueError: If the audio format differs from earlier files
+        """
+        frames = 0
+        run_start = run_end = 0
+        for pos, header in audio_frames(data):
+            if self._first is None:
+                self._first = header
+                self._write_placeholder(header)
+            elif header.sample_rate != self._first.sample_rate or header.mpeg1 != self._first.mpeg1:
+                raise ValueError(
+                    f"Cannot join {header.sample_rate} Hz audio to a {self._first.sample_rate} Hz stream"
+                )
+            # Write contiguous runs of frames in one call
+            if pos != run_end:
+                self.output.write(data[run_start:run_end])
+                run_start = pos
+            run_end = pos + header.size
+            self._offsets.append(self.audio_bytes)
+            self.audio_bytes += header.size
+            self._bitrates.add(header.bitrate)
+            frames += 1
+        self.output.write(data[run_start:run_end])
+        self.frames += frames
+        if not frames:
+            return 0.0
+        return frames * self._first.samples / self._first.sample_rate
+
+    @property
+    def duration(self) -> float:
+        """Total duration of the joined audio in seconds"""
+        if self._first is None:
+            return 0.0
+        return self.frames * self._first.samples / self._first.sample_rate
+
+    def _header_frame(self, first: FrameHeader) -> FrameHeader:
+        """Pick the smallest frame matching the stream's format that can hold a Xing header"""
+        needed = 4 + side_info_size(first) + 4 + 4 + 4 + 4 + XING_TOC_SIZE
+        rates = MPEG1_BITRATES if first.mpeg1 else MPEG2_BITRATES
+        rate_index = (first.raw[2] >> 2) & 0x03
+        for bitrate_index in range(1, len(rates)):
+            # No CRC, no padding, private bit clear
+            raw = bytes([0xFF, first.raw[1] | 0x01, (bitrate_index << 4) | (rate_index << 2), first.raw[3]])
+            header = parse_header(raw, 0)
+            if header.size >= needed:
+                return header
+        raise ValueError("Frame size too small for a Xing header")
+
+    def _write_placeholder(self, first: FrameHeader) -> None:
+        header = self._header_frame(first)
+        self._header_size = header.size
+        self.output.write(bytes(header.size))
+
+    def finish(self) -> int:
+        """
+        Write the Xing header frame over its placeholder
+
+        Returns:
+            int: Total size of the joined stream in bytes
+
+        Raises:
+            ValueError: If no audio frames were added
+        """
+        if self._first is None or not self.frames:
+            raise ValueError("No MP3 audio frames found")
+        header = self._header_frame(self._first)
+        total_bytes = self._header_size + self.audio_bytes
+        toc = bytes(
+            min(255, (self._header_size + self._offsets[min(i * self.frames // 100, self.frames - 1)]) * 256 // total_bytes)
+            for i in range(XING_TOC_SIZE)
+        )
+        # Constant bitrate streams use LAME's "Info" tag so players keep treating them as CBR
+        tag = b"Xing" if len(self._bitrates) > 1 else b"Info"
+        frame = (
+            header.raw
+            + bytes(side_info_size(header))
+            + tag
+            + struct.pack(">III", XING_FLAGS, self.frames, total_bytes)
+            + toc
+        )
+        end = self.output.tell()
+        self.output.seek(self._start)
+        self.output.write(frame.ljust(header.size, b"\x00"))
+        self.output.seek(end)
+        return total_bytes
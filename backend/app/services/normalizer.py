@@ -0,0 +1,300 @@
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple
+import re
+
+# Lines repeated this often are treated as running headers or footers
+HEADER_MIN_REPEATS = 5
+HEADER_MAX_CHARS = 80
+
+ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+    "seventeen", "eighteen", "nineteen"
+]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+SCALES = [(10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand")]
+ORDINAL_WORDS = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth"
+}
+
+# Abbreviations the TTS model tends to spell out or misread
+ABBREVIATIONS = {
+    "Mr.": "Mister",
+    "Mrs.": "Missus",
+    "Dr.": "Doctor",
+    "Prof.": "Professor",
+    "Capt.": "Captain",
+    "Gen.": "General",
+    "Lt.": "Lieutenant",
+    "Sgt.": "Sergeant",
+    "Col.": "Colonel",
+    "Rev.": "Reverend",
+    "Jr.": "Junior",
+    "e.g.": "for example",
+    "i.e.": "that is",
+    "vs.": "versus",
+}
+
+RULES = [
+    # Leading and trailing whitespace of the whole text
+    ("trim", r"\A\s+|\s+\Z"),
+    # Page numbers on a line of their own, e.g. "12", "- 12 -" or "Page 12"
+    ("page_number", r"^[ \t]*(?:[-–—][ \t]*)?(?:[Pp]age[ \t]+)?\d{1,4}(?:[ \t]*[-–—])?[ \t]*(?:\n|\Z)(?:[ \t]*\n)*"),
+    # Three or more line breaks (possibly with whitespace between) become a paragraph break
+    ("blank_lines", r"[ \t]*\n(?:[ \t]*\n)+[ \t]*"),
+    # Indentation and trailing spaces around a single line break
+    ("line_whitespace", r"[ \t]+\n[ \t]*|\n[ \t]+"),
+    # Runs of spaces, tabs and non-breaking spaces
+    ("spaces", r"[ \t\u00a0]{2,}"),
+    # Soft hyphens and zero-width characters
+    ("invisible", r"[\u00ad\u200b\u200c\u200d\u2060\ufeff]+"),
+    # Footnote references such as [12], superscript digits and daggers after a word
+    ("footnote", r"\[\d{1,3}\]|(?<=[\w.,;:!?\"'”’)])(?:[⁰¹²³⁴⁵⁶⁷⁸⁹]+|[*†‡]+)"),
+]
+ABBREVIATION_RULE = (
+    "abbreviation",
+    r"(?<![\w.])(?:" + "|".join(re.escape(abbreviation) for abbreviation in ABBREVIATIONS) + r")(?=\s)"
+)
+NUMBER_RULE = (
+    "number",
+    r"(?<![\w.,:$£€-])(?P<integer>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<fraction>\d+))?(?P<ordinal>st|nd|rd|th)?(?!\w|[.,:-]\d)"
+)
+# Rules that spell text out for pronunciation, which adds characters
+EXPANSION_RULES = (ABBREVIATION_RULE[0], NUMBER_RULE[0])
+
+class OffsetMap:
+    """
+    Maps character offsets between original and normalized text
+
+    Anchors are recorded at the start and end of every edit as pairs of
+    (original, normalized) offsets; between anchors the texts are
+    identical, so any offset is found with a binary search and a shift.
+    Offsets inside an edited span snap to the span's boundaries.
+    """
+
+    def __init__(self, original: array | None = None, normalized: array | None = None):
+        self.original = original if original is not None else array("I")
+        self.normalized = normalized if normalized is not None else array("I")
+
+    def add(self, original: int, normalized: int) -> None:
+        self.original.append(original)
+        self.normalized.append(normalized)
+
+    @staticmethod
+    def _map(offset: int, source: array, target: array) -> int:
+        index = bisect_right(source, offset) - 1
+        if index < 0:
+            mapped = offset
+        else:
+            mapped = target[index] + (offset - source[index])
+        if index + 1 < len(target):
+            mapped = min(mapped, target[index + 1])
+        return mapped
+
+    def to_original(self, offset: int) -> int:
+        """Map an offset in the normalized text to the original text"""
+        return self._map(offset, self.normalized, self.original)
+
+    def to_normalized(self, offset: int) -> int:
+        """Map an offset in the original text to the normalized text"""
+        return self._map(offset, self.original, self.normalized)
+
+    def to_bytes(self) -> bytes:
+        """Serialize as interleaved (original, normalized) uint32 pairs"""
+        pairs = array("I", [0]) * (2 * len(self.original))
+        pairs[0::2] = self.original
+        pairs[1::2] = self.normalized
+        return pairs.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OffsetMap":
+        pairs = array("I")
+        pairs.frombytes(data)
+        return cls(pairs[0::2], pairs[1::2])
+
+class Normalized(NamedTuple):
+    """Result of normalizing a text"""
+    text: str
+    offsets: OffsetMap
+    report: Dict[str, object]
+
+def number_to_words(number: int) -> str:
+    """Spell out a non-negative integer below one trillion"""
+    if number < 20:
+        return ONES[number]
+    if number < 100:
+        tens, ones = divmod(number, 10)
+        return TENS[tens] + (f"-{ONES[ones]}" if ones else "")
+    if number < 1000:
+        hundreds, rest = divmod(number, 100)
+        return f"{ONES[hundreds]} hundred" + (f" {number_to_words(rest)}" if rest else "")
+    for scale, name in SCALES:
+        if number >= scale:
+            high, rest = divmod(number, scale)
+            return f"{number_to_words(high)} {name}" + (f" {number_to_words(rest)}" if rest else "")
+    raise ValueError(f"Number out of range: {number}")
+
+def _ordinal(words: str) -> str:
+    head, _, last = words.rpartition(" ")
+    hyphen_head, _, last = last.rpartition("-")
+    if last in ORDINAL_WORDS:
+        last = ORDINAL_WORDS[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+    if hyphen_head:
+        last = f"{hyphen_head}-{last}"
+    return f"{head} {last}" if head else last
+
+def _year_to_words(year: int) -> str:
+    """Read a year the way it is spoken, e.g. nineteen ninety-nine"""
+    century, rest = divmod(year, 100)
+    if rest == 0:
+        return f"{number_to_words(century)} hundred"
+    if rest < 10:
+        return f"{number_to_words(century)} oh {ONES[rest]}"
+    return f"{number_to_words(century)} {number_to_words(rest)}"
+
+def _expand_number(match: re.Match) -> str:
+    integer = match.group("integer")
+    fraction = match.group("fraction")
+    ordinal = match.group("ordinal")
+    value = int(integer.replace(",", ""))
+    if value >= 10 ** 12 or len(integer) > 1 and integer.startswith("0"):
+        # Identifiers, phone numbers and the like are left to the TTS model
+        return match.group()
+    if ordinal:
+        return _ordinal(number_to_words(value)) if fraction is None else match.group()
+    if fraction is None and "," not in integer and (1100 <= value <= 1999 or 2010 <= value <= 2099):
+        return _year_to_words(value)
+    words = number_to_words(value)
+    if fraction is not None:
+        words += " point " + " ".join(ONES[int(digit)] for digit in fraction)
+    return words
+
+def _running_headers(text: str, min_repeats: int) -> List[str]:
+    """Find short lines repeated throughout the text, like a book title on every page"""
+    counts = Counter(
+        line.strip()
+        for line in text.split("\n")
+        if 2 < len(line.strip()) <= HEADER_MAX_CHARS
+    )
+    return [
+        line
+        for line, count in counts.items()
+        if count >= min_repeats
+        and any(char.isalpha() for char in line)
+        # Dialogue and other real sentences end in punctuation; headers do not
+        and line[-1] not in ".!?…\"'”’:;,"
+        and line[0] not in "\"'“‘"
+    ]
+
+def summarize(original_chars: int, normalized_chars: int, rules: Dict[str, Dict[str, int]]) -> Dict[str, object]:
+    """
+    Build a normalization report from per-rule edit counts and net savings
+
+    Whitespace and boilerplate rules are totalled as chars_saved. Expansion
+    rules are totalled separately as chars_added, so spelling out numbers
+    does not hide the savings (or make them negative).
+
+    Args:
+        original_chars: Length of the original text
+        normalized_chars: Length of the normalized text
+        rules: Edits and net characters saved by each rule that made edits
+
+    Returns:
+        Dict[str, object]: The report
+    """
+    saved = sum(rule["chars_saved"] for name, rule in rules.items() if name not in EXPANSION_RULES)
+    added = -sum(rule["chars_saved"] for name, rule in rules.items() if name in EXPANSION_RULES)
+    return {
+        "original_chars": original_chars,
+        "normalized_chars": normalized_chars,
+        "chars_saved": saved,
+        "percent_saved": round(100.0 * saved / original_chars, 2) if original_chars else 0.0,
+        "chars_added": added,
+        "rules": rules
+    }
+
+def normalize(
+    text: str,
+    expand_abbreviations: bool = True,
+    expand_numbers: bool = True,
+    header_min_repeats: int = HEADER_MIN_REPEATS
+) -> Normalized:
+    """
+    Normalize text before it is sent for synthesis
+
+    Collapses whitespace, strips boilerplate (page numbers, running
+    headers, soft hyphens and footnote markers) and expands abbreviations
+    and numbers into words, in a single pass over the text.
+
+    Args:
+        text: The original text
+        expand_abbreviations: Whether to spell out common abbreviations
+        expand_numbers: Whether to spell out numbers, ordinals and years
+        header_min_repeats: How often a short line must repeat to count as a running header
+
+    Returns:
+        Normalized: The normalized text, the offset map back to the
+        original text and a report from summarize()
+    """
+    rules = list(RULES)
+    headers = _running_headers(text, header_min_repeats)
+    if headers:
+        alternation = "|".join(re.escape(header) for header in sorted(headers, key=len, reverse=True))
+        rules.insert(1, ("running_header", rf"^[ \t]*(?:{alternation})[ \t]*(?:\n|\Z)(?:[ \t]*\n)*"))
+    replacements: Dict[str, Callable[[re.Match], str]] = {
+        "trim": lambda match: "",
+        "page_number": lambda match: "",
+        "running_header": lambda match: "",
+        "blank_lines": lambda match: "\n\n",
+        "line_whitespace": lambda match: "\n",
+        "spaces": lambda match: " ",
+        "invisible": lambda match: "",
+        "footnote": lambda match: "",
+    }
+    if expand_abbreviations:
+        rules.append(ABBREVIATION_RULE)
+        replacements["abbreviation"] = lambda match: ABBREVIATIONS[match.group()]
+    if expand_numbers:
+        rules.append(NUMBER_RULE)
+        replacements["number"] = _expand_number
+    pattern = re.compile("|".join(f"(?P<{name}>{rule})" for name, rule in rules), re.MULTILINE)
+
+    output: List[str] = []
+    offsets = OffsetMap()
+    counts: Counter = Counter()
+    saved: Counter = Counter()
+    position = 0
+    length = 0
+    for match in pattern.finditer(text):
+        # The rule's group closes last, so it wins over groups nested inside it
+        name = match.lastgroup
+        replacement = replacements[name](match)
+        original = match.group()
+        if replacement == original:
+            continue
+        start, end = match.span()
+        output.append(text[position:start])
+        length += start - position
+        offsets.add(start, length)
+        output.append(replacement)
+        length += len(replacement)
+        offsets.add(end, length)
+        position = end
+        counts[name] += 1
+        saved[name] += len(original) - len(replacement)
+    output.append(text[position:])
+    normalized = "".join(output)
+
+    report = summarize(len(text), len(normalized), {
+        name: {"edits": counts[name], "chars_saved": saved[name]}
+        for name, _ in rules
+        if counts[name]
+    })
+    return Normalized(text=normalized, offsets=offsets, report=report)
@@ -0,0 +1,41 @@
+"""
+TTS provider backends
+"""
+from app.config import Settings
+from app.services.providers.base import ProviderError, TTSProvider
+from app.services.providers.elevenlabs import ElevenLabsClient
+from app.services.providers.simulated import SimulatedProvider
+
+def create_provider(settings: Settings) -> TTSProvider:
+    """
+    Create the TTS provider selected by settings.tts_provider
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        TTSProvider: The ElevenLabs client or the offline simulated provider
+
+    Raises:
+        ValueError: If the provider is unknown or ElevenLabs has no API key
+    """
+    if settings.tts_provider == "simulated":
+        return SimulatedProvider(
+            latency_ms=settings.tts_simulated_latency_ms,
+            jitter_ms=settings.tts_simulated_jitter_ms,
+            error_rate=settings.tts_simulated_error_rate,
+            realtime_factor=settings.tts_simulated_realtime_factor,
+            seed=settings.tts_simulated_seed
+        )
+    if settings.tts_provider == "elevenlabs":
+        if not settings.elevenlabs_api_key:
+            raise ValueError("ELEVENLABS_API_KEY must be set when TTS_PROVIDER is 'elevenlabs'")
+        return ElevenLabsClient(
+            api_key=settings.elevenlabs_api_key,
+            base_url=settings.elevenlabs_base_url,
+            timeout=settings.tts_timeout_seconds,
+            connect_timeout=settings.tts_connect_timeout_seconds,
+            max_connections=settings.tts_max_connections,
+            max_keepalive_connections=settings.tts_max_keepalive_connections
+        )
+    raise ValueError(f"Unknown TTS provider '{settings.tts_provider}'")
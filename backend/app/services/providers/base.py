@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List
+import re
+
+VOICE_ID_PATTERN = re.compile(r'^[a-zA-Z0-9]{20}$')
+
+class ProviderError(Exception):
+    """Error returned by a TTS provider"""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class TTSProvider(ABC):
+    """
+    Text-to-speech backend used by tts_service
+
+    Implementations synthesize MP3 audio and list their voices. Voices are
+    returned as dicts with at least "voice_id" and "name" keys, in the shape
+    of the ElevenLabs voice list.
+    """
+
+    name: str = "provider"
+
+    def is_voice_id(self, value: str) -> bool:
+        """Check whether value looks like a voice ID rather than a voice name"""
+        return bool(VOICE_ID_PATTERN.match(value))
+
+    @abstractmethod
+    async def text_to_speech(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str,
+        timeout: float | None = None
+    ) -> bytes:
+        """
+        Synthesize text with the given voice
+
+        Args:
+            text: The text to convert to speech
+            voice_id: The provider's voice ID
+            model_id: The TTS model to use
+            timeout: Optional per-call timeout
+
+        Returns:
+            bytes: The MP3 audio
+
+        Raises:
+            ProviderError: If the provider rejects the request
+        """
+
+    @abstractmethod
+    def stream_text_to_speech(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str
+    ) -> AsyncIterator[bytes]:
+        """
+        Synthesize text with the given voice, yielding audio as it is produced
+
+        Args:
+            text: The text to convert to speech
+            voice_id: The provider's voice ID
+            model_id: The TTS model to use
+
+        Yields:
+            bytes: Consecutive pieces of the MP3 audio
+
+        Raises:
+            ProviderError: If the provider rejects the request
+        """
+
+    @abstractmethod
+    async def list_voices(self, timeout: float | None = None) -> List[Dict[str, Any]]:
+        """
+        Get the raw voice list
+
+        Args:
+            timeout: Optional per-call timeout
+
+        Returns:
+            List[Dict[str, Any]]: Voice objects with "voice_id" and "name"
+
+        Raises:
+            ProviderError: If the provider rejects the request
+        """
+
+    async def aclose(self) -> None:
+        """Release connections or other resources held by the provider"""
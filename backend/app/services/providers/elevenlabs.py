@@ -0,0 +1,158 @@
+from typing import Any, AsyncIterator, Dict, List
+import httpx
+from app.services.providers.base import ProviderError, TTSProvider
+
+class ElevenLabsError(ProviderError):
+    """Error returned by the ElevenLabs API"""
+
+class ElevenLabsClient(TTSProvider):
+    """
+    Asynchronous ElevenLabs API client
+
+    A single httpx.AsyncClient is shared by all calls so that TLS connections
+    to the API are pooled and kept alive between requests. The client is
+    created lazily on first use and must be closed with aclose() on shutdown.
+    """
+
+    name = "elevenlabs"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.elevenlabs.io/v1",
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"xi-api-key": self.api_key},
+                timeout=self.timeout,
+                limits=self.limits
+            )
+        return self._client
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response) -> None:
+        """Raise ElevenLabsError with the API's own message for non-200 responses"""
+        if response.status_code == 200:
+            return
+        try:
+            detail = response.json().get("detail", response.text)
+        except ValueError:
+            detail = response.text
+        if isinstance(detail, dict):
+            detail = detail.get("message") or detail.get("status") or str(detail)
+        raise ElevenLabsError(str(detail), response.status_code)
+
+    async def text_to_speech(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str,
+        timeout: float | None = None
+    ) -> bytes:
+        """
+        Synthesize text with the given voice
+
+        Args:
+            text: The text to convert to speech
+            voice_id: The ElevenLabs voice ID
+            model_id: The TTS model to use
+            timeout: Optional per-call timeout overriding the client default
+
+        Returns:
+            bytes: The MP3 audio
+
+        Raises:
+            ElevenLabsError: If the API rejects the request
+            httpx.HTTPError: On connection errors or timeouts
+        """
+        response = await self.client.post(
+            f"/text-to-speech/{voice_id}",
+            json={"text": text, "model_id": model_id},
+            timeout=timeout if timeout is not None else self.timeout
+        )
+        self._raise_for_status(response)
+        return response.content
+
+    async def stream_text_to_speech(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str,
+        chunk_size: int = 4096,
+        latency: int = 1,
+        timeout: float | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Synthesize text with the given voice, yielding audio as it arrives
+
+        Args:
+            text: The text to convert to speech
+            voice_id: The ElevenLabs voice ID
+            model_id: The TTS model to use
+            chunk_size: Size of the chunks read from the response body
+            latency: ElevenLabs optimize_streaming_latency level (0-4)
+            timeout: Optional per-call timeout overriding the client default
+
+        Yields:
+            bytes: Consecutive pieces of the MP3 audio
+
+        Raises:
+            ElevenLabsError: If the API rejects the request
+            httpx.HTTPError: On connection errors or timeouts
+        """
+        async with self.client.stream(
+            "POST",
+            f"/text-to-speech/{voice_id}/stream",
+            params={"optimize_streaming_latency": latency},
+            json={"text": text, "model_id": model_id},
+            timeout=timeout if timeout is not None else self.timeout
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._raise_for_status(response)
+            async for chunk in response.aiter_bytes(chunk_size):
+                if chunk:
+                    yield chunk
+
+    async def list_voices(self, timeout: float | None = None) -> List[Dict[str, Any]]:
+        """
+        Get the raw voice list
+
+        Args:
+            timeout: Optional per-call timeout overriding the client default
+
+        Returns:
+            List[Dict[str, Any]]: Voice objects as returned by the API
+
+        Raises:
+            ElevenLabsError: If the API rejects the request
+            httpx.HTTPError: On connection errors or timeouts
+        """
+        response = await self.client.get(
+            "/voices",
+            timeout=timeout if timeout is not None else self.timeout
+        )
+        self._raise_for_status(response)
+        return response.json().get("voices", [])
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
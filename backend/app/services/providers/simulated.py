@@ -0,0 +1,129 @@
+from typing import Any, AsyncIterator, Dict, List
+import asyncio
+import hashlib
+import math
+import random
+from app.services.providers.base import ProviderError, TTSProvider
+
+# The stream format ElevenLabs returns by default: MPEG-1 Layer III, 128 kbps, 44.1 kHz mono
+SAMPLE_RATE = 44100
+BITRATE = 128000
+FRAME_SAMPLES = 1152
+FRAME_BYTES, FRAME_REMAINDER = divmod(144 * BITRATE, SAMPLE_RATE)
+
+# Header of an unpadded frame; the original bit is set, as in ElevenLabs output
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0xC4])
+PADDING_BIT = 0x02
+
+# Typical narration speed, used to size the audio for a text
+CHARS_PER_SECOND = 15.0
+
+VOICE_NAMES = ["Adam", "Antoni", "Arnold", "Bella", "Domi", "Elli", "Josh", "Rachel", "Sam"]
+
+def silent_frames(count: int) -> bytes:
+    """
+    Encode count frames of MP3 silence
+
+    Each frame is a valid header followed by zeroed side information, so
+    every granule has no main data and decodes to silence. Frames are
+    padded by one byte where needed to hold the exact nominal bitrate.
+    """
+    padded_header = bytes([FRAME_HEADER[0], FRAME_HEADER[1], FRAME_HEADER[2] | PADDING_BIT, FRAME_HEADER[3]])
+    frame = FRAME_HEADER + bytes(FRAME_BYTES - len(FRAME_HEADER))
+    padded_frame = padded_header + bytes(FRAME_BYTES + 1 - len(FRAME_HEADER))
+    frames = []
+    remainder = 0
+    for _ in range(count):
+        remainder += FRAME_REMAINDER
+        if remainder >= SAMPLE_RATE:
+            remainder -= SAMPLE_RATE
+            frames.append(padded_frame)
+        else:
+            frames.append(frame)
+    return b"".join(frames)
+
+def speech_seconds(text: str) -> float:
+    """Duration the simulated narration of text lasts"""
+    return max(len(text), 1) / CHARS_PER_SECOND
+
+class SimulatedProvider(TTSProvider):
+    """
+    Offline TTS provider for development, load tests and benchmarks
+
+    Returns deterministic MP3 silence as long as a narrator would take to
+    read the text, after a configurable time to first byte with uniform
+    jitter. The rest of the audio arrives realtime_factor times faster than
+    it plays. A fraction of calls, set by error_rate, fails with a 503
+    like an overloaded upstream. The random source is seeded, so a run is
+    reproducible for the same sequence of calls.
+    """
+
+    name = "simulated"
+
+    def __init__(
+        self,
+        latency_ms: float = 250.0,
+        jitter_ms: float = 100.0,
+        error_rate: float = 0.0,
+        realtime_factor: float = 5.0,
+        chunk_size: int = 4096,
+        seed: int = 0
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.realtime_factor = max(realtime_factor, 0.001)
+        self.chunk_size = chunk_size
+        self._random = random.Random(seed)
+        self.voices = [
+            {
+                "voice_id": hashlib.sha256(name.encode()).hexdigest()[:20],
+                "name": name,
+                "description": "Simulated voice"
+            }
+            for name in VOICE_NAMES
+        ]
+        self._voice_ids = {voice["voice_id"] for voice in self.voices}
+
+    async def _respond(self) -> None:
+        """Wait for the time to first byte, then fail at the configured rate"""
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(delay, 0.0))
+        if self._random.random() < self.error_rate:
+            raise ProviderError("Simulated upstream overload", 503)
+
+    def _audio(self, text: str, voice_id: str) -> bytes:
+        if voice_id not in self._voice_ids:
+            raise ProviderError(f"Voice {voice_id} not found", 404)
+        return silent_frames(math.ceil(speech_seconds(text) * SAMPLE_RATE / FRAME_SAMPLES))
+
+    async def text_to_speech(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str,
+        timeout: float | None = None
+    ) -> bytes:
+        audio = self._audio(text, voice_id)
+        await self._respond()
+        await asyncio.sleep(speech_seconds(text) / self.realtime_factor)
+        return audio
+
+    async def stream_text_to_speech(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str
+    ) -> AsyncIterator[bytes]:
+        audio = self._audio(text, voice_id)
+        await self._respond()
+        seconds_per_byte = speech_seconds(text) / self.realtime_factor / len(audio)
+        for start in range(0, len(audio), self.chunk_size):
+            piece = audio[start:start + self.chunk_size]
+            if start:
+                await asyncio.sleep(len(piece) * seconds_per_byte)
+            yield piece
+
+    async def list_voices(self, timeout: float | None = None) -> List[Dict[str, Any]]:
+        await self._respond()
+        return [dict(voice) for voice in self.voices]
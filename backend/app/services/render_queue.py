@@ -0,0 +1,499 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Set, Tuple
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import AudioBlob, Book, BookAudio, Chapter, RenderJob
+from app.services import audiobook, chunker, tts_service
+from app.services.audio_cache import AudioCache, make_key
+from app.services.blobs import BlobStore, create_blob_store
+from app.services.boundaries import BoundaryIndex
+from app.services.normalizer import OffsetMap
+from app.services.single_flight import SingleFlight
+from app.services.tts_scheduler import BULK
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+class RenderQueue:
+    """
+    Persistent queue of whole-book renders processed by in-process workers
+
+    Jobs live in the render_jobs table, so they survive restarts and are
+    shared by every server process. A worker claims a job with a conditional
+    UPDATE before running it, so each job runs in one process at a time, and
+    refreshes the claim's heartbeat while it runs. A periodic sweep queues
+    jobs that are waiting, including running jobs whose heartbeat is older
+    than settings.render_stale_after because their process died. Synthesized chunks
+    are kept in a content-addressed chunk store keyed like the audio cache
+    (text, voice, model), so a resumed job only synthesizes the chunks that
+    had not finished before the interruption.
+
+    Chunks are joined at the MP3 frame level in a worker process. The result
+    goes to the blob store under its SHA-256 and is linked to the book in
+    book_audio; the chapter positions on the audio timeline are kept in
+    output_dir, which also stages files before they enter the blob store.
+    """
+
+    def __init__(self, chunk_store: AudioCache, blobs: BlobStore, output_dir: str | Path, workers: int):
+        self.chunk_store = chunk_store
+        self.blobs = blobs
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._exports: SingleFlight[str] = SingleFlight()
+        # Job IDs on the local queue, so sweeps do not queue a job twice
+        self._pending: Set[int] = set()
+        # Identifies this process in render_jobs.claimed_by
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def output_path(self, job_id: int) -> Path:
+        return self.output_dir / f"{job_id}.mp3"
+
+    def chapters_path(self, job_id: int) -> Path:
+        return self.output_dir / f"{job_id}.chapters.json"
+
+    def m4b_path(self, job_id: int) -> Path:
+        return self.output_dir / f"{job_id}.m4b"
+
+    async def start(self) -> None:
+        """Queue unfinished jobs, then start the workers and the sweep"""
+        await self._enqueue_claimable()
+        self._tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        """Cancel the workers and release this process's jobs so the next start resumes them"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        async with async_session_maker() as session:
+            await session.execute(
+                update(RenderJob)
+                .where(RenderJob.claimed_by == self.worker_id, RenderJob.status == RUNNING)
+                .values(status=QUEUED, claimed_by=None, heartbeat_at=None)
+            )
+            await session.commit()
+
+    def enqueue(self, job_id: int) -> None:
+        if job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    def _claimable(self):
+        """Condition matching jobs no process is working on"""
+        stale = datetime.utcnow() - timedelta(seconds=settings.render_stale_after)
+        return or_(
+            RenderJob.status == QUEUED,
+            and_(
+                RenderJob.status == RUNNING,
+                or_(RenderJob.heartbeat_at.is_(None), RenderJob.heartbeat_at < stale)
+            )
+        )
+
+    async def _enqueue_claimable(self) -> None:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(RenderJob.id).where(self._claimable()).order_by(RenderJob.id)
+            )
+            for job_id in result.scalars():
+                self.enqueue(job_id)
+
+    async def _sweep(self) -> None:
+        """Periodically queue jobs left by other processes or by a crash"""
+        while True:
+            await asyncio.sleep(settings.render_heartbeat_interval)
+            try:
+                await self._enqueue_claimable()
+            except Exception:
+                logger.exception("Render job sweep failed")
+
+    async def _claim(self, job_id: int) -> bool:
+        """Take a job for this process; False if it finished or another process holds it"""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(RenderJob)
+                .where(RenderJob.id == job_id, self._claimable())
+                .values(status=RUNNING, claimed_by=self.worker_id, heartbeat_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        return result.rowcount == 1
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """Keep a claim alive; returns once another process has taken the job over"""
+        while True:
+            await asyncio.sleep(settings.render_heartbeat_interval)
+            try:
+                async with async_session_maker() as session:
+                    result = await session.execute(
+                        update(RenderJob)
+                        .where(RenderJob.id == job_id, RenderJob.claimed_by == self.worker_id)
+                        .values(heartbeat_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.commit()
+            except Exception:
+                logger.exception(f"Heartbeat of render job {job_id} failed")
+                continue
+            if result.rowcount == 0:
+                return
+
+    async def _run_claimed(self, job_id: int) -> None:
+        """Run a claimed job, stopping it if the claim is lost"""
+        run = asyncio.ensure_future(self._run(job_id))
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+        try:
+            await asyncio.wait({run, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            heartbeat.cancel()
+            if not run.done():
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+        if run.cancelled():
+            logger.warning(f"Render job {job_id} was taken over by another process")
+            return
+        run.result()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                if await self._claim(job_id):
+                    await self._run_claimed(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Render job {job_id} failed")
+                await self._update(job_id, status=FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _update(self, job_id: int, **values) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                update(RenderJob).where(RenderJob.id == job_id).values(**values)
+            )
+            await session.commit()
+
+    async def _run(self, job_id: int) -> None:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(RenderJob, Book)
+                .join(Book, RenderJob.book_id == Book.id)
+                .where(RenderJob.id == job_id)
+                .options(
+                    undefer(Book.content),
+                    undefer(Book.normalized_content),
+                    undefer(Book.normalization_offsets),
+                    undefer(Book.boundary_index),
+                    undefer(Book.chunk_plan)
+                )
+            )
+            row = result.one_or_none()
+            if row is None:
+                return
+            job, book = row
+            if job.status not in ACTIVE_STATUSES:
+                return
+            voice_id = job.voice_id
+            normalized = book.normalized_content is not None
+            text = book.normalized_content if normalized else book.content
+            spans = None
+            if book.chunk_plan is not None and normalized:
+                spans = chunker.decode_plan(book.chunk_plan, settings.tts_chunk_max_chars)
+            if spans is None:
+                index = BoundaryIndex.from_bytes(book.boundary_index) if book.boundary_index else None
+                spans = chunker.chunk_spans(text, settings.tts_chunk_max_chars, index)
+            # Keep each span aligned with its chunk for placing chapters
+            spans = chunker.spoken_spans(text, spans)
+            chunks = chunker.chunks_from_spans(text, spans)
+
+            result = await session.execute(
+                select(Chapter.title, Chapter.start_offset, Chapter.end_offset)
+                .where(Chapter.book_id == book.id)
+                .order_by(Chapter.position)
+            )
+            chapters = [tuple(chapter) for chapter in result]
+            if normalized and book.normalization_offsets:
+                # Chapter offsets refer to the original content
+                offsets = OffsetMap.from_bytes(book.normalization_offsets)
+                chapters = [
+                    (title, offsets.to_normalized(start), offsets.to_normalized(end))
+                    for title, start, end in chapters
+                ]
+            title = book.title
+
+        if not chunks:
+            raise ValueError("Book is empty")
+        voice = await tts_service.resolve_voice_id(voice_id)
+        keys = [make_key(chunk, voice, settings.tts_model_id) for chunk in chunks]
+        done = sum(1 for key in keys if key in self.chunk_store)
+        await self._update(
+            job_id,
+            status=RUNNING,
+            total_chunks=len(chunks),
+            completed_chunks=done,
+            error=None
+        )
+
+        await self._render_chunks(job_id, chunks, keys, voice, done, f"user:{job.user_id}")
+        assembled = await self._assemble(job_id, keys, spans, chapters, title)
+        await self._store(
+            job.book_id,
+            job_id,
+            voice_id,
+            "mp3",
+            self.output_path(job_id),
+            assembled.sha256,
+            assembled.duration
+        )
+        await self._update(
+            job_id,
+            status=COMPLETED,
+            completed_chunks=len(chunks),
+            output_sha256=assembled.sha256
+        )
+
+    async def _render_chunks(
+        self,
+        job_id: int,
+        chunks: List[str],
+        keys: List[str],
+        voice: str,
+        done: int,
+        owner: str
+    ) -> None:
+        """Synthesize every chunk missing from the chunk store, recording progress"""
+        semaphore = asyncio.Semaphore(settings.tts_max_concurrency)
+        progress = {"done": done}
+
+        async def render(chunk: str, key: str) -> None:
+            async with semaphore:
+                audio = await tts_service.synthesize(chunk, voice, owner, BULK)
+            await run_in_threadpool(self.chunk_store.put, key, audio)
+            progress["done"] += 1
+            await self._update(job_id, completed_chunks=progress["done"])
+
+        tasks = [
+            asyncio.ensure_future(render(chunk, key))
+            for chunk, key in zip(chunks, keys)
+            if key not in self.chunk_store
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _assemble(
+        self,
+        job_id: int,
+        keys: List[str],
+        spans: List[Tuple[int, int]],
+        chapters: List[Tuple[str | None, int, int]],
+        title: str
+    ) -> audiobook.AssembledAudio:
+        """Join the chunk audio in order into the job's staging file and save its chapter marks"""
+        paths = []
+        for index, key in enumerate(keys):
+            path = await run_in_threadpool(self.chunk_store.locate, key)
+            if path is None:
+                raise RuntimeError(f"Chunk {index} was evicted before assembly")
+            paths.append(path)
+        assembled = await audiobook.assemble_mp3(paths, self.output_path(job_id))
+        marks = audiobook.chapter_marks(chapters, spans, assembled.chunk_durations)
+        await run_in_threadpool(self._save_chapters, job_id, title, assembled.duration, marks)
+        return assembled
+
+    async def _store(
+        self,
+        book_id: int,
+        job_id: int,
+        voice_id: str | None,
+        format: str,
+        path: Path,
+        sha256: str,
+        duration: float | None
+    ) -> None:
+        """
+        Move a finished file into the blob store and link it to its book
+
+        The blob's audio_blobs row stays locked until the link is committed,
+        so delete_unreferenced_blob() cannot remove the blob in between.
+        """
+        size = path.stat().st_size
+        async with async_session_maker() as session:
+            await self._lock_blob(session, sha256, size)
+            await run_in_threadpool(self.blobs.put_file, path, sha256)
+            result = await session.execute(
+                select(BookAudio).where(BookAudio.book_id == book_id, BookAudio.sha256 == sha256)
+            )
+            link = result.scalar_one_or_none()
+            if link is None:
+                session.add(BookAudio(
+                    book_id=book_id,
+                    render_job_id=job_id,
+                    sha256=sha256,
+                    format=format,
+                    voice_id=voice_id,
+                    size_bytes=size,
+                    duration_seconds=duration
+                ))
+            else:
+                link.render_job_id = job_id
+            await session.commit()
+
+    async def _lock_blob(self, session: AsyncSession, sha256: str, size: int) -> None:
+        """Lock a blob's audio_blobs row for the session's transaction, creating the row if needed"""
+        while True:
+            # A write, so SQLite takes its database lock as PostgreSQL takes the row lock
+            result = await session.execute(
+                update(AudioBlob)
+                .where(AudioBlob.sha256 == sha256)
+                .values(size_bytes=size)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                return
+            try:
+                async with session.begin_nested():
+                    session.add(AudioBlob(sha256=sha256, size_bytes=size))
+                return
+            except IntegrityError:
+                # Created concurrently; lock it once that transaction commits
+                continue
+
+    async def delete_unreferenced_blob(self, sha256: str) -> bool:
+        """
+        Delete a blob unless a book still links to it
+
+        Deleting the blob's audio_blobs row locks it before the links are
+        checked. A concurrent _store() of the same audio either finishes
+        linking first, and the deletion is rolled back, or waits and stores
+        the file again.
+
+        Returns:
+            bool: Whether the blob was deleted
+        """
+        async with async_session_maker() as session:
+            result = await session.execute(
+                delete(AudioBlob)
+                .where(AudioBlob.sha256 == sha256)
+                .execution_options(synchronize_session=False)
+            )
+            if not result.rowcount:
+                # Already deleted, or being stored for the first time
+                return False
+            result = await session.execute(select(BookAudio.id).where(BookAudio.sha256 == sha256).limit(1))
+            if result.first() is not None:
+                await session.rollback()
+                return False
+            await run_in_threadpool(self.blobs.delete, sha256)
+            await session.commit()
+        return True
+
+    def _save_chapters(self, job_id: int, title: str, duration: float, marks: List[audiobook.ChapterMark]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as output:
+            json.dump({
+                "title": title,
+                "duration": duration,
+                "chapters": [mark._asdict() for mark in marks]
+            }, output)
+        os.replace(tmp_path, self.chapters_path(job_id))
+
+    def _load_chapters(self, job_id: int) -> Tuple[str | None, List[audiobook.ChapterMark]]:
+        try:
+            with self.chapters_path(job_id).open(encoding="utf-8") as source:
+                saved = json.load(source)
+        except FileNotFoundError:
+            return None, []
+        return saved["title"], [audiobook.ChapterMark(**mark) for mark in saved["chapters"]]
+
+    async def _find_export(self, job_id: int) -> str | None:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(BookAudio.sha256).where(BookAudio.render_job_id == job_id, BookAudio.format == "m4b")
+            )
+            for sha256 in result.scalars():
+                if self.blobs.exists(sha256):
+                    return sha256
+        return None
+
+    async def export_m4b(self, job: RenderJob, default_title: str) -> str:
+        """
+        Get the M4B export of a completed job, creating it on first request
+
+        The export is stored in the blob store and linked to the book.
+        Concurrent requests for the same job share one export. Jobs rendered
+        before chapter marks were saved are exported as a single chapter.
+
+        Args:
+            job: The completed render job
+            default_title: Title used when the job has no saved chapter marks
+
+        Returns:
+            str: SHA-256 of the M4B blob
+
+        Raises:
+            FFmpegNotFound: If ffmpeg is not installed
+            RuntimeError: If the job's MP3 is missing or ffmpeg fails
+        """
+        sha256 = await self._find_export(job.id)
+        if sha256 is not None:
+            return sha256
+
+        async def export() -> str:
+            found = await self._find_export(job.id)
+            if found is not None:
+                return found
+            source = self.blobs.local_path(job.output_sha256)
+            if source is None:
+                raise RuntimeError("Rendered audio is missing")
+            title, marks = await run_in_threadpool(self._load_chapters, job.id)
+            path = self.m4b_path(job.id)
+            digest = await audiobook.export_m4b(source, path, title or default_title, marks)
+            duration = marks[-1].end if marks else None
+            await self._store(job.book_id, job.id, job.voice_id, "m4b", path, digest, duration)
+            return digest
+
+        return await self._exports.run(job.id, export)
+
+# Content-addressed storage of rendered audiobooks
+blob_store = create_blob_store(settings)
+
+render_queue = RenderQueue(
+    AudioCache(settings.render_chunk_dir, settings.render_chunk_max_bytes),
+    blob_store,
+    settings.render_output_dir,
+    settings.render_workers
+)
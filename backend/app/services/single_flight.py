@@ -0,0 +1,207 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, Generic, Hashable, List, Set, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+def _consume_result(task: asyncio.Future) -> None:
+    """Retrieve a finished call's exception so it is not reported as unhandled"""
+    if not task.cancelled():
+        task.exception()
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent calls that share a key into one
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it is in flight await the same task and receive the same result
+    or exception. The task is shielded, so a caller that gives up does not
+    cancel the call for the others. Once it finishes, the next caller for
+    the key starts a new one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run call() unless a call for key is already in flight, then share its result
+
+        Args:
+            key: Identifies calls that are interchangeable
+            call: Starts the call when no identical one is in flight
+
+        Returns:
+            T: The result of the shared call
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(_consume_result)
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of calls started and of callers that joined one in flight"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight
+        }
+
+class _Broadcast:
+    """
+    Pieces of a stream being read once and replayed to any number of followers
+
+    While followers may still join, every piece is kept so they can replay
+    the stream from the start. Once joining is closed, pieces that every
+    follower has read are dropped, so memory is bounded by the slowest
+    follower instead of the stream length.
+    """
+
+    def __init__(self, max_replay_bytes: int | None = None):
+        self.pieces: List[bytes] = []
+        self.offset = 0  # Position in the stream of pieces[0]
+        self.size = 0  # Bytes held in pieces
+        self.max_replay_bytes = max_replay_bytes
+        self.joinable = True
+        self.done = False
+        self.error: BaseException | None = None
+        self._changed = asyncio.Event()
+        # Next position of each follower
+        self._positions: Dict[object, int] = {}
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def close_joining(self) -> None:
+        """Stop keeping pieces for followers that have not joined yet"""
+        self.joinable = False
+        self._trim()
+
+    def _trim(self) -> None:
+        if self.joinable:
+            return
+        end = self.offset + len(self.pieces)
+        read = min(self._positions.values(), default=end) - self.offset
+        if read > 0:
+            self.size -= sum(len(piece) for piece in self.pieces[:read])
+            del self.pieces[:read]
+            self.offset += read
+
+    async def pump(self, source: AsyncIterator[bytes]) -> None:
+        try:
+            async for piece in source:
+                self.pieces.append(piece)
+                self.size += len(piece)
+                if self.max_replay_bytes is not None and self.size > self.max_replay_bytes:
+                    self.close_joining()
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.done = True
+            self._notify()
+
+    def join(self) -> AsyncIterator[bytes]:
+        """Follow the stream from the start"""
+        follower = object()
+        # Registered before the first read, so no piece is trimmed before this follower gets it
+        self._positions[follower] = 0
+        return self._follow(follower)
+
+    async def _follow(self, follower: object) -> AsyncIterator[bytes]:
+        position = 0
+        try:
+            while True:
+                while position < self.offset + len(self.pieces):
+                    piece = self.pieces[position - self.offset]
+                    position += 1
+                    self._positions[follower] = position
+                    self._trim()
+                    yield piece
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            del self._positions[follower]
+            self._trim()
+
+class StreamFlight:
+    """
+    Coalesce concurrent identical streams into one upstream read
+
+    The first caller for a key starts reading the source in a background
+    task; every caller, including those joining mid-stream, gets all pieces
+    from the start as they arrive. The source is read to the end even if
+    every caller disconnects, so its side effects (such as filling a cache)
+    complete.
+
+    A stream stops taking new followers once more than max_replay_bytes of
+    it have been read, so the pieces its followers have already passed can
+    be dropped; a caller arriving after that starts a new upstream read.
+    """
+
+    def __init__(self, max_replay_bytes: int | None = None):
+        self.max_replay_bytes = max_replay_bytes
+        # Streams still taking new followers, by key
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        # Every upstream read in progress, including those closed to new followers
+        self._tasks: Set[asyncio.Task] = set()
+        self.calls = 0
+        self.coalesced = 0
+
+    def _forget(self, key: Hashable, broadcast: _Broadcast, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+        broadcast.close_joining()
+
+    def stream(self, key: Hashable, open_source: Callable[[], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """
+        Follow the in-flight stream for key, starting it with open_source() if there is none
+
+        Args:
+            key: Identifies streams with identical content
+            open_source: Opens the source stream when no identical one is in flight
+
+        Returns:
+            AsyncIterator[bytes]: Every piece of the stream from the start
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None or not broadcast.joinable:
+            broadcast = _Broadcast(self.max_replay_bytes)
+            task = asyncio.ensure_future(broadcast.pump(open_source()))
+            self._streams[key] = broadcast
+            self._tasks.add(task)
+            task.add_done_callback(lambda done: self._forget(key, broadcast, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return broadcast.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of streams started and of callers that joined one in flight"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._tasks)
+        }
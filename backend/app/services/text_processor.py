@@ -1,31 +1,342 @@
 from fastapi import UploadFile
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+from lxml import etree
+from typing import BinaryIO, Deque, Iterator, List, NamedTuple, Tuple
+from urllib.parse import unquote
+import codecs
 import io
+import lxml.html
+import multiprocessing
+import os
+import posixpath
+import threading
+import zipfile
+from app.config import get_settings
+from app.metrics import stage
 
-async def extract_text(file: UploadFile) -> str:
+settings = get_settings()
+
+# Read size when decoding plain text uploads
+READ_SIZE = 64 * 1024
+
+CONTAINER_PATH = "META-INF/container.xml"
+HTML_MEDIA_TYPES = ("application/xhtml+xml", "text/html")
+
+# Elements that start a new paragraph in the extracted text
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "caption", "dd", "div", "dl",
+    "dt", "figcaption", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "td", "th", "tr", "ul"
+})
+
+# Elements whose content is never read aloud
+SKIP_TAGS = frozenset({"head", "script", "style", "noscript", "svg", "math", "template"})
+
+class ChapterText(NamedTuple):
+    """A single spine document extracted from an EPUB"""
+    title: str | None
+    text: str
+
+class ChapterSpan(NamedTuple):
+    """Position of a chapter within the extracted book text"""
+    title: str | None
+    start_offset: int
+    end_offset: int
+
+def _parse_xml(data: bytes) -> etree._Element:
     """
-    Extract text content from uploaded file (txt or epub)
+    Parse an EPUB's XML metadata without expanding entities or fetching external resources
+
+    Uploads are untrusted, so a DOCTYPE cannot pull in local files or URLs
+    or blow up through nested entities.
+    """
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, load_dtd=False, huge_tree=False)
+    return etree.fromstring(data, parser=parser)
+
+def _read_spine(archive: zipfile.ZipFile) -> List[str]:
+    """
+    Resolve the archive paths of the EPUB's spine documents in reading order
+
+    Only container.xml and the OPF package document are parsed here; chapter
+    documents are read later one at a time.
+    """
+    container = _parse_xml(archive.read(CONTAINER_PATH))
+    rootfile = container.find(".//{*}rootfile")
+    if rootfile is None or not rootfile.get("full-path"):
+        raise ValueError("Invalid EPUB: missing package document")
+    opf_path = rootfile.get("full-path")
+    opf_dir = posixpath.dirname(opf_path)
+
+    package = _parse_xml(archive.read(opf_path))
+    manifest = {}
+    for item in package.iterfind(".//{*}manifest/{*}item"):
+        if item.get("media-type") in HTML_MEDIA_TYPES:
+            href = unquote(item.get("href", "").split("#")[0])
+            manifest[item.get("id")] = posixpath.normpath(posixpath.join(opf_dir, href))
+
+    return [
+        manifest[itemref.get("idref")]
+        for itemref in package.iterfind(".//{*}spine/{*}itemref")
+        if itemref.get("idref") in manifest
+    ]
+
+def _html_encoding(html: bytes) -> str:
+    """EPUB content documents must be UTF-8 or UTF-16; only UTF-16 carries a BOM"""
+    if html.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    return "utf-8"
+
+def _block_text(root: etree._Element) -> str:
+    """
+    Get the text of a document with one paragraph per block element
+
+    Whitespace inside a block is collapsed, <br> becomes a line break and
+    consecutive blocks are separated by a blank line, so paragraph
+    boundaries survive for the chunker.
+    """
+    blocks: List[str] = []
+    lines: List[str] = []
+    pieces: List[str] = []
+
+    def end_line() -> None:
+        line = " ".join("".join(pieces).split())
+        if line:
+            lines.append(line)
+        pieces.clear()
+
+    def flush() -> None:
+        end_line()
+        if lines:
+            blocks.append("\n".join(lines))
+        lines.clear()
+
+    walker = etree.iterwalk(root, events=("start", "end"))
+    for event, element in walker:
+        tag = element.tag
+        if event == "start":
+            if tag in SKIP_TAGS:
+                walker.skip_subtree()
+                continue
+            if tag in BLOCK_TAGS:
+                flush()
+            elif tag == "br":
+                end_line()
+            if element.text:
+                pieces.append(element.text)
+        else:
+            if tag in BLOCK_TAGS:
+                flush()
+            if element.tail and element is not root:
+                pieces.append(element.tail)
+    flush()
+    return "\n\n".join(blocks)
+
+def _parse_chapter(html: bytes) -> ChapterText:
+    """
+    Extract the title and text of a single XHTML document
+
+    Uses libxml2's HTML parser through lxml, which is far faster than the
+    pure-Python parsers and tolerates the malformed markup found in the
+    wild. Runs in worker processes, so it must stay a module-level function.
+    """
+    parser = lxml.html.HTMLParser(
+        encoding=_html_encoding(html),
+        remove_comments=True,
+        remove_pis=True
+    )
+    try:
+        root = lxml.html.document_fromstring(html, parser=parser)
+    except etree.ParserError:
+        # Documents without any markup content
+        return ChapterText(title=None, text="")
+    headings = root.xpath("(//h1|//h2|//h3)[1]") or root.xpath("//title")
+    title = " ".join(headings[0].text_content().split()) if headings else None
+    body = root.find("body")
+    return ChapterText(title=title or None, text=_block_text(body if body is not None else root))
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the shared chapter parsing pool on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers do not inherit the server's threads and locks
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.epub_parse_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def shutdown() -> None:
+    """Stop the chapter parsing pool (used on application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def _use_pool(archive: zipfile.ZipFile, paths: List[str]) -> bool:
+    """Parallel parsing only pays off on multi-core hosts once the documents outweigh the IPC overhead"""
+    if settings.epub_parse_workers <= 0 or (os.cpu_count() or 1) < 2 or len(paths) < 2:
+        return False
+    size = 0
+    for path in paths:
+        try:
+            size += archive.getinfo(path).file_size
+        except KeyError:
+            continue
+    return size >= settings.epub_parallel_min_bytes
+
+def _iter_documents(archive: zipfile.ZipFile, paths: List[str]) -> Iterator[bytes]:
+    for path in paths:
+        try:
+            yield archive.read(path)
+        except KeyError:
+            continue
+
+def iter_epub_chapters(epub_file: BinaryIO, parallel: bool = False) -> Iterator[ChapterText]:
+    """
+    Lazily extract chapters from an EPUB in spine order
+
+    The archive is opened in place, so only the zip directory, the package
+    document and the chapters currently being parsed are held in memory.
+    When parallel is set and the book is large enough, documents are parsed
+    in the shared process pool with at most two per worker in flight, and
+    are still yielded in spine order.
+
+    Args:
+        epub_file: A seekable binary file containing the EPUB
+        parallel: Whether to parse chapters in the process pool
+
+    Yields:
+        ChapterText: The title and text of each spine document
+    """
+    with zipfile.ZipFile(epub_file) as archive:
+        paths = _read_spine(archive)
+        if not parallel or not _use_pool(archive, paths):
+            for html in _iter_documents(archive, paths):
+                yield _parse_chapter(html)
+            return
+
+        executor = _get_executor()
+        window = 2 * settings.epub_parse_workers
+        pending: Deque[Future] = deque()
+        try:
+            for html in _iter_documents(archive, paths):
+                pending.append(executor.submit(_parse_chapter, html))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+def iter_text(text_file: BinaryIO) -> Iterator[str]:
+    """
+    Incrementally decode a UTF-8 text file
+
+    Args:
+        text_file: A binary file containing UTF-8 text
+
+    Yields:
+        str: Consecutive decoded pieces of the text
     """
-    content = await file.read()
-    
-    if file.filename.endswith('.txt'):
-        return content.decode('utf-8')
-    
-    elif file.filename.endswith('.epub'):
-        # Create a BytesIO object from the content
-        epub_file = io.BytesIO(content)
-        book = epub.read_epub(epub_file)
-        
-        # Extract text from all chapters
-        text_content = []
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                soup = BeautifulSoup(item.get_content(), 'html.parser')
-                text_content.append(soup.get_text())
-        
-        return '\n'.join(text_content)
-    
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        data = text_file.read(READ_SIZE)
+        if not data:
+            break
+        yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+def _take_chars(pieces: Iterator[str], max_chars: int) -> Iterator[str]:
+    """Stop consuming pieces once max_chars characters have been produced"""
+    total = 0
+    for piece in pieces:
+        yield piece
+        total += len(piece)
+        if total >= max_chars:
+            break
+
+def _extract(
+    source: BinaryIO,
+    filename: str,
+    max_chars: int | None
+) -> Tuple[str, List[ChapterSpan]]:
+    """Extract text and chapter offsets from a spooled upload, stopping once max_chars is reached"""
+    source.seek(0)
+    if filename.endswith('.txt'):
+        pieces = iter_text(source)
+        if max_chars is not None:
+            pieces = _take_chars(pieces, max_chars)
+        chapters = iter([ChapterText(title=None, text=''.join(pieces))])
+    elif filename.endswith('.epub'):
+        chapters = iter_epub_chapters(source, parallel=True)
     else:
-        raise ValueError("Unsupported file format. Please upload a .txt or .epub file") 
\ No newline at end of file
+        raise ValueError("Unsupported file format. Please upload a .txt or .epub file")
+
+    output = io.StringIO()
+    spans = []
+    for chapter in chapters:
+        if spans:
+            output.write('\n')
+        start = output.tell()
+        output.write(chapter.text)
+        spans.append(ChapterSpan(chapter.title, start, output.tell()))
+        if max_chars is not None and output.tell() >= max_chars:
+            break
+    text = output.getvalue()
+    if max_chars is not None and len(text) > max_chars:
+        text = text[:max_chars]
+        spans = [
+            ChapterSpan(span.title, span.start_offset, min(span.end_offset, max_chars))
+            for span in spans
+            if span.start_offset < max_chars
+        ]
+    return text, spans
+
+async def extract_text(file: UploadFile, max_chars: int | None = None) -> str:
+    """
+    Extract text content from uploaded file (txt or epub)
+
+    The upload is read from its spooled temporary file rather than loaded
+    into memory, and parsing runs in a worker thread.
+
+    Args:
+        file: The uploaded .txt or .epub file
+        max_chars: Optional limit after which extraction stops early
+
+    Returns:
+        str: The extracted text
+
+    Raises:
+        ValueError: If the file format is unsupported
+    """
+    with stage("extract"):
+        text, _ = await run_in_threadpool(_extract, file.file, file.filename, max_chars)
+    return text
+
+async def extract_book(file: UploadFile) -> Tuple[str, List[ChapterSpan]]:
+    """
+    Extract text content and chapter structure from uploaded file (txt or epub)
+
+    EPUB chapters follow the spine order; a text file is a single chapter.
+
+    Args:
+        file: The uploaded .txt or .epub file
+
+    Returns:
+        Tuple[str, List[ChapterSpan]]: The extracted text and the title and
+        character offsets of each chapter within it
+
+    Raises:
+        ValueError: If the file format is unsupported
+    """
+    with stage("extract"):
+        return await run_in_threadpool(_extract, file.file, file.filename, None)
@@ -0,0 +1,182 @@
+from contextlib import asynccontextmanager
+from collections import Counter
+from typing import AsyncIterator, Dict, List
+import asyncio
+import itertools
+import math
+import time
+
+# Priority classes, most urgent first
+PREVIEW = 0
+SAMPLE = 1
+BULK = 2
+PRIORITY_NAMES = {PREVIEW: "preview", SAMPLE: "sample", BULK: "bulk"}
+
+class DeadlineExceeded(Exception):
+    """No upstream slot became free before the request's deadline"""
+
+class _Waiter:
+    __slots__ = ("owner", "priority", "deadline", "sequence", "enqueued_at", "future")
+
+    def __init__(self, owner: str, priority: int, deadline: float, sequence: int):
+        self.owner = owner
+        self.priority = priority
+        self.deadline = deadline
+        self.sequence = sequence
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class TTSScheduler:
+    """
+    Fair-share admission control for upstream TTS calls
+
+    At most max_concurrency calls run at once, and at most owner_concurrency
+    of them for any one owner (a user, or all anonymous callers together).
+    Bulk renders may not take the last reserved_interactive slots, so
+    previews and samples never queue behind a large render. When a slot
+    frees up it goes to the most urgent priority class, then to the owner
+    with the fewest calls running (the least recently served on ties), then
+    to the earliest deadline. Callers that are still queued at their
+    deadline give up with DeadlineExceeded instead of reaching the provider
+    too late to be useful.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        owner_concurrency: int,
+        reserved_interactive: int = 0,
+        deadlines: Dict[int, float | None] | None = None
+    ):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.owner_concurrency = max(owner_concurrency, 1)
+        self.reserved_interactive = min(max(reserved_interactive, 0), self.max_concurrency - 1)
+        self.deadlines = deadlines or {}
+        self._waiting: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._running_by_owner: Counter = Counter()
+        self._running_by_priority: Counter = Counter()
+        self._grants = itertools.count()
+        self._last_served: Dict[str, int] = {}
+        self.granted: Counter = Counter()
+        self.deadline_misses: Counter = Counter()
+        self.wait_seconds: Counter = Counter()
+        self.max_wait_seconds: Dict[int, float] = {}
+        self.peak_waiting = 0
+
+    def _limit(self, priority: int) -> int:
+        if priority >= BULK:
+            return self.max_concurrency - self.reserved_interactive
+        return self.max_concurrency
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the most deserving eligible waiters"""
+        while self._waiting:
+            eligible = [
+                waiter
+                for waiter in self._waiting
+                if self._running < self._limit(waiter.priority)
+                and self._running_by_owner[waiter.owner] < self.owner_concurrency
+            ]
+            if not eligible:
+                return
+            waiter = min(
+                eligible,
+                key=lambda waiter: (
+                    waiter.priority,
+                    self._running_by_owner[waiter.owner],
+                    self._last_served.get(waiter.owner, -1),
+                    waiter.deadline,
+                    waiter.sequence
+                )
+            )
+            self._waiting.remove(waiter)
+            self._start(waiter.owner, waiter.priority, time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    def _start(self, owner: str, priority: int, waited: float) -> None:
+        self._running += 1
+        self._running_by_owner[owner] += 1
+        self._last_served[owner] = next(self._grants)
+        self._running_by_priority[priority] += 1
+        self.granted[priority] += 1
+        self.wait_seconds[priority] += waited
+        self.max_wait_seconds[priority] = max(self.max_wait_seconds.get(priority, 0.0), waited)
+
+    def _release(self, owner: str, priority: int) -> None:
+        self._running -= 1
+        self._running_by_owner[owner] -= 1
+        if not self._running_by_owner[owner]:
+            del self._running_by_owner[owner]
+            del self._last_served[owner]
+        self._running_by_priority[priority] -= 1
+        self._dispatch()
+
+    async def _acquire(self, owner: str, priority: int) -> None:
+        timeout = self.deadlines.get(priority)
+        deadline = time.monotonic() + timeout if timeout is not None else math.inf
+        waiter = _Waiter(owner, priority, deadline, next(self._sequence))
+        self._waiting.append(waiter)
+        self.peak_waiting = max(self.peak_waiting, len(self._waiting))
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._waiting.remove(waiter)
+                self.deadline_misses[priority] += 1
+                raise DeadlineExceeded(
+                    f"No TTS capacity for a {PRIORITY_NAMES[priority]} request within {timeout:g}s"
+                )
+        except BaseException:
+            if waiter.future.done():
+                self._release(owner, priority)
+            else:
+                self._waiting.remove(waiter)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, owner: str | None, priority: int = SAMPLE) -> AsyncIterator[None]:
+        """
+        Hold one upstream slot for the duration of the block
+
+        Args:
+            owner: Who the call is made for, such as "user:42"; None for anonymous callers
+            priority: PREVIEW, SAMPLE or BULK
+
+        Raises:
+            DeadlineExceeded: If the priority class has a deadline and no slot
+            became free before it passed
+        """
+        owner = owner or "anonymous"
+        await self._acquire(owner, priority)
+        try:
+            yield
+        finally:
+            self._release(owner, priority)
+
+    def stats(self) -> Dict[str, object]:
+        """Get queue depths, running calls and wait times per priority class"""
+        waiting = Counter(waiter.priority for waiter in self._waiting)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "owner_concurrency": self.owner_concurrency,
+            "reserved_interactive": self.reserved_interactive,
+            "running": self._running,
+            "waiting": len(self._waiting),
+            "peak_waiting": self.peak_waiting,
+            "active_owners": len(self._running_by_owner),
+            "classes": {
+                name: {
+                    "running": self._running_by_priority[priority],
+                    "waiting": waiting[priority],
+                    "granted": self.granted[priority],
+                    "deadline_misses": self.deadline_misses[priority],
+                    "avg_wait_ms": round(1000 * self.wait_seconds[priority] / self.granted[priority], 3)
+                    if self.granted[priority] else 0.0,
+                    "max_wait_ms": round(1000 * self.max_wait_seconds.get(priority, 0.0), 3)
+                }
+                for priority, name in PRIORITY_NAMES.items()
+            }
+        }
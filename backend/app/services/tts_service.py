@@ -1,39 +1,427 @@
-from elevenlabs import generate, voices, set_api_key
-from typing import List
+from typing import AsyncIterator, BinaryIO, Iterator, List, Tuple
+from collections import deque
+from contextlib import contextmanager
+import asyncio
+import itertools
+import time
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 from app.config import get_settings
+from app.metrics import Counter, Gauge, record_stage, stage
 from app.models import Voice
+from app.services import chunker, mp3
+from app.services.audio_cache import AudioCache, make_key
+from app.services.boundaries import BoundaryIndex
+from app.services.providers import create_provider
+from app.services.single_flight import SingleFlight, StreamFlight
+from app.services.tts_scheduler import BULK, PREVIEW, SAMPLE, DeadlineExceeded, TTSScheduler
+from app.services.voice_catalog import VoiceCatalog
 
 settings = get_settings()
 
-# Set API key
-set_api_key(settings.elevenlabs_api_key)
+# Configured TTS provider (ElevenLabs with a pooled keep-alive connection, or the offline simulator)
+provider = create_provider(settings)
 
-async def generate_audio(text: str, voice_id: str | None = None) -> bytes:
+# Fair-share admission control in front of every upstream call
+scheduler = TTSScheduler(
+    max_concurrency=settings.tts_global_concurrency,
+    owner_concurrency=settings.tts_user_concurrency,
+    reserved_interactive=settings.tts_interactive_reserved_slots,
+    deadlines={
+        PREVIEW: settings.tts_preview_deadline_seconds,
+        SAMPLE: settings.tts_sample_deadline_seconds,
+        BULK: None
+    }
+)
+
+# Content-addressed cache of previously generated audio
+audio_cache = AudioCache(settings.audio_cache_dir, settings.audio_cache_max_bytes)
+
+# Read size when streaming cached audio from disk
+STREAM_READ_SIZE = 64 * 1024
+
+# Audio kept for streaming requests that join late; later ones make their own upstream call
+STREAM_REPLAY_MAX_BYTES = 8 * 1024 * 1024
+
+# Concurrent requests for the same (text, voice, model) share one upstream call
+synthesis_flights: SingleFlight[bytes] = SingleFlight()
+stream_flights = StreamFlight(STREAM_REPLAY_MAX_BYTES)
+
+# Upstream usage, by mode ("buffered" or "stream")
+UPSTREAM_REQUESTS = Counter(
+    "audiobook_tts_upstream_requests_total",
+    "Calls made to the TTS provider by outcome (ok, error or cancelled)",
+    ["mode", "outcome"]
+)
+UPSTREAM_CHARACTERS = Counter(
+    "audiobook_tts_upstream_characters_total",
+    "Characters sent to the TTS provider",
+    ["mode"]
+)
+UPSTREAM_BYTES = Counter(
+    "audiobook_tts_upstream_bytes_total",
+    "Audio bytes received from the TTS provider",
+    ["mode"]
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "audiobook_tts_upstream_in_flight",
+    "Calls to the TTS provider currently in progress",
+    ["mode"]
+)
+
+@contextmanager
+def _upstream_call(mode: str, text: str) -> Iterator[None]:
+    """Count a provider call, the characters it sends and how it ended"""
+    UPSTREAM_CHARACTERS.inc(len(text), mode=mode)
+    UPSTREAM_IN_FLIGHT.inc(mode=mode)
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(mode=mode)
+        UPSTREAM_REQUESTS.inc(mode=mode, outcome=outcome)
+
+async def _fetch_voices() -> List[Voice]:
+    """Fetch the voice list from the TTS provider"""
+    available_voices = await provider.list_voices()
+    return [
+        Voice(
+            voice_id=voice["voice_id"],
+            name=voice["name"],
+            description=voice.get("description")
+        )
+        for voice in available_voices
+    ]
+
+# Cached voice catalog, refreshed in the background once older than the TTL
+voice_catalog = VoiceCatalog(_fetch_voices, settings.voice_catalog_ttl_seconds)
+
+async def resolve_voice_id(voice_id: str | None) -> str:
+    """Resolve a voice name (such as the default voice) to its voice ID"""
+    voice = voice_id if voice_id else settings.default_voice
+    if provider.is_voice_id(voice):
+        return voice
+    if not voice_catalog.is_loaded:
+        await voice_catalog.get()
+    found = voice_catalog.lookup(voice)
+    if found is None:
+        raise ValueError(f"Voice '{voice}' not found.")
+    return found.voice_id
+
+def validate_voice_id(voice_id: str | None) -> None:
     """
-    Generate audio from text using ElevenLabs API
+    Reject voices that are missing from the cached catalog
+
+    Validation is skipped until the catalog has been loaded so that it
+    never waits on the upstream.
+
+    Args:
+        voice_id: Optional voice ID or name requested by the client
+
+    Raises:
+        HTTPException: If the voice is not in the catalog
+    """
+    if voice_id and voice_catalog.is_loaded and voice_catalog.lookup(voice_id) is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown voice_id '{voice_id}'"
+        )
+
+async def synthesize(
+    text: str,
+    voice: str,
+    owner: str | None = None,
+    priority: int = SAMPLE
+) -> bytes:
+    """
+    Run a single provider generation without length limits or caching
+
+    Args:
+        text: The text to convert to speech
+        voice: The voice ID or name to use
+        owner: Who the call is made for, e.g. "user:42", for fair sharing of upstream slots
+        priority: Scheduler priority class (PREVIEW, SAMPLE or BULK)
+
+    Returns:
+        bytes: The generated audio data
+
+    Raises:
+        DeadlineExceeded: If no upstream slot became free in time
+    """
+    voice_id = await resolve_voice_id(voice)
+    queued = time.perf_counter()
+    async with scheduler.slot(owner, priority):
+        record_stage("tts_queue", time.perf_counter() - queued)
+        with _upstream_call("buffered", text), stage("tts_upstream"):
+            audio = await provider.text_to_speech(text, voice_id, settings.tts_model_id)
+    UPSTREAM_BYTES.inc(len(audio), mode="buffered")
+    return audio
+
+async def _synthesize_and_cache(text: str, voice: str, key: str, owner: str | None, priority: int) -> bytes:
+    # A call that finished just before this one started has already filled the cache
+    audio = await run_in_threadpool(audio_cache.get, key)
+    if audio is None:
+        audio = await synthesize(text, voice, owner, priority)
+        await run_in_threadpool(audio_cache.put, key, audio)
+    return audio
+
+async def _cached_synthesize(text: str, voice: str, owner: str | None, priority: int) -> bytes:
+    """Serve audio from the on-disk cache, synthesizing and storing it on a miss"""
+    key = make_key(text, voice, settings.tts_model_id)
+    audio = await run_in_threadpool(audio_cache.get, key)
+    if audio is None:
+        audio = await synthesis_flights.run(
+            key,
+            lambda: _synthesize_and_cache(text, voice, key, owner, priority)
+        )
+    return audio
+
+async def _iter_file(audio_file: BinaryIO) -> AsyncIterator[bytes]:
+    """Stream an open cache file without blocking the event loop"""
+    try:
+        while True:
+            data = await run_in_threadpool(audio_file.read, STREAM_READ_SIZE)
+            if not data:
+                break
+            yield data
+    finally:
+        audio_file.close()
+
+async def _stream_and_cache(
+    text: str,
+    voice: str,
+    key: str,
+    owner: str | None,
+    priority: int
+) -> AsyncIterator[bytes]:
+    """Forward upstream audio chunks while writing them to the cache"""
+    voice_id = await resolve_voice_id(voice)
+    writer = await run_in_threadpool(audio_cache.writer, key)
+    try:
+        # The slot is held until the upstream stream is exhausted
+        queued = time.perf_counter()
+        async with scheduler.slot(owner, priority):
+            started = time.perf_counter()
+            record_stage("tts_queue", started - queued)
+            with _upstream_call("stream", text):
+                received = 0
+                async for chunk in provider.stream_text_to_speech(text, voice_id, settings.tts_model_id):
+                    if not received:
+                        record_stage("tts_first_byte", time.perf_counter() - started)
+                    received += len(chunk)
+                    UPSTREAM_BYTES.inc(len(chunk), mode="stream")
+                    writer.write(chunk)
+                    yield chunk
+            record_stage("tts_stream", time.perf_counter() - started)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+
+async def _render_in_order(
+    chunks: List[str],
+    voice: str,
+    window: int,
+    owner: str | None,
+    priority: int
+) -> AsyncIterator[bytes]:
+    """
+    Synthesize chunks with a sliding window of parallel calls, yielding in order
+
+    Each chunk's tags and Xing/Info frame are stripped, so the chunks join
+    into one MP3 stream instead of a series of files.
+    """
+    remaining = iter(chunks)
+    pending = deque(
+        asyncio.ensure_future(_cached_synthesize(chunk, voice, owner, priority))
+        for chunk in itertools.islice(remaining, window)
+    )
+    try:
+        while pending:
+            audio = await pending.popleft()
+            chunk = next(remaining, None)
+            if chunk is not None:
+                pending.append(asyncio.ensure_future(_cached_synthesize(chunk, voice, owner, priority)))
+            yield await run_in_threadpool(mp3.strip_metadata, audio)
+    finally:
+        for task in pending:
+            task.cancel()
+
+def _capacity_error(error: DeadlineExceeded) -> HTTPException:
+    """Tell the client to retry shortly when upstream slots are exhausted"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Text-to-speech is busy: {error}",
+        headers={"Retry-After": "1"}
+    )
+
+async def _primed(audio: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Wait for the first chunk so errors are raised before streaming starts"""
+    try:
+        first = await audio.__anext__()
+    except StopAsyncIteration:
+        raise ValueError("No audio was returned")
+
+    async def chain() -> AsyncIterator[bytes]:
+        yield first
+        async for chunk in audio:
+            yield chunk
+
+    return chain()
+
+async def generate_audio(
+    text: str,
+    voice_id: str | None = None,
+    owner: str | None = None,
+    priority: int = SAMPLE
+) -> bytes:
+    """
+    Generate audio from text using the TTS provider
     
     Args:
         text: The text to convert to speech
         voice_id: Optional voice ID to use (defaults to settings.default_voice)
+        owner: Who the audio is generated for, e.g. "user:42" (None for anonymous callers)
+        priority: Scheduler priority class (PREVIEW, SAMPLE or BULK)
     
     Returns:
         bytes: The generated audio data
         
     Raises:
-        HTTPException: If there's an error generating the audio
+        HTTPException: If the voice is unknown, upstream capacity is exhausted
+        or there's an error generating the audio
     """
+    validate_voice_id(voice_id)
     try:
         # Ensure text is within limits
         if len(text) > settings.max_text_length:
             text = text[:settings.max_text_length]
         
-        audio = generate(
-            text=text,
-            voice=voice_id if voice_id else settings.default_voice,
-            model="eleven_monolingual_v1"
+        return await _cached_synthesize(
+            text,
+            voice_id if voice_id else settings.default_voice,
+            owner,
+            priority
+        )
+    except DeadlineExceeded as e:
+        raise _capacity_error(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating audio: {str(e)}"
+        )
+
+async def stream_audio(
+    text: str,
+    voice_id: str | None = None,
+    owner: str | None = None,
+    priority: int = SAMPLE
+) -> AsyncIterator[bytes]:
+    """
+    Stream audio for text as it is generated by the TTS provider
+
+    Cached audio is streamed from disk; otherwise the provider's chunked
+    output is forwarded as it arrives and written to the cache on the side.
+    Concurrent identical requests share one upstream stream.
+    The first chunk is awaited before returning so that upstream errors
+    surface before the HTTP response has started.
+
+    Args:
+        text: The text to convert to speech
+        voice_id: Optional voice ID to use (defaults to settings.default_voice)
+        owner: Who the audio is generated for, e.g. "user:42" (None for anonymous callers)
+        priority: Scheduler priority class (PREVIEW, SAMPLE or BULK)
+
+    Returns:
+        AsyncIterator[bytes]: Consecutive pieces of the MP3 audio
+
+    Raises:
+        HTTPException: If the voice is unknown, upstream capacity is exhausted
+        or there's an error generating the audio
+    """
+    validate_voice_id(voice_id)
+    try:
+        # Ensure text is within limits
+        if len(text) > settings.max_text_length:
+            text = text[:settings.max_text_length]
+
+        voice = voice_id if voice_id else settings.default_voice
+        key = make_key(text, voice, settings.tts_model_id)
+        audio_file = await run_in_threadpool(audio_cache.open, key)
+        if audio_file is not None:
+            return _iter_file(audio_file)
+        return await _primed(stream_flights.stream(
+            key,
+            lambda: _stream_and_cache(text, voice, key, owner, priority)
+        ))
+    except DeadlineExceeded as e:
+        raise _capacity_error(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating audio: {str(e)}"
         )
-        return audio
+
+async def stream_book_audio(
+    text: str,
+    voice_id: str | None = None,
+    max_concurrency: int | None = None,
+    index: BoundaryIndex | None = None,
+    spans: List[Tuple[int, int]] | None = None,
+    owner: str | None = None,
+    priority: int = BULK
+) -> AsyncIterator[bytes]:
+    """
+    Stream audio for a whole book, synthesizing chunks in parallel
+
+    The text is split at paragraph and sentence boundaries into chunks of at
+    most settings.tts_chunk_max_chars. At most max_concurrency chunks are in
+    flight at a time and each one is yielded in reading order as soon as it
+    and all chunks before it are done, so memory stays bounded by the window.
+    Chunks are joined at the MP3 frame level, without their tags or
+    Xing/Info frames. The stream has no header with the total duration, so
+    use a render job (see services/render_queue.py) for a file players can
+    seek accurately.
+
+    Args:
+        text: The full text to convert to speech
+        voice_id: Optional voice ID to use (defaults to settings.default_voice)
+        max_concurrency: Optional parallelism cap (defaults to settings.tts_max_concurrency)
+        index: Optional stored boundary index of text, used to chunk without rescanning it
+        spans: Optional stored chunk plan of text, used instead of chunking it
+        owner: Who the audio is generated for, e.g. "user:42" (None for anonymous callers)
+        priority: Scheduler priority class (defaults to BULK)
+
+    Returns:
+        AsyncIterator[bytes]: The audio frames of each chunk in order
+
+    Raises:
+        HTTPException: If the voice is unknown, the text is empty, upstream
+        capacity is exhausted or the first chunk fails to generate
+    """
+    validate_voice_id(voice_id)
+    if spans is not None:
+        chunks = chunker.chunks_from_spans(text, spans)
+    else:
+        chunks = chunker.split_into_chunks(text, settings.tts_chunk_max_chars, index)
+    if not chunks:
+        raise HTTPException(status_code=400, detail="Text is empty")
+
+    try:
+        voice = await resolve_voice_id(voice_id)
+        return await _primed(_render_in_order(
+            chunks,
+            voice,
+            max_concurrency or settings.tts_max_concurrency,
+            owner,
+            priority
+        ))
+    except DeadlineExceeded as e:
+        raise _capacity_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -42,7 +430,7 @@ async def generate_audio(text: str, voice_id: str | None = None) -> bytes:
 
 async def get_available_voices() -> List[Voice]:
     """
-    Get list of available voices from ElevenLabs
+    Get list of available voices from the cached provider catalog
     
     Returns:
         List[Voice]: List of available voices
@@ -51,17 +439,17 @@ async def get_available_voices() -> List[Voice]:
         HTTPException: If there's an error fetching voices
     """
     try:
-        available_voices = voices()
-        return [
-            Voice(
-                voice_id=voice.voice_id,
-                name=voice.name,
-                description=voice.description
-            )
-            for voice in available_voices
-        ]
+        return await voice_catalog.get()
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching voices: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+def startup() -> None:
+    """Warm the voice catalog in the background"""
+    voice_catalog.warm()
+
+async def close() -> None:
+    """Close the TTS provider's connections"""
+    await provider.aclose()
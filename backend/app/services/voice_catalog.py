@@ -0,0 +1,148 @@
+from typing import Awaitable, Callable, Dict, List, Set
+import asyncio
+import logging
+import time
+from app.models import Voice
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class VoiceCatalog:
+    """
+    In-process voice catalog cache with stale-while-revalidate refreshes
+
+    Once loaded, the catalog is always answered from memory. When the cached
+    copy is older than ttl_seconds a single background refresh is started
+    and callers keep getting the stale copy until it completes, so a slow
+    or failing upstream never delays a request. Only the very first load
+    (when warm() has not finished yet) waits for the upstream.
+
+    Listeners registered with add_listener() are called in the background
+    with the new voice list whenever a refresh changes the set of voices.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[List[Voice]]], ttl_seconds: float):
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.refreshes = 0
+        self.failures = 0
+        self._voices: List[Voice] | None = None
+        self._by_id: Dict[str, Voice] = {}
+        self._by_name: Dict[str, Voice] = {}
+        self._fetched_at = 0.0
+        self._flight: SingleFlight[List[Voice]] = SingleFlight()
+        self._refresh_task: asyncio.Task | None = None
+        self._listeners: List[Callable[[List[Voice]], Awaitable[None]]] = []
+        self._listener_tasks: Set[asyncio.Task] = set()
+
+    def add_listener(self, listener: Callable[[List[Voice]], Awaitable[None]]) -> None:
+        """Register a coroutine function to call when the set of voices changes"""
+        self._listeners.append(listener)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._voices is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._fetched_at > self.ttl_seconds
+
+    async def refresh(self) -> List[Voice]:
+        """
+        Fetch the catalog from the upstream and replace the cached copy
+
+        Concurrent callers share a single upstream request, including its
+        failure, so an outage costs one upstream call rather than one per
+        waiting caller.
+
+        Returns:
+            List[Voice]: The freshly fetched voices
+        """
+        return await self._flight.run("refresh", self._refresh)
+
+    async def _refresh(self) -> List[Voice]:
+        try:
+            voices = await self.fetch()
+        except Exception:
+            self.failures += 1
+            raise
+        changed = self._voices is None or set(self._by_id) != {voice.voice_id for voice in voices}
+        self._voices = voices
+        self._by_id = {voice.voice_id: voice for voice in voices}
+        self._by_name = {voice.name: voice for voice in voices}
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        if changed:
+            self._notify(voices)
+        return voices
+
+    def _notify(self, voices: List[Voice]) -> None:
+        """Run change listeners in the background"""
+        for listener in self._listeners:
+            task = asyncio.create_task(self._run_listener(listener, voices))
+            self._listener_tasks.add(task)
+            task.add_done_callback(self._listener_tasks.discard)
+
+    @staticmethod
+    async def _run_listener(listener: Callable[[List[Voice]], Awaitable[None]], voices: List[Voice]) -> None:
+        try:
+            await listener(voices)
+        except Exception as e:
+            logger.warning(f"Voice catalog listener failed: {e}")
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"Voice catalog refresh failed, serving stale data: {e}")
+
+    def _schedule_refresh(self) -> None:
+        """Start a background refresh unless one is already running"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    async def get(self) -> List[Voice]:
+        """
+        Get the voice catalog, refreshing it in the background when stale
+
+        Returns:
+            List[Voice]: The cached voices
+
+        Raises:
+            Exception: If the catalog has never been loaded and the fetch fails
+        """
+        if self._voices is None:
+            return await self.refresh()
+        if self.is_stale:
+            self._schedule_refresh()
+        return self._voices
+
+    def lookup(self, voice: str) -> Voice | None:
+        """
+        Find a cached voice by ID or name without touching the upstream
+
+        Args:
+            voice: A voice ID or voice name
+
+        Returns:
+            Voice | None: The matching voice, or None if it is not in the catalog
+        """
+        if self._voices is not None and self.is_stale:
+            self._schedule_refresh()
+        return self._by_id.get(voice) or self._by_name.get(voice)
+
+    def warm(self) -> None:
+        """Start loading the catalog in the background (used on startup)"""
+        self._schedule_refresh()
+
+    def stats(self) -> Dict[str, int | float | bool | None]:
+        """Get cache size, age and refresh counters"""
+        return {
+            "loaded": self.is_loaded,
+            "voices": len(self._voices) if self._voices is not None else 0,
+            "age_seconds": time.monotonic() - self._fetched_at if self.is_loaded else None,
+            "ttl_seconds": self.ttl_seconds,
+            "refreshes": self.refreshes,
+            "coalesced_refreshes": self._flight.coalesced,
+            "failures": self.failures
+        }
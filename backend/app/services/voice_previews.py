@@ -0,0 +1,118 @@
+from pathlib import Path
+from functools import partial
+from typing import Awaitable, Callable, Dict, List
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from app.config import get_settings
+from app.models import Voice
+from app.services import tts_service
+from app.services.tts_scheduler import PREVIEW
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+PREVIEW_TEXT = "Hello! This is a sample of my voice. I hope you like how it sounds."
+
+class VoicePreviewStore:
+    """
+    Persistent store of pre-rendered voice previews
+
+    Each voice's preview is rendered once and kept on disk as
+    <directory>/<voice_id>-<text hash>.mp3, so changing the preview text
+    invalidates old files. Concurrent requests for a missing preview share
+    a single render.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        render: Callable[[str, str], Awaitable[bytes]],
+        text: str = PREVIEW_TEXT,
+        concurrency: int = 2
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.render = render
+        self.text = text
+        self.text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+        self.renders = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    def path(self, voice_id: str) -> Path:
+        return self.directory / f"{voice_id}-{self.text_hash}.mp3"
+
+    def etag(self, voice_id: str) -> str:
+        """Strong ETag for a voice's preview; files are never rewritten in place"""
+        return f'"{voice_id}-{self.text_hash}"'
+
+    async def _render(self, voice_id: str) -> Path:
+        path = self.path(voice_id)
+        async with self._semaphore:
+            audio = await self.render(self.text, voice_id)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(audio)
+        os.replace(tmp_path, path)
+        self.renders += 1
+        return path
+
+    async def ensure(self, voice_id: str) -> Path:
+        """
+        Get the preview file for a voice, rendering it first if necessary
+
+        Args:
+            voice_id: The voice to preview
+
+        Returns:
+            Path: The rendered preview file
+        """
+        path = self.path(voice_id)
+        if path.exists():
+            return path
+        task = self._in_flight.get(voice_id)
+        if task is None:
+            task = asyncio.ensure_future(self._render(voice_id))
+            self._in_flight[voice_id] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(voice_id, None))
+        return await asyncio.shield(task)
+
+    async def sync(self, voices: List[Voice]) -> None:
+        """
+        Render previews for every catalog voice that does not have one yet
+
+        Args:
+            voices: The current voice catalog
+        """
+        missing = [voice.voice_id for voice in voices if not self.path(voice.voice_id).exists()]
+        if not missing:
+            return
+        logger.info(f"Rendering {len(missing)} voice previews")
+        results = await asyncio.gather(
+            *(self.ensure(voice_id) for voice_id in missing),
+            return_exceptions=True
+        )
+        for voice_id, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to render preview for voice {voice_id}: {result}")
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of stored previews and renders since startup"""
+        return {
+            "previews": sum(1 for _ in self.directory.glob(f"*-{self.text_hash}.mp3")),
+            "renders": self.renders,
+            "in_flight": len(self._in_flight)
+        }
+
+preview_store = VoicePreviewStore(
+    settings.voice_preview_dir,
+    partial(tts_service.generate_audio, owner="voice-previews", priority=PREVIEW),
+    concurrency=settings.voice_preview_concurrency
+)
+
+# Render previews once the catalog is loaded and again whenever it changes
+tts_service.voice_catalog.add_listener(preview_store.sync)
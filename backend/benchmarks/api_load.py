@@ -0,0 +1,330 @@
+"""
+End-to-end load and latency benchmark for the API
+
+Drives the FastAPI app in-process over httpx's ASGI transport with
+concurrent simulated users, against a local SQLite database (or
+--database-url) and the simulated TTS provider, so no network or API key
+is needed. Each scenario runs every user's requests concurrently and
+reports p50/p95/p99 latency, throughput, errors and peak RSS:
+
+    upload_txt      POST /api/upload with a generated .txt book
+    upload_epub     POST /api/upload with a large generated .epub
+    list_books      GET /api/books
+    book_sample     POST /api/books/{id}/generate-sample at random offsets
+    voice_preview   GET /api/voice-preview/{voice_id}
+
+Run from the backend directory after pip install -r requirements-bench.txt
+(SQLite needs the aiosqlite package):
+
+    python -m benchmarks.api_load
+    python -m benchmarks.api_load --users 50 --requests 20 --json results.json
+    python -m benchmarks.api_load --json new.json --compare results.json
+
+Simulated upstream latency comes from TTS_SIMULATED_LATENCY_MS and
+TTS_SIMULATED_JITTER_MS unless --tts-latency-ms / --tts-jitter-ms are given.
+Results written with --json include the commit and settings, and
+--compare prints the change against such a file.
+"""
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TXT_PARAGRAPHS = 400
+EPUB_CHAPTERS = 150
+EPUB_PARAGRAPHS = 120
+SAMPLE_CHARS = 400
+
+def _configure(args: argparse.Namespace, workdir: str) -> None:
+    """Point the app at a throwaway database, storage and the simulated provider before it is imported"""
+    if args.database_url is None:
+        try:
+            import aiosqlite  # noqa: F401
+        except ImportError:
+            raise SystemExit("The SQLite benchmark database needs aiosqlite: pip install -r requirements-bench.txt")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{workdir}/benchmark.db"
+    os.environ["TTS_PROVIDER"] = "simulated"
+    if args.tts_latency_ms is not None:
+        os.environ["TTS_SIMULATED_LATENCY_MS"] = str(args.tts_latency_ms)
+    if args.tts_jitter_ms is not None:
+        os.environ["TTS_SIMULATED_JITTER_MS"] = str(args.tts_jitter_ms)
+    for name in ("AUDIO_CACHE_DIR", "VOICE_PREVIEW_DIR", "RENDER_CHUNK_DIR", "RENDER_OUTPUT_DIR", "BLOB_STORE_DIR"):
+        os.environ[name] = f"{workdir}/{name.lower()}"
+    for name in ("JWT_SECRET", "RESET_PASSWORD_SECRET", "VERIFICATION_SECRET"):
+        os.environ.setdefault(name, "benchmark-secret")
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))]
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process and its finished children (ru_maxrss is in KiB on Linux)"""
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    return round(peak * scale / 2 ** 20, 1)
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def make_txt(paragraphs: int, seed: int) -> bytes:
+    """Generated plain-text book with blank lines between paragraphs"""
+    from benchmarks.epub_extraction import WORDS
+
+    rng = random.Random(seed)
+    text = "\n\n".join(
+        " ".join(
+            " ".join(rng.choices(WORDS, k=rng.randint(6, 20))).capitalize() + "."
+            for _ in range(rng.randint(2, 6))
+        )
+        for _ in range(paragraphs)
+    )
+    return text.encode()
+
+class SimulatedUser:
+    """A registered account with its own session cookie and uploaded books"""
+
+    def __init__(self, index: int, token: str):
+        self.index = index
+        self.headers = {"cookie": f"audiobook_auth={token}"}
+        self.books: List[Dict[str, int]] = []  # id, and length once listed
+        self.rng = random.Random(index)
+
+async def _create_users(count: int) -> List[SimulatedUser]:
+    from app.auth.auth import jwt_strategy
+    from app.auth.models import User
+    from app.database import async_session_maker
+
+    users = []
+    async with async_session_maker() as session:
+        accounts = [
+            User(email=f"bench{index}@example.com", hashed_password="!", name=f"Bench {index}")
+            for index in range(count)
+        ]
+        session.add_all(accounts)
+        await session.commit()
+        for index, account in enumerate(accounts):
+            users.append(SimulatedUser(index, await jwt_strategy.write_token(account)))
+    return users
+
+async def run_scenario(
+    name: str,
+    users: List[SimulatedUser],
+    requests: int,
+    call: Callable[[SimulatedUser, int], Awaitable[int]]
+) -> Dict[str, object]:
+    """
+    Run requests calls for every user concurrently and summarize the latencies
+
+    Args:
+        name: Scenario name
+        users: The simulated users
+        requests: Requests made by each user, one after another
+        call: Makes one request for a user and returns the status code
+
+    Returns:
+        Dict[str, object]: Latency percentiles in ms, throughput and errors
+    """
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def session(user: SimulatedUser) -> None:
+        for number in range(requests):
+            started = time.perf_counter()
+            try:
+                status = await call(user, number)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not isinstance(status, int) or status >= 400:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(user) for user in users))
+    elapsed = time.perf_counter() - started
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "max_ms": round(max(latencies), 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    import httpx
+    from app.database import Base, engine
+    from app.services import tts_service
+    from benchmarks.epub_extraction import make_epub
+    from main import app
+
+    # Per-request logs from the app and httpx would dominate the run
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await app.router.startup()
+    try:
+        users = await _create_users(args.users)
+        txt = make_txt(TXT_PARAGRAPHS, args.seed)
+        epub = make_epub(EPUB_CHAPTERS, EPUB_PARAGRAPHS, seed=args.seed)
+        voices = [voice["voice_id"] for voice in tts_service.provider.voices]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+            async def upload(user: SimulatedUser, filename: str, data: bytes) -> int:
+                response = await client.post(
+                    "/api/upload",
+                    headers=user.headers,
+                    files={"file": (filename, data)}
+                )
+                if response.status_code == 200:
+                    user.books.append({"id": response.json()["id"]})
+                return response.status_code
+
+            async def upload_txt(user: SimulatedUser, number: int) -> int:
+                return await upload(user, f"book-{number}.txt", txt)
+
+            async def upload_epub(user: SimulatedUser, number: int) -> int:
+                return await upload(user, f"book-{number}.epub", epub)
+
+            async def list_books(user: SimulatedUser, number: int) -> int:
+                response = await client.get("/api/books", headers=user.headers)
+                return response.status_code
+
+            async def load_book_lengths(user: SimulatedUser) -> None:
+                response = await client.get("/api/books", headers=user.headers, params={"limit": 100})
+                user.books = [
+                    {"id": book["id"], "length": book["normalized_length"] or book["length"]}
+                    for book in response.json()["books"]
+                ]
+
+            async def book_sample(user: SimulatedUser, number: int) -> int:
+                book = user.rng.choice(user.books)
+                start = user.rng.randrange(max(book["length"] - SAMPLE_CHARS, 1))
+                response = await client.post(
+                    f"/api/books/{book['id']}/generate-sample",
+                    headers=user.headers,
+                    json={"start_position": start, "end_position": start + SAMPLE_CHARS, "snap": "sentence"}
+                )
+                return response.status_code
+
+            async def voice_preview(user: SimulatedUser, number: int) -> int:
+                response = await client.get(f"/api/voice-preview/{user.rng.choice(voices)}")
+                return response.status_code
+
+            scenarios = [
+                ("upload_txt", args.requests, upload_txt),
+                ("upload_epub", max(1, args.requests // 5), upload_epub),
+                ("list_books", args.requests, list_books),
+                ("book_sample", args.requests, book_sample),
+                ("voice_preview", args.requests, voice_preview),
+            ]
+            results = []
+            for name, requests, call in scenarios:
+                if args.only and name not in args.only:
+                    continue
+                if name == "book_sample":
+                    # Samples need a book; upload one untimed for users that have none
+                    await asyncio.gather(*(upload_txt(user, 0) for user in users if not user.books))
+                    await asyncio.gather(*(load_book_lengths(user) for user in users))
+                result = await run_scenario(name, users, requests, call)
+                results.append(result)
+                print(f"{name}: {result['requests']} requests, p95 {result['p95_ms']} ms", file=sys.stderr)
+    finally:
+        await app.router.shutdown()
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "users": args.users,
+            "requests_per_user": args.requests,
+            "seed": args.seed,
+            "database": "sqlite" if args.database_url is None else "custom",
+            "tts_latency_ms": tts_service.settings.tts_simulated_latency_ms,
+            "tts_jitter_ms": tts_service.settings.tts_simulated_jitter_ms,
+            "tts_global_concurrency": tts_service.settings.tts_global_concurrency
+        },
+        "scenarios": results
+    }
+
+def print_table(results: List[Dict[str, object]]) -> None:
+    columns = ["scenario", "requests", "errors", "p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb"]
+    print(" ".join(f"{column:>15}" for column in columns))
+    for row in results:
+        print(" ".join(f"{row[column]!s:>15}" for column in columns))
+
+def print_comparison(results: List[Dict[str, object]], baseline_path: str) -> None:
+    """Print the relative change of each metric against a previous --json file"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {row["scenario"]: row for row in baseline["scenarios"]}
+    print(f"\nChange against {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    metrics = ["p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb"]
+    print(" ".join(f"{column:>15}" for column in ["scenario"] + metrics))
+    for row in results:
+        old = previous.get(row["scenario"])
+        if old is None:
+            continue
+        changes = [
+            f"{100 * (row[metric] - old[metric]) / old[metric]:+.1f}%" if old[metric] else "n/a"
+            for metric in metrics
+        ]
+        print(" ".join(f"{value:>15}" for value in [row["scenario"]] + changes))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per user and scenario (a fifth for EPUB uploads)")
+    parser.add_argument("--only", nargs="+", help="Run only these scenarios")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated books and request offsets")
+    parser.add_argument("--tts-latency-ms", type=float, help="Simulated TTS time to first byte")
+    parser.add_argument("--tts-jitter-ms", type=float, help="Simulated TTS latency jitter")
+    parser.add_argument("--database-url", help="Database to use instead of a temporary SQLite file")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Compare against results previously written with --json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="audiobook-benchmark-") as workdir:
+        _configure(args, workdir)
+        report = asyncio.run(run(args))
+
+    print_table(report["scenarios"])
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if args.compare:
+        print_comparison(report["scenarios"], args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark EPUB text extraction
+
+Compares the previous extraction path (BeautifulSoup with 'html.parser',
+one chapter after another) against the lxml engine in text_processor,
+both in-thread and fanned out to the process pool.
+
+Run from the backend directory with the usual environment (.env):
+
+    python -m benchmarks.epub_extraction
+    python -m benchmarks.epub_extraction --corpus ~/books --repeat 5 --json results.json
+
+The baseline needs beautifulsoup4, which the application itself no longer
+depends on (pip install -r requirements-bench.txt); it is skipped when the
+package is not installed. The pool size
+and threshold come from EPUB_PARSE_WORKERS and EPUB_PARALLEL_MIN_BYTES.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import argparse
+import io
+import json
+import random
+import statistics
+import time
+import zipfile
+from app.services import text_processor
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while distant thunder rolls "
+    "across quiet hills and somebody somewhere reads aloud by candlelight"
+).split()
+
+# name, chapters, paragraphs per chapter
+SYNTHETIC_CORPUS = [
+    ("small", 5, 20),
+    ("medium", 40, 60),
+    ("large", 150, 120),
+]
+
+CONTAINER_XML = """<?xml version="1.0" encoding="utf-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+def _paragraph(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(2, 6)):
+        words = rng.choices(WORDS, k=rng.randint(6, 20))
+        if rng.random() < 0.3:
+            index = rng.randrange(len(words))
+            words[index] = f"<em>{words[index]}</em>"
+        sentences.append(" ".join(words).capitalize() + ".")
+    return "<p>" + "\n  ".join(sentences) + "</p>"
+
+def make_epub(chapters: int, paragraphs: int, seed: int = 0) -> bytes:
+    """
+    Build a synthetic EPUB with the given number of chapters and paragraphs
+
+    Args:
+        chapters: Number of spine documents
+        paragraphs: Paragraphs per chapter
+        seed: Seed for the generated text
+
+    Returns:
+        bytes: The EPUB archive
+    """
+    rng = random.Random(seed)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/epub+zip", zipfile.ZIP_STORED)
+        archive.writestr("META-INF/container.xml", CONTAINER_XML)
+        manifest = []
+        spine = []
+        for number in range(1, chapters + 1):
+            name = f"chapter{number}.xhtml"
+            body = "\n".join(_paragraph(rng) for _ in range(paragraphs))
+            archive.writestr(
+                f"OEBPS/{name}",
+                '<?xml version="1.0" encoding="utf-8"?>\n'
+                '<html xmlns="http://www.w3.org/1999/xhtml">\n'
+                f"<head><title>Chapter {number}</title></head>\n"
+                f"<body><h1>Chapter {number}</h1>\n{body}\n</body></html>"
+            )
+            manifest.append(f'<item id="c{number}" href="{name}" media-type="application/xhtml+xml"/>')
+            spine.append(f'<itemref idref="c{number}"/>')
+        archive.writestr(
+            "OEBPS/content.opf",
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0">\n'
+            f"<manifest>{''.join(manifest)}</manifest>\n"
+            f"<spine>{''.join(spine)}</spine>\n"
+            "</package>"
+        )
+    return buffer.getvalue()
+
+def baseline_extract(epub: bytes) -> int:
+    """Previous path: html.parser and get_text() for each spine document in turn"""
+    from bs4 import BeautifulSoup
+
+    characters = 0
+    with zipfile.ZipFile(io.BytesIO(epub)) as archive:
+        for path in text_processor._read_spine(archive):
+            soup = BeautifulSoup(archive.read(path), "html.parser")
+            characters += len((soup.body or soup).get_text())
+    return characters
+
+def serial_extract(epub: bytes) -> int:
+    return sum(len(chapter.text) for chapter in text_processor.iter_epub_chapters(io.BytesIO(epub)))
+
+def parallel_extract(epub: bytes) -> int:
+    chapters = text_processor.iter_epub_chapters(io.BytesIO(epub), parallel=True)
+    return sum(len(chapter.text) for chapter in chapters)
+
+def _time(extract: Callable[[bytes], int], epub: bytes, repeat: int) -> float:
+    """Median wall time in milliseconds over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extract(epub)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def load_corpus(directory: str | None) -> List[Tuple[str, bytes]]:
+    corpus = [
+        (name, make_epub(chapters, paragraphs, seed=index))
+        for index, (name, chapters, paragraphs) in enumerate(SYNTHETIC_CORPUS)
+    ]
+    if directory:
+        corpus.extend(
+            (path.name, path.read_bytes())
+            for path in sorted(Path(directory).expanduser().glob("*.epub"))
+        )
+    return corpus
+
+def run(corpus: List[Tuple[str, bytes]], repeat: int) -> List[Dict[str, object]]:
+    try:
+        import bs4  # noqa: F401
+        methods = {"baseline": baseline_extract}
+    except ImportError:
+        print("beautifulsoup4 is not installed (pip install -r requirements-bench.txt), skipping the baseline")
+        methods = {}
+    methods["lxml"] = serial_extract
+    methods["lxml_pool"] = parallel_extract
+
+    # Start the pool's worker processes outside the timed runs
+    parallel_extract(corpus[-1][1])
+
+    results = []
+    for name, epub in corpus:
+        row: Dict[str, object] = {"epub": name, "bytes": len(epub)}
+        for method, extract in methods.items():
+            row[f"{method}_ms"] = round(_time(extract, epub, repeat), 2)
+        if "baseline_ms" in row:
+            for method in ("lxml", "lxml_pool"):
+                row[f"{method}_speedup"] = round(row["baseline_ms"] / row[f"{method}_ms"], 2)
+        results.append(row)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="Directory of additional .epub files to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per EPUB and method (median is reported)")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    try:
+        results = run(load_corpus(args.corpus), args.repeat)
+    finally:
+        text_processor.shutdown()
+
+    columns = list(results[0])
+    print(" ".join(f"{column:>18}" for column in columns))
+    for row in results:
+        print(" ".join(f"{row[column]!s:>18}" for column in columns))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import api, auth
+from app.services import audiobook, text_processor, tts_service
+from app.services.render_queue import render_queue
+from app.database import db_metrics
+from app.db_metrics import DBTimingMiddleware
+from app.metrics import MetricsMiddleware
 from app.config import get_settings, get_allowed_origins
 import logging
 import os
@@ -19,6 +24,12 @@ app = FastAPI(
 # Log CORS settings
 logger.info(f"Allowed origins: {get_allowed_origins()}")
 
+# Attribute database time to each request (added before CORS so CORS stays outermost)
+app.add_middleware(DBTimingMiddleware, metrics=db_metrics, server_timing=settings.server_timing)
+
+# Count and time requests and report their processing stages
+app.add_middleware(MetricsMiddleware, server_timing=settings.server_timing)
+
 # Configure CORS - must be first middleware
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +52,18 @@ app.add_middleware(
 async def root():
     return {"status": "ok", "message": "API is running"}
 
+@app.on_event("startup")
+async def startup():
+    tts_service.startup()
+    await render_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await render_queue.stop()
+    await tts_service.close()
+    text_processor.shutdown()
+    audiobook.shutdown()
+
 # Include routers
 app.include_router(auth.router, prefix="/api")  # Include auth routes first
 app.include_router(api.router, prefix="/api")
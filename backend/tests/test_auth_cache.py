@@ -0,0 +1,198 @@
+from typing import Any, Dict
+import asyncio
+import jwt
+import time
+import pytest
+from fastapi_users import schemas
+from fastapi_users.authentication.strategy import StrategyDestroyNotSupportedError
+import app.models  # noqa: F401 - configures the User.books relationship
+from app.auth import auth, cache, manager
+from app.auth.auth import CachedJWTStrategy
+from app.auth.cache import UserCache
+from app.auth.manager import UserManager
+from app.auth.models import User
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+class UserDatabase:
+    """Stands in for SQLAlchemyUserDatabase, counting lookups"""
+
+    def __init__(self, *users: User):
+        self.users = {user.id: user for user in users}
+        self.lookups = 0
+
+    async def get(self, id: int) -> User | None:
+        self.lookups += 1
+        return self.users.get(id)
+
+    async def update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        for key, value in update_dict.items():
+            setattr(user, key, value)
+        return user
+
+    async def delete(self, user: User) -> None:
+        del self.users[user.id]
+
+class PasswordHelper:
+    """Keeps password changes independent of the installed hashing backend"""
+
+    def hash(self, password: str) -> str:
+        return f"hashed:{password}"
+
+def make_user(id: int = 1, **values) -> User:
+    return User(
+        id=id,
+        email=f"user{id}@example.com",
+        hashed_password="hash",
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+        name=f"User {id}",
+        **values
+    )
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+@pytest.fixture
+def user_cache(monkeypatch, clock) -> UserCache:
+    user_cache = UserCache(ttl_seconds=60, max_entries=100)
+    monkeypatch.setattr(cache, "user_cache", user_cache)
+    monkeypatch.setattr(auth, "user_cache", user_cache)
+    monkeypatch.setattr(manager, "user_cache", user_cache)
+    return user_cache
+
+def test_get_returns_a_fresh_copy_per_request(user_cache):
+    user = make_user()
+    user_cache.put("token", user)
+    first, second = user_cache.get("token"), user_cache.get("token")
+    assert first is not user and first is not second
+    assert (first.id, first.email, first.is_active) == (1, "user1@example.com", True)
+    assert user_cache.get("other") is None
+    assert (user_cache.hits, user_cache.misses) == (2, 1)
+
+def test_tokens_are_not_stored_in_the_clear(user_cache):
+    user_cache.put("secret-token", make_user())
+    assert all("secret-token" not in key for key in user_cache._entries)
+
+def test_entries_expire_after_the_ttl(user_cache, clock):
+    user_cache.put("token", make_user())
+    clock.now += 59
+    assert user_cache.get("token") is not None
+    clock.now += 1
+    assert user_cache.get("token") is None
+    assert user_cache.stats()["entries"] == 0
+
+def test_entries_expire_no_later_than_the_token(user_cache, clock):
+    user_cache.put("token", make_user(), token_expires_at=clock.now + 5)
+    clock.now += 4.9
+    assert user_cache.get("token") is not None
+    clock.now += 0.1
+    assert user_cache.get("token") is None
+
+def test_disabled_cache_keeps_nothing(clock):
+    user_cache = UserCache(ttl_seconds=0, max_entries=100)
+    user_cache.put("token", make_user())
+    assert user_cache.get("token") is None
+
+def test_oldest_entries_are_evicted_first(clock):
+    user_cache = UserCache(ttl_seconds=60, max_entries=2)
+    for token in ("a", "b"):
+        user_cache.put(token, make_user())
+    user_cache.get("a")
+    user_cache.put("c", make_user(2))
+    assert user_cache.get("b") is None
+    assert user_cache.get("a") is not None and user_cache.get("c") is not None
+
+def test_invalidate_user_drops_only_their_tokens(user_cache):
+    user_cache.put("a1", make_user(1))
+    user_cache.put("a2", make_user(1))
+    user_cache.put("b", make_user(2))
+    user_cache.invalidate_user(1)
+    assert user_cache.get("a1") is None and user_cache.get("a2") is None
+    assert user_cache.get("b") is not None
+    assert user_cache.invalidations == 2
+
+@pytest.mark.parametrize("hook", ["on_after_reset_password", "on_after_delete"])
+def test_manager_hooks_evict_the_user(user_cache, hook):
+    user = make_user()
+    user_cache.put("token", user)
+    asyncio.run(getattr(UserManager(UserDatabase(user)), hook)(user))
+    assert user_cache.get("token") is None
+
+def test_manager_update_evicts_the_user(user_cache):
+    user = make_user()
+    user_cache.put("token", user)
+    asyncio.run(UserManager(UserDatabase(user)).update(schemas.BaseUserUpdate(name="Renamed"), user))
+    assert user_cache.get("token") is None
+
+def read(strategy: CachedJWTStrategy, token: str, user_manager: UserManager) -> User | None:
+    return asyncio.run(strategy.read_token(token, user_manager))
+
+def test_read_token_reuses_the_lookup_until_the_token_expires(user_cache, clock):
+    user = make_user()
+    db = UserDatabase(user)
+    user_manager = UserManager(db)
+    # The token expires well within the cache TTL
+    strategy = CachedJWTStrategy(secret="secret", lifetime_seconds=5)
+    token = asyncio.run(strategy.write_token(user))
+    assert read(strategy, token, user_manager).id == 1
+    assert read(strategy, token, user_manager).id == 1
+    assert db.lookups == 1
+    expires_at = jwt.decode(token, options={"verify_signature": False})["exp"]
+    assert next(iter(user_cache._entries.values())).expires_at == expires_at
+    clock.now = expires_at
+    assert user_cache.get(token) is None
+
+def test_password_change_misses_the_cache(user_cache):
+    user = make_user()
+    db = UserDatabase(user)
+    user_manager = UserManager(db, password_helper=PasswordHelper())
+    strategy = CachedJWTStrategy(secret="secret", lifetime_seconds=3600)
+    token = asyncio.run(strategy.write_token(user))
+    read(strategy, token, user_manager)
+    asyncio.run(user_manager.update(schemas.BaseUserUpdate(password="a new password"), user))
+    assert user.hashed_password == "hashed:a new password"
+    read(strategy, token, user_manager)
+    assert db.lookups == 2
+
+def test_deactivated_user_misses_the_cache_and_is_not_cached(user_cache):
+    user = make_user()
+    db = UserDatabase(user)
+    user_manager = UserManager(db)
+    strategy = CachedJWTStrategy(secret="secret", lifetime_seconds=3600)
+    token = asyncio.run(strategy.write_token(user))
+    read(strategy, token, user_manager)
+    asyncio.run(user_manager.update(schemas.BaseUserUpdate(is_active=False), user))
+    assert read(strategy, token, user_manager).is_active is False
+    assert read(strategy, token, user_manager).is_active is False
+    assert db.lookups == 3
+    assert user_cache.stats()["entries"] == 0
+
+def test_deleted_user_misses_the_cache(user_cache):
+    user = make_user()
+    db = UserDatabase(user)
+    user_manager = UserManager(db)
+    strategy = CachedJWTStrategy(secret="secret", lifetime_seconds=3600)
+    token = asyncio.run(strategy.write_token(user))
+    read(strategy, token, user_manager)
+    asyncio.run(user_manager.delete(user))
+    assert read(strategy, token, user_manager) is None
+
+def test_logout_evicts_the_token(user_cache):
+    user = make_user()
+    user_manager = UserManager(UserDatabase(user))
+    strategy = CachedJWTStrategy(secret="secret", lifetime_seconds=3600)
+    token = asyncio.run(strategy.write_token(user))
+    read(strategy, token, user_manager)
+    with pytest.raises(StrategyDestroyNotSupportedError):
+        asyncio.run(strategy.destroy_token(token, user))
+    assert user_cache.get(token) is None
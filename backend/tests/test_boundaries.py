@@ -0,0 +1,42 @@
+import textwrap
+from app.services.boundaries import BoundaryIndex
+from app.services.chunker import chunk_spans
+
+WRAPPED = (
+    textwrap.fill("The first paragraph has a sentence that is long enough to wrap. " * 3, 40)
+    + "\n\n"
+    + textwrap.fill("The second paragraph wraps as well and ends here. " * 2, 40)
+)
+
+def test_wrapped_lines_are_not_boundaries():
+    index = BoundaryIndex.build(WRAPPED)
+    second = WRAPPED.index("The second")
+    assert list(index.paragraphs) == [0, second, len(WRAPPED)]
+    for offset in index.sentences:
+        assert offset in (0, len(WRAPPED)) or WRAPPED[:offset].rstrip().endswith(".")
+
+def test_snap_widens_to_whole_sentences():
+    index = BoundaryIndex.build(WRAPPED)
+    inside = WRAPPED.index("long enough") + 2
+    start, end = index.snap(inside, inside + 1)
+    assert start == 0
+    sentence = WRAPPED[start:end].strip()
+    assert "\n" in sentence
+    assert " ".join(sentence.split()) == "The first paragraph has a sentence that is long enough to wrap."
+
+def test_snap_paragraph():
+    index = BoundaryIndex.build(WRAPPED)
+    second = WRAPPED.index("The second")
+    assert index.snap(5, 6, "paragraph") == (0, second)
+    assert index.snap(second + 5, second + 6, "paragraph") == (second, len(WRAPPED))
+
+def test_round_trip():
+    index = BoundaryIndex.build(WRAPPED)
+    data = index.to_bytes()
+    restored = BoundaryIndex.from_bytes(data)
+    assert list(restored.sentences) == list(index.sentences)
+    assert list(restored.paragraphs) == list(index.paragraphs)
+
+def test_chunking_with_index_matches_scan():
+    text = "\n\n".join([WRAPPED] * 20)
+    assert chunk_spans(text, 300, BoundaryIndex.build(text)) == chunk_spans(text, 300)
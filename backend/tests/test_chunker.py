@@ -0,0 +1,69 @@
+import textwrap
+from app.services.chunker import chunk_indices, chunk_spans, chunks_from_spans, spoken_spans, split_into_chunks
+
+def hard_wrapped_book(paragraphs: int = 8, sentences: int = 12, width: int = 70) -> str:
+    """Plain text with sentences of varying length, wrapped at a fixed width"""
+    blocks = []
+    for paragraph in range(paragraphs):
+        text = " ".join(
+            f"Sentence {sentence} of paragraph {paragraph} runs on"
+            + " and on" * (sentence % 5)
+            + " until it finally stops."
+            for sentence in range(sentences)
+        )
+        blocks.append(textwrap.fill(text, width))
+    return "\n\n".join(blocks)
+
+def test_spans_cover_text():
+    text = hard_wrapped_book()
+    spans = chunk_spans(text, 500)
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(text)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+    assert all(end - start <= 500 for start, end in spans)
+
+def test_hard_wrapped_text_is_cut_at_sentence_ends():
+    text = hard_wrapped_book()
+    assert text.count("\n") > 50
+    for chunk in split_into_chunks(text, 500)[:-1]:
+        assert chunk.endswith("stops."), chunk
+
+def test_single_line_break_is_not_a_paragraph_end():
+    # The line break in the second half of the window must not win over the sentence end
+    text = "First sentence. " + "word " * 40 + "\nmore " + "word " * 40 + "end."
+    start, end = chunk_spans(text, 300)[0]
+    assert text[:end] == "First sentence. "
+
+def test_blank_line_is_preferred_over_sentence_end():
+    first = "One. Two. " * 20
+    text = first + "\n\n" + "Three. " * 40
+    cut = chunk_spans(text, 300)[0][1]
+    assert cut == len(first) + 2
+
+def test_blank_line_with_indentation_is_a_paragraph_end():
+    first = "a b c " * 30
+    text = first + "\n \t\n  " + "d e f " * 40
+    cut = chunk_spans(text, 300)[0][1]
+    assert cut == len(first) + len("\n \t\n  ")
+
+def test_whitespace_cut_without_sentence_ends():
+    text = "word " * 200
+    for start, end in chunk_spans(text, 97):
+        assert text[end - 1] == " " or end == len(text)
+
+def test_hard_cut_without_whitespace():
+    text = "x" * 250
+    assert chunk_spans(text, 100) == [(0, 100), (100, 200), (200, 250)]
+
+def test_sentence_end_includes_closing_quotes():
+    text = 'He said "stop." ' + "x " * 200
+    cut = chunk_spans(text, 100)[0][1]
+    assert text[:cut] == 'He said "stop." '
+
+def test_whitespace_only_spans_are_not_chunks():
+    text = "First part." + " " * 20 + "Second part."
+    spans = [(0, 11), (11, 31), (31, len(text))]
+    assert spoken_spans(text, spans) == [(0, 11), (31, len(text))]
+    assert chunks_from_spans(text, spans) == ["First part.", "Second part."]
+    # Plan index 2 is the second chunk that is rendered; index 1 is never rendered
+    assert chunk_indices(text, spans, [1, 2]) == [1]
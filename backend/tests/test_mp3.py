@@ -0,0 +1,156 @@
+from typing import List, Tuple
+import io
+import struct
+import pytest
+from app.services.mp3 import (
+    MPEG1_BITRATES, XING_FLAGS, XING_TOC_SIZE, Mp3Joiner, is_info_frame, iter_frames, parse_header, side_info_size,
+    strip_metadata
+)
+
+def frame(bitrate: int = 128, rate_index: int = 0, mono: bool = False, padding: bool = False, mpeg1: bool = True) -> bytes:
+    """Build one Layer III frame with a zeroed body"""
+    version = 0b11 if mpeg1 else 0b10
+    bitrate_index = MPEG1_BITRATES.index(bitrate) if mpeg1 else (0, 8, 16, 24, 32, 40, 48, 56, 64).index(bitrate)
+    raw = bytes([
+        0xFF,
+        0xE0 | version << 3 | 0b01 << 1 | 0x01,  # Layer III, no CRC
+        bitrate_index << 4 | rate_index << 2 | padding << 1,
+        0xC0 if mono else 0x00
+    ])
+    header = parse_header(raw, 0)
+    return raw + bytes(header.size - 4)
+
+def frames(count: int, **options) -> bytes:
+    return b"".join(frame(**options) for _ in range(count))
+
+def id3v2(body_size: int = 300) -> bytes:
+    size = bytes([(body_size >> shift) & 0x7F for shift in (21, 14, 7, 0)])
+    return b"ID3\x04\x00\x00" + size + b"\x00" * body_size
+
+def id3v1() -> bytes:
+    return b"TAG" + b"\x00" * 125
+
+def join(*chunks: bytes) -> Tuple[bytes, List[float], int]:
+    output = io.BytesIO()
+    joiner = Mp3Joiner(output)
+    durations = [joiner.add(chunk) for chunk in chunks]
+    total = joiner.finish()
+    return output.getvalue(), durations, total
+
+def xing(data: bytes) -> Tuple[bytes, int, int, int, bytes]:
+    """Read the tag, flags, frame count, byte count and seek table of the first frame"""
+    header = parse_header(data, 0)
+    offset = 4 + side_info_size(header)
+    tag = data[offset:offset + 4]
+    flags, count, size = struct.unpack(">III", data[offset + 4:offset + 16])
+    toc = data[offset + 16:offset + 16 + XING_TOC_SIZE]
+    return tag, flags, count, size, toc
+
+def test_parse_header():
+    header = parse_header(frame(128), 0)
+    assert (header.mpeg1, header.bitrate, header.sample_rate, header.samples) == (True, 128, 44100, 1152)
+    assert header.size == 417
+    assert parse_header(frame(128, padding=True), 0).size == 418
+    mpeg2 = parse_header(frame(64, rate_index=1, mpeg1=False), 0)
+    assert (mpeg2.sample_rate, mpeg2.samples, mpeg2.size) == (24000, 576, 192)
+    assert side_info_size(parse_header(frame(mono=True), 0)) == 17
+    assert side_info_size(mpeg2) == 17
+
+def test_parse_header_rejects_invalid():
+    assert parse_header(b"\xff\xfb", 0) is None
+    assert parse_header(b"\x00\x00\x00\x00", 0) is None
+    assert parse_header(b"\xff\xfd\x90\x00", 0) is None  # Layer II
+    assert parse_header(b"\xff\xfb\xf0\x00", 0) is None  # bad bitrate index
+    assert parse_header(b"\xff\xfb\x9c\x00", 0) is None  # reserved sample rate
+
+def test_iter_frames_skips_tags_and_garbage():
+    data = id3v2() + frames(3) + b"garbage\xff\x00" + frames(2) + id3v1()
+    found = list(iter_frames(data))
+    assert len(found) == 5
+    assert found[0][0] == len(id3v2())
+
+def test_iter_frames_drops_truncated_frame():
+    data = frames(4) + frame()[:100]
+    assert len(list(iter_frames(data))) == 4
+
+def test_join_cbr():
+    chunks = [frames(10), frames(25), frames(7)]
+    data, durations, total = join(*chunks)
+    assert durations == pytest.approx([n * 1152 / 44100 for n in (10, 25, 7)])
+    tag, flags, count, size, toc = xing(data)
+    assert (tag, flags, count, size, total) == (b"Info", XING_FLAGS, 42, len(data), len(data))
+    # The header frame plus every audio frame, and nothing else
+    assert len(list(iter_frames(data))) == 43
+    assert len(data) == parse_header(data, 0).size + 42 * 417
+    assert list(toc) == sorted(toc)
+
+def test_join_vbr():
+    data, durations, total = join(frames(10, bitrate=128), frames(10, bitrate=64), frames(5, bitrate=320))
+    tag, flags, count, size, toc = xing(data)
+    assert (tag, count, size, total) == (b"Xing", 25, len(data), len(data))
+    audio = [header for _, header in iter_frames(data)][1:]
+    assert [header.bitrate for header in audio] == [128] * 10 + [64] * 10 + [320] * 5
+    assert sum(header.size for header in audio) + parse_header(data, 0).size == len(data)
+    # The seek table points at the frame a percentage of the way in
+    header_size = parse_header(data, 0).size
+    offset_of_frame_20 = header_size + 10 * 417 + 10 * 208
+    assert toc[80] == offset_of_frame_20 * 256 // len(data)
+
+def test_join_strips_tags_and_info_frames():
+    tagged = id3v2() + frames(6) + id3v1()
+    joined_once, _, _ = join(frames(4))
+    assert is_info_frame(joined_once, 0, parse_header(joined_once, 0))
+    data, durations, _ = join(tagged, joined_once)
+    assert durations == pytest.approx([6 * 1152 / 44100, 4 * 1152 / 44100])
+    assert b"ID3" not in data and b"TAG" not in data
+    assert data.count(b"Info") == 1
+    assert xing(data)[2] == 10
+    assert len(list(iter_frames(data))) == 11
+
+def test_strip_metadata_keeps_only_audio_frames():
+    with_info, _, _ = join(frames(4))
+    tagged = id3v2() + frames(6) + b"garbage" + frames(2) + id3v1()
+    assert strip_metadata(with_info) == frames(4)
+    assert strip_metadata(tagged) == frames(8)
+    assert strip_metadata(b"not audio") == b""
+
+def test_stripped_chunks_concatenate_into_one_stream():
+    chunks = [id3v2() + frames(5, bitrate=128), join(frames(3, bitrate=64))[0], frames(2) + id3v1()]
+    data = b"".join(strip_metadata(chunk) for chunk in chunks)
+    assert b"ID3" not in data and b"TAG" not in data and b"Info" not in data
+    assert [header.bitrate for _, header in iter_frames(data)] == [128] * 5 + [64] * 3 + [128] * 2
+    assert len(data) == 7 * 417 + 3 * 208
+
+def test_join_mono_and_stereo():
+    data, _, _ = join(frames(3, mono=True), frames(3))
+    assert xing(data)[2] == 6
+
+def test_join_rejects_mismatched_sample_rates():
+    output = io.BytesIO()
+    joiner = Mp3Joiner(output)
+    joiner.add(frames(3))
+    with pytest.raises(ValueError):
+        joiner.add(frames(3, rate_index=1))
+
+def test_join_rejects_mpeg_version_change():
+    output = io.BytesIO()
+    joiner = Mp3Joiner(output)
+    joiner.add(frames(3, bitrate=64, rate_index=1, mpeg1=False))
+    with pytest.raises(ValueError):
+        joiner.add(frames(3, rate_index=1))
+
+def test_finish_without_audio():
+    joiner = Mp3Joiner(io.BytesIO())
+    assert joiner.add(b"no audio here") == 0.0
+    with pytest.raises(ValueError):
+        joiner.finish()
+
+def test_join_after_existing_output():
+    output = io.BytesIO()
+    output.write(b"prefix")
+    joiner = Mp3Joiner(output)
+    joiner.add(frames(5))
+    joiner.finish()
+    data = output.getvalue()
+    assert data.startswith(b"prefix")
+    assert xing(data[len(b"prefix"):])[3] == len(data) - len(b"prefix")
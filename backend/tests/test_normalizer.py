@@ -0,0 +1,25 @@
+from app.services.normalizer import normalize, summarize
+
+TEXT = "Dr.  Smith   met   12 people\n\n\n\non page 3.\n42\nThe end   of   it."
+
+def test_report_separates_cleanup_from_expansion():
+    report = normalize(TEXT).report
+    assert report["chars_saved"] > 0
+    assert report["chars_added"] > 0
+    assert report["original_chars"] - report["chars_saved"] + report["chars_added"] == report["normalized_chars"]
+    assert report["rules"]["number"]["chars_saved"] < 0
+    assert report["percent_saved"] == round(100.0 * report["chars_saved"] / len(TEXT), 2)
+
+def test_report_without_expansions():
+    report = normalize(TEXT, expand_abbreviations=False, expand_numbers=False).report
+    assert report["chars_added"] == 0
+    assert report["chars_saved"] == report["original_chars"] - report["normalized_chars"]
+
+def test_summarize_legacy_rules():
+    rules = {"spaces": {"edits": 3, "chars_saved": 5}, "number": {"edits": 2, "chars_saved": -17}}
+    report = summarize(40, 52, rules)
+    assert (report["chars_saved"], report["chars_added"], report["percent_saved"]) == (5, 17, 12.5)
+
+def test_empty_text():
+    report = normalize("").report
+    assert (report["chars_saved"], report["chars_added"], report["percent_saved"]) == (0, 0, 0.0)
@@ -0,0 +1,111 @@
+from pathlib import Path
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app.responses import _parse_range, file_response
+
+BODY = bytes(range(256)) * 4
+ETAG = '"abc"'
+
+@pytest.fixture
+def client(tmp_path: Path) -> TestClient:
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(BODY)
+    app = FastAPI()
+
+    @app.get("/audio")
+    def audio(request: Request):
+        return file_response(
+            request,
+            path,
+            "audio/mpeg",
+            etag=ETAG,
+            headers={"Content-Disposition": 'attachment; filename="audio.mp3"'}
+        )
+
+    return TestClient(app)
+
+def test_parse_range():
+    assert _parse_range("bytes=0-99", 1024) == (0, 99)
+    assert _parse_range("bytes=1000-", 1024) == (1000, 1023)
+    assert _parse_range("bytes=1000-5000", 1024) == (1000, 1023)
+    assert _parse_range("bytes=-100", 1024) == (924, 1023)
+    assert _parse_range("bytes=-5000", 1024) == (0, 1023)
+
+def test_parse_range_ignores_unsupported_forms():
+    assert _parse_range("bytes=0-1,5-9", 1024) is None
+    assert _parse_range("items=0-1", 1024) is None
+    assert _parse_range("bytes=-", 1024) is None
+    assert _parse_range("bytes=a-b", 1024) is None
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=2000-3000", "bytes=10-5", "bytes=-0"])
+def test_parse_range_rejects_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, 1024)
+
+def test_suffix_range_of_empty_file_is_unsatisfiable():
+    with pytest.raises(ValueError):
+        _parse_range("bytes=-10", 0)
+
+def test_full_response(client):
+    response = client.get("/audio")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["etag"] == ETAG
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-disposition"] == 'attachment; filename="audio.mp3"'
+
+def test_byte_range(client):
+    response = client.get("/audio", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+    assert response.headers["content-length"] == "10"
+
+def test_open_ended_range(client):
+    response = client.get("/audio", headers={"Range": "bytes=1000-"})
+    assert response.status_code == 206
+    assert response.content == BODY[1000:]
+    assert response.headers["content-range"] == f"bytes 1000-1023/{len(BODY)}"
+
+def test_suffix_range(client):
+    response = client.get("/audio", headers={"Range": "bytes=-24"})
+    assert response.status_code == 206
+    assert response.content == BODY[-24:]
+    assert response.headers["content-range"] == f"bytes 1000-1023/{len(BODY)}"
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=10-5", "bytes=-0"])
+def test_unsatisfiable_range(client, header):
+    response = client.get("/audio", headers={"Range": header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-9", "lines=1-2", "bytes=x-y"])
+def test_unsupported_range_sends_the_whole_file(client, header):
+    response = client.get("/audio", headers={"Range": header})
+    assert response.status_code == 200
+    assert response.content == BODY
+
+def test_if_range_matching_etag_sends_the_range(client):
+    response = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": ETAG})
+    assert response.status_code == 206
+    assert response.content == BODY[:10]
+
+@pytest.mark.parametrize("if_range", ['"stale"', f"W/{ETAG}", "Tue, 01 Jan 2030 00:00:00 GMT"])
+def test_if_range_mismatch_sends_the_whole_file(client, if_range):
+    response = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": if_range})
+    assert response.status_code == 200
+    assert response.content == BODY
+
+@pytest.mark.parametrize("if_none_match", [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*"])
+def test_if_none_match_is_not_modified(client, if_none_match):
+    response = client.get("/audio", headers={"If-None-Match": if_none_match, "Range": "bytes=0-9"})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == ETAG
+    assert "content-disposition" not in response.headers
+
+def test_if_none_match_mismatch_sends_the_file(client):
+    response = client.get("/audio", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.content == BODY
@@ -0,0 +1,220 @@
+from typing import AsyncIterator, List
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight, StreamFlight
+
+async def settle():
+    """Let every runnable task reach its next await"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+async def collect(stream: AsyncIterator[bytes]) -> List[bytes]:
+    return [piece async for piece in stream]
+
+class Source:
+    """An upstream stream whose pieces the test hands out one at a time"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.opened = 0
+        self.finished = False
+
+    def open(self) -> AsyncIterator[bytes]:
+        self.opened += 1
+        return self._read()
+
+    async def _read(self) -> AsyncIterator[bytes]:
+        while True:
+            piece = await self.queue.get()
+            if piece is None:
+                self.finished = True
+                return
+            if isinstance(piece, Exception):
+                raise piece
+            yield piece
+
+    async def send(self, *pieces) -> None:
+        for piece in pieces:
+            self.queue.put_nowait(piece)
+        await settle()
+
+def test_single_flight_shares_one_call():
+    async def main():
+        flight: SingleFlight[str] = SingleFlight()
+        started = 0
+        release = asyncio.Event()
+
+        async def call():
+            nonlocal started
+            started += 1
+            await release.wait()
+            return "audio"
+
+        callers = [asyncio.create_task(flight.run("key", call)) for _ in range(3)]
+        await settle()
+        in_flight = flight.stats()
+        release.set()
+        return await asyncio.gather(*callers), started, in_flight, flight.stats()
+
+    results, started, in_flight, after = asyncio.run(main())
+    assert results == ["audio"] * 3
+    assert started == 1
+    assert in_flight == {"calls": 1, "coalesced": 2, "in_flight": 1}
+    assert after["in_flight"] == 0
+
+def test_single_flight_error_reaches_every_caller():
+    async def main():
+        flight: SingleFlight[str] = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            raise RuntimeError("upstream failed")
+
+        callers = [asyncio.create_task(flight.run("key", call)) for _ in range(3)]
+        await settle()
+        release.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(error) for error in results] == ["upstream failed"] * 3
+
+def test_single_flight_survives_the_first_caller_cancelling():
+    async def main():
+        flight: SingleFlight[str] = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "audio"
+
+        leader = asyncio.create_task(flight.run("key", call))
+        await settle()
+        follower = asyncio.create_task(flight.run("key", call))
+        await settle()
+        leader.cancel()
+        await settle()
+        release.set()
+        return leader, await follower
+
+    leader, result = asyncio.run(main())
+    assert leader.cancelled()
+    assert result == "audio"
+
+def test_single_flight_starts_a_new_call_after_one_finishes():
+    async def main():
+        flight: SingleFlight[int] = SingleFlight()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        return await flight.run("key", call), await flight.run("key", call)
+
+    assert asyncio.run(main()) == (1, 2)
+
+def test_stream_follower_joining_mid_stream_gets_it_from_the_start():
+    async def main():
+        flight = StreamFlight()
+        source = Source()
+        leader = asyncio.create_task(collect(flight.stream("key", source.open)))
+        await source.send(b"a", b"b")
+        follower = asyncio.create_task(collect(flight.stream("key", source.open)))
+        await source.send(b"c", None)
+        return await leader, await follower, source.opened, flight.stats()
+
+    leader, follower, opened, stats = asyncio.run(main())
+    assert leader == follower == [b"a", b"b", b"c"]
+    assert opened == 1
+    assert stats == {"calls": 1, "coalesced": 1, "in_flight": 0}
+
+def test_stream_error_reaches_every_follower():
+    async def main():
+        flight = StreamFlight()
+        source = Source()
+        received = [[], []]
+
+        async def follow(pieces: List[bytes]):
+            async for piece in flight.stream("key", source.open):
+                pieces.append(piece)
+
+        followers = [asyncio.create_task(follow(pieces)) for pieces in received]
+        await source.send(b"a", RuntimeError("upstream failed"))
+        return received, await asyncio.gather(*followers, return_exceptions=True)
+
+    received, results = asyncio.run(main())
+    assert received == [[b"a"], [b"a"]]
+    assert [str(error) for error in results] == ["upstream failed"] * 2
+
+def test_stream_survives_the_first_follower_cancelling():
+    async def main():
+        flight = StreamFlight()
+        source = Source()
+        leader = asyncio.create_task(collect(flight.stream("key", source.open)))
+        await source.send(b"a")
+        follower = asyncio.create_task(collect(flight.stream("key", source.open)))
+        await settle()
+        leader.cancel()
+        await source.send(b"b", None)
+        return leader, await follower, source.finished
+
+    leader, follower, finished = asyncio.run(main())
+    assert leader.cancelled()
+    assert follower == [b"a", b"b"]
+    assert finished
+
+def test_stream_is_read_to_the_end_without_followers():
+    async def main():
+        flight = StreamFlight()
+        source = Source()
+        stream = flight.stream("key", source.open)
+        await stream.aclose()
+        await source.send(b"a", b"b", None)
+        return source.finished, flight.stats()
+
+    finished, stats = asyncio.run(main())
+    assert finished
+    assert stats["in_flight"] == 0
+
+def test_stream_stops_replaying_past_the_limit():
+    async def main():
+        flight = StreamFlight(max_replay_bytes=3)
+        first, second = Source(), Source()
+        early = asyncio.create_task(collect(flight.stream("key", first.open)))
+        await first.send(b"ab")
+        joined = asyncio.create_task(collect(flight.stream("key", first.open)))
+        await first.send(b"cd")
+        # Past the limit, a new caller gets its own upstream read
+        late = asyncio.create_task(collect(flight.stream("key", second.open)))
+        await second.send(b"x", None)
+        await first.send(None)
+        return await early, await joined, await late, flight.stats()
+
+    early, joined, late, stats = asyncio.run(main())
+    assert early == joined == [b"ab", b"cd"]
+    assert late == [b"x"]
+    assert stats == {"calls": 2, "coalesced": 1, "in_flight": 0}
+
+def test_stream_drops_pieces_every_follower_has_read():
+    async def main():
+        flight = StreamFlight(max_replay_bytes=3)
+        source = Source()
+        fast = flight.stream("key", source.open)
+        slow = flight.stream("key", source.open)
+        broadcast = flight._streams["key"]
+        await source.send(b"ab", b"cd", b"ef")
+        held = [len(broadcast.pieces)]
+        assert [await fast.__anext__() for _ in range(3)] == [b"ab", b"cd", b"ef"]
+        held.append(len(broadcast.pieces))
+        assert await slow.__anext__() == b"ab"
+        held.append(len(broadcast.pieces))
+        await slow.aclose()
+        held.append(len(broadcast.pieces))
+        await source.send(None)
+        await fast.aclose()
+        return held
+
+    # Every piece is kept until the slow follower reads it, then released
+    assert asyncio.run(main()) == [3, 3, 2, 0]
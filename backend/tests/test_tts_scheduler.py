@@ -0,0 +1,166 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services import tts_scheduler, tts_service
+from app.services.audio_cache import AudioCache
+from app.services.tts_scheduler import BULK, PREVIEW, SAMPLE, DeadlineExceeded, TTSScheduler
+
+async def settle():
+    """Let every runnable task reach its next await"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+async def hold(scheduler: TTSScheduler, owner: str, priority: int, release: asyncio.Event, log: list | None = None):
+    async with scheduler.slot(owner, priority):
+        if log is not None:
+            log.append((owner, priority))
+        await release.wait()
+
+def test_slots_go_to_the_most_urgent_class_first():
+    async def main():
+        scheduler = TTSScheduler(max_concurrency=1, owner_concurrency=10)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, "user:0", SAMPLE, release))
+        await settle()
+        log = []
+        done = asyncio.Event()
+        done.set()
+        waiters = [
+            asyncio.create_task(hold(scheduler, f"user:{priority + 1}", priority, done, log))
+            for priority in (BULK, SAMPLE, PREVIEW)
+        ]
+        await settle()
+        assert scheduler.stats()["waiting"] == 3
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return log
+
+    assert [priority for _, priority in asyncio.run(main())] == [PREVIEW, SAMPLE, BULK]
+
+def test_owner_with_fewest_running_calls_goes_first():
+    async def main():
+        scheduler = TTSScheduler(max_concurrency=3, owner_concurrency=3)
+        busy = asyncio.Event()
+        other = asyncio.Event()
+        holders = [asyncio.create_task(hold(scheduler, "user:a", SAMPLE, busy)) for _ in range(2)]
+        holders.append(asyncio.create_task(hold(scheduler, "user:c", SAMPLE, other)))
+        await settle()
+        log = []
+        done = asyncio.Event()
+        done.set()
+        # user:a queues first, but already has two calls running
+        waiters = [asyncio.create_task(hold(scheduler, owner, SAMPLE, done, log)) for owner in ("user:a", "user:b")]
+        await settle()
+        other.set()
+        await settle()
+        busy.set()
+        await asyncio.gather(*holders, *waiters)
+        return log
+
+    assert [owner for owner, _ in asyncio.run(main())] == ["user:b", "user:a"]
+
+def test_owner_concurrency_cap():
+    async def main():
+        scheduler = TTSScheduler(max_concurrency=4, owner_concurrency=2)
+        release = asyncio.Event()
+        log = []
+        tasks = [asyncio.create_task(hold(scheduler, "user:a", SAMPLE, release, log)) for _ in range(3)]
+        tasks.append(asyncio.create_task(hold(scheduler, "user:b", SAMPLE, release, log)))
+        await settle()
+        running, waiting = scheduler.stats()["running"], scheduler.stats()["waiting"]
+        release.set()
+        await asyncio.gather(*tasks)
+        return log, running, waiting
+
+    log, running, waiting = asyncio.run(main())
+    assert (running, waiting) == (3, 1)
+    assert log[:3] == [("user:a", SAMPLE), ("user:a", SAMPLE), ("user:b", SAMPLE)]
+
+def test_bulk_is_kept_off_reserved_slots():
+    async def main():
+        scheduler = TTSScheduler(max_concurrency=3, owner_concurrency=10, reserved_interactive=1)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(scheduler, f"user:{n}", BULK, release)) for n in range(3)]
+        await settle()
+        before = scheduler.stats()["classes"]["bulk"]
+        tasks.append(asyncio.create_task(hold(scheduler, "user:9", PREVIEW, release)))
+        await settle()
+        after = scheduler.stats()
+        release.set()
+        await asyncio.gather(*tasks)
+        return before, after
+
+    before, after = asyncio.run(main())
+    assert (before["running"], before["waiting"]) == (2, 1)
+    assert after["classes"]["preview"]["running"] == 1
+    assert after["running"] == 3
+
+def test_queued_caller_gives_up_at_its_deadline():
+    async def main():
+        scheduler = TTSScheduler(max_concurrency=1, owner_concurrency=10, deadlines={SAMPLE: 0.05})
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, "user:a", BULK, release))
+        await settle()
+        with pytest.raises(DeadlineExceeded):
+            async with scheduler.slot("user:b", SAMPLE):
+                pass
+        stats = scheduler.stats()
+        release.set()
+        await holder
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["classes"]["sample"]["deadline_misses"] == 1
+    assert stats["waiting"] == 0
+
+def test_slot_granted_as_the_deadline_fires_is_kept(monkeypatch):
+    async def main():
+        scheduler = TTSScheduler(max_concurrency=1, owner_concurrency=10, deadlines={SAMPLE: 0.05})
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, "user:a", SAMPLE, release))
+        await settle()
+
+        async def granted_then_timed_out(awaitable, timeout):
+            release.set()
+            await holder
+            assert awaitable.done()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(tts_scheduler.asyncio, "wait_for", granted_then_timed_out)
+        async with scheduler.slot("user:b", SAMPLE):
+            inside = scheduler.stats()
+        monkeypatch.undo()
+        return inside, scheduler.stats()
+
+    inside, after = asyncio.run(main())
+    assert inside["running"] == 1
+    assert inside["classes"]["sample"]["deadline_misses"] == 0
+    assert after["running"] == 0
+
+def test_deadline_exceeded_is_a_503_with_retry_after(monkeypatch, tmp_path):
+    class Provider:
+        def is_voice_id(self, voice: str) -> bool:
+            return True
+
+        async def text_to_speech(self, text: str, voice_id: str, model_id: str) -> bytes:
+            return b"audio"
+
+    scheduler = TTSScheduler(max_concurrency=1, owner_concurrency=10, deadlines={SAMPLE: 0.05})
+    monkeypatch.setattr(tts_service, "scheduler", scheduler)
+    monkeypatch.setattr(tts_service, "provider", Provider())
+    monkeypatch.setattr(tts_service, "audio_cache", AudioCache(tmp_path, 1024 * 1024))
+
+    async def main():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, "user:a", BULK, release))
+        await settle()
+        try:
+            await tts_service.generate_audio("Hello there.", "voice", owner="user:b")
+        finally:
+            release.set()
+            await holder
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main())
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
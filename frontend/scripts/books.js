@@ -4,6 +4,7 @@ import auth from './auth.js';
 class Books {
     constructor() {
         this.books = [];
+        this.nextCursor = null;  // Cursor of the next page of books, if any
         this.app = null;  // Will be set after App is initialized
         this.setupEventListeners();
         this.handleAuthStateChange();
@@ -17,6 +18,7 @@ class Books {
         document.addEventListener('authStateChanged', (e) => this.handleAuthStateChange(e));
         document.getElementById('upload-new-book').addEventListener('click', () => this.showUploadView());
         document.getElementById('back-to-books').addEventListener('click', () => this.showBooksView());
+        document.getElementById('load-more-books').addEventListener('click', () => this.loadMoreBooks());
     }
 
     async handleAuthStateChange(event) {
@@ -25,27 +27,64 @@ class Books {
             this.showBooksView();
         } else {
             this.books = [];
+            this.nextCursor = null;
             this.renderBooks();
         }
     }
 
+    async fetchPage(cursor = null) {
+        const url = new URL(`${API_URL}/books`);
+        if (cursor) {
+            url.searchParams.set('cursor', cursor);
+        }
+        const response = await fetch(url, {
+            credentials: 'include'
+        });
+        if (!response.ok) {
+            return null;
+        }
+        return response.json();
+    }
+
     async loadBooks() {
         try {
-            const response = await fetch(`${API_URL}/books`, {
-                credentials: 'include'
-            });
-            if (response.ok) {
-                this.books = await response.json();
-                this.renderBooks();
+            // Only the first page; later pages are fetched by loadMoreBooks()
+            const page = await this.fetchPage();
+            if (!page) {
+                return;
             }
+            this.books = page.books;
+            this.nextCursor = page.next_cursor;
+            this.renderBooks();
         } catch (error) {
             console.error('Error loading books:', error);
         }
     }
 
+    async loadMoreBooks() {
+        if (!this.nextCursor) return;
+
+        const button = document.getElementById('load-more-books');
+        button.disabled = true;
+        try {
+            const page = await this.fetchPage(this.nextCursor);
+            if (!page) {
+                return;
+            }
+            this.books.push(...page.books);
+            this.nextCursor = page.next_cursor;
+            this.renderBooks();
+        } catch (error) {
+            console.error('Error loading more books:', error);
+        } finally {
+            button.disabled = false;
+        }
+    }
+
     renderBooks() {
         const grid = document.getElementById('books-grid');
         grid.innerHTML = '';
+        document.getElementById('load-more-books').classList.toggle('hidden', !this.nextCursor);
 
         if (this.books.length === 0) {
             grid.innerHTML = `